@@ -23,6 +23,7 @@ from edap.generators import (
     RegexGenerator,
     RegexInferenceGenerator,
     MarkovGenerator,
+    PCFGGenerator,
     HybridGenerator,
     create_hybrid_generator,
 )
@@ -38,6 +39,10 @@ from edap.scorer import Scorer, StrengthScore
 from edap.filters import Filter, FilterConfig, create_filter, FILTER_PRESETS
 from edap.stats_exporter import StatsExporter
 from edap.batch import BatchProcessor, BatchResult
+from edap.store import EmittedStore
+from edap.compiled import CompiledModel, SharedModel
+from edap.masks import Mask
+from edap.ranker import Ranker
 from edap.progress import ProgressBar, progress, Spinner
 
 __all__ = [
@@ -56,6 +61,7 @@ __all__ = [
     "RegexGenerator",
     "RegexInferenceGenerator",
     "MarkovGenerator",
+    "PCFGGenerator",
     "HybridGenerator",
     "create_hybrid_generator",
     # Regex
@@ -80,6 +86,15 @@ __all__ = [
     # Batch
     "BatchProcessor",
     "BatchResult",
+    # Store
+    "EmittedStore",
+    # Compiled model
+    "CompiledModel",
+    "SharedModel",
+    # Masks
+    "Mask",
+    # Ranker
+    "Ranker",
     # Progress
     "ProgressBar",
     "progress",
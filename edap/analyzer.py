@@ -14,6 +14,7 @@ from edap.models import (
     LengthStats,
     PositionStats,
     WordAnalysis,
+    split_segments,
 )
 
 logger = logging.getLogger(__name__)
@@ -56,6 +57,8 @@ class PatternAnalyzer:
         self._cooccurrence: Dict[str, Dict[int, Dict[int, Set[str]]]] = defaultdict(
             lambda: defaultdict(lambda: defaultdict(set))
         )
+        self._structures: Counter = Counter()
+        self._terminals: Dict[str, Counter] = defaultdict(Counter)
         self._analyzed = False
 
     def analyze_file(
@@ -149,6 +152,12 @@ class PatternAnalyzer:
                 if i != j:
                     self._cooccurrence[char][i][j].add(other_char)
 
+        # Segment grammar (letter/digit/symbol runs)
+        segments = split_segments(word)
+        self._structures["".join(key for key, _ in segments)] += 1
+        for key, text in segments:
+            self._terminals[key][text] += 1
+
     def _build_result(self) -> AnalysisResult:
         """Build the final analysis result."""
         if not self._analyzed:
@@ -171,9 +180,18 @@ class PatternAnalyzer:
             global_type_frequency=self._global_type_freq.copy(),
             min_length=min_len,
             max_length=max_len,
-            cooccurrence=dict(self._cooccurrence),
+            cooccurrence={
+                char: {pos: dict(targets) for pos, targets in pos_data.items()}
+                for char, pos_data in self._cooccurrence.items()
+            },
+            structures=self._structures.copy(),
+            terminals={key: counts.copy() for key, counts in self._terminals.items()},
         )
 
+    def get_unique_words(self) -> Set[str]:
+        """Get the distinct words seen by the last analysis."""
+        return self._unique_words
+
     def get_word_analysis(self, word: str) -> WordAnalysis:
         """
         Get detailed analysis of a single word.
@@ -7,23 +7,44 @@ A pattern analysis and string generation tool.
 """
 
 import argparse
+import functools
+import io
+import itertools
 import logging
+import os
+import secrets
+import sqlite3
 import sys
 from pathlib import Path
-from typing import List, Optional
+from typing import (
+    Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple, Union, cast,
+)
 
 from edap import __version__, __author__
 from edap.analyzer import PatternAnalyzer
 from edap.generators import (
+    BaseGenerator,
     RandomGenerator,
     SmartGenerator,
     PatternGenerator,
     RegexGenerator,
+    MarkovGenerator,
+    PCFGGenerator,
+    HybridGenerator,
+    create_hybrid_generator,
+    get_hybrid_preset,
 )
+from edap.exceptions import InsufficientDataError
+from edap.masks import Mask, propose_masks, select_masks
+from edap.models import AnalysisResult
+from edap.parallel import ConcurrentHybridGenerator, ParallelGenerator
+from edap.ranker import Ranker
 from edap.regex_builder import RegexBuilder
+from edap.store import EmittedStore
 from edap.exporters import (
     HashAlgorithm,
     OutputFormat,
+    Record,
     ResultExporter,
 )
 
@@ -39,6 +60,14 @@ BANNER = r"""
                     Ehab Hussein
 """
 
+# rank -m choices and the generator mode whose log_prob each uses
+RANK_MODES = {
+    'positional': 'random',
+    'pattern': 'pattern',
+    'markov': 'markov',
+}
+RANK_MODELS = list(RANK_MODES)
+
 
 def setup_logging(verbose: bool = False, quiet: bool = False) -> None:
     """Configure logging based on verbosity."""
@@ -55,12 +84,53 @@ def setup_logging(verbose: bool = False, quiet: bool = False) -> None:
     )
 
 
+def parse_lengths(value: str) -> List[int]:
+    """Parse a --length value: "10", "8,10", "8-12" or a mix ("6,8-10")."""
+    lengths: Set[int] = set()
+    try:
+        for part in value.split(','):
+            first, sep, last = part.strip().partition('-')
+            low = int(first)
+            high = int(last) if sep else low
+            if low < 1 or high < low:
+                raise ValueError(part)
+            lengths.update(range(low, high + 1))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid length list: {value!r}") from None
+    return sorted(lengths)
+
+
+def parse_budget(value: str) -> int:
+    """Parse a keyspace budget such as "1e12" or "5000000"."""
+    try:
+        budget = int(float(value))
+    except (ValueError, OverflowError):
+        raise argparse.ArgumentTypeError(f"invalid budget: {value!r}") from None
+    if budget < 1:
+        raise argparse.ArgumentTypeError(f"budget must be positive: {value!r}")
+    return budget
+
+
+def parse_bounds(value: str) -> Tuple[float, float]:
+    """Parse a --weight-bounds value such as "0.25,4"."""
+    try:
+        low, high = (float(part) for part in value.split(','))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid bounds: {value!r}") from None
+    if not 0 < low <= 1 <= high:
+        raise argparse.ArgumentTypeError(f"bounds must satisfy 0 < low <= 1 <= high: {value!r}")
+    return low, high
+
+
 def create_parser() -> argparse.ArgumentParser:
     """Create the argument parser."""
     parser = argparse.ArgumentParser(
         prog='edap',
         description='EDAP - Empirical Distribution Analysis for Patterns',
-        epilog='Example: edap wordlist.txt -n 100 -m smart -o output.txt',
+        epilog='Example: edap wordlist.txt -n 100 -m smart -o output.txt\n'
+               'Mask planning: edap masks wordlist.txt --budget 1e12\n'
+               'Wordlist ranking: edap rank wordlist.txt huge.txt -o ranked.txt',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
     )
 
     parser.add_argument(
@@ -89,12 +159,13 @@ def create_parser() -> argparse.ArgumentParser:
         '-n', '--count',
         type=int,
         default=10,
-        help='Number of strings to generate (default: 10)',
+        help='Number of strings to generate; 0 streams until the output '
+             'is closed (default: 10)',
     )
 
     parser.add_argument(
         '-m', '--mode',
-        choices=['random', 'smart', 'pattern', 'regex'],
+        choices=['random', 'smart', 'pattern', 'regex', 'markov', 'pcfg', 'hybrid'],
         default='smart',
         help='Generation mode (default: smart)',
     )
@@ -108,7 +179,92 @@ def create_parser() -> argparse.ArgumentParser:
     parser.add_argument(
         '--pattern',
         type=str,
-        help='Explicit type pattern (e.g., "UllnnU") for pattern mode',
+        help='Explicit type pattern (e.g., "UllnnU") for pattern mode; '
+             'candidates are unique and -n 0 enumerates its keyspace',
+    )
+
+    parser.add_argument(
+        '--markov-order', '--order',
+        dest='markov_order',
+        type=int,
+        default=2,
+        help='Markov chain n-gram order (default: 2)',
+    )
+
+    parser.add_argument(
+        '--markov-model',
+        type=Path,
+        metavar='FILE',
+        help='Load a saved Markov model instead of training on the input',
+    )
+
+    parser.add_argument(
+        '--save-markov-model',
+        type=Path,
+        metavar='FILE',
+        help='Save the trained Markov model for later runs',
+    )
+
+    parser.add_argument(
+        '--enumerate',
+        action='store_true',
+        help='Emit candidates in decreasing probability order instead of '
+             'sampling (markov, pcfg, random and pattern modes; -n is the '
+             'guess budget, 0 = all)',
+    )
+
+    parser.add_argument(
+        '--mask',
+        type=str,
+        help='Enumerate the full keyspace of a hashcat mask (e.g. "?u?l?l?d?d") '
+             'instead of generating; -n 0 covers the whole keyspace',
+    )
+
+    for number in range(1, 5):
+        parser.add_argument(
+            f'-{number}', f'--custom-charset{number}',
+            dest=f'custom_charset{number}',
+            metavar='CHARSET',
+            help=f'Custom charset referenced as ?{number} in --mask (e.g. "?l?d_")',
+        )
+
+    parser.add_argument(
+        '--mask-observed',
+        action='store_true',
+        help='Restrict each --mask position to the chars seen there in the input',
+    )
+
+    parser.add_argument(
+        '--hybrid-mode', '--preset',
+        dest='hybrid_mode',
+        choices=['balanced', 'strict', 'creative'],
+        default='balanced',
+        help='Hybrid preset (default: balanced)',
+    )
+
+    parser.add_argument(
+        '--adaptive',
+        action='store_true',
+        help='Hybrid mode: shift preset weights toward the sub-generators with '
+             'the most new words per second (within --weight-bounds); timing-'
+             'dependent, so not combinable with --seed, --counter or --workers',
+    )
+
+    parser.add_argument(
+        '--weight-bounds',
+        type=parse_bounds,
+        default=(0.25, 4.0),
+        metavar='LOW,HIGH',
+        help='Multiples of its preset weight an adaptive sub-generator stays '
+             'within (default: 0.25,4)',
+    )
+
+    parser.add_argument(
+        '--concurrent',
+        action='store_true',
+        help='Hybrid mode: run each sub-generator as its own process feeding a '
+             'bounded queue, merged by weight so slow ones do not hold back '
+             'fast ones (output order varies between runs)',
     )
 
     # Output options
@@ -132,6 +288,28 @@ def create_parser() -> argparse.ArgumentParser:
         help='Apply hash algorithm to output',
     )
 
+    parser.add_argument(
+        '--with-prob',
+        action='store_true',
+        help="Add each candidate's natural log probability under the mode's "
+             "model as a logprob field (csv and jsonl formats)",
+    )
+
+    parser.add_argument(
+        '--with-guess',
+        action='store_true',
+        help="With --enumerate, add each candidate's guess number (its rank "
+             "in the enumeration, from 1) as a guess field (csv and jsonl formats)",
+    )
+
+    parser.add_argument(
+        '--min-logprob',
+        type=float,
+        metavar='LOGPROB',
+        help='Never emit candidates whose log probability is below this; '
+             'write it with = (e.g. --min-logprob=-20), as -1 to -4 are options',
+    )
+
     # Analysis options
     parser.add_argument(
         '--analyze-only',
@@ -168,8 +346,9 @@ def create_parser() -> argparse.ArgumentParser:
 
     parser.add_argument(
         '--length',
-        type=int,
-        help='Generate only strings of this exact length',
+        type=parse_lengths,
+        metavar='LENGTHS',
+        help='Generate only strings of these lengths, e.g. 10, 8,10 or 8-12',
     )
 
     # Other options
@@ -185,6 +364,81 @@ def create_parser() -> argparse.ArgumentParser:
         help='Allow generating duplicates of input words',
     )
 
+    parser.add_argument(
+        '--no-dedupe',
+        action='store_true',
+        help='Do not track emitted strings (constant memory for endless '
+             'streams; output may repeat)',
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Worker processes for generation (default: 1)',
+    )
+
+    parser.add_argument(
+        '--unordered',
+        action='store_true',
+        help='With --workers, merge chunks as they finish '
+             '(faster, but output order is not reproducible)',
+    )
+
+    parser.add_argument(
+        '--counter',
+        action='store_true',
+        help='Counter-based generation: candidate i depends only on --seed and i, '
+             'so runs can be split and resumed by index',
+    )
+
+    parser.add_argument(
+        '--permute',
+        action='store_true',
+        help='Walk the whole pattern keyspace (pattern mode, optionally '
+             'with --pattern) in a seeded pseudorandom order: no repeats, '
+             'stops when exhausted',
+    )
+
+    parser.add_argument(
+        '--quota',
+        action='store_true',
+        help='Split -n across (length, pattern) strata in proportion to their '
+             'frequency, capped by each keyspace, one batch per stratum '
+             '(pattern mode)',
+    )
+
+    parser.add_argument(
+        '--skip',
+        type=int,
+        default=0,
+        help='First candidate index with --counter, --permute or --mask '
+             '(default: 0)',
+    )
+
+    parser.add_argument(
+        '--stride',
+        type=int,
+        default=1,
+        help='Index stride with --counter, --permute or --mask; worker k of N uses '
+             '--skip k --stride N',
+    )
+
+    parser.add_argument(
+        '--limit',
+        type=int,
+        help='Number of indices to cover with --counter, --permute or --mask '
+             '(default: until -n is reached)',
+    )
+
+    parser.add_argument(
+        '--emitted-db',
+        type=Path,
+        help='SQLite store of candidates emitted by previous runs; '
+             'only new candidates are generated, and they are recorded once '
+             'written (an interrupted run may re-emit its last batch, never lose it)',
+    )
+
     parser.add_argument(
         '-v', '--verbose',
         action='store_true',
@@ -206,12 +460,313 @@ def create_parser() -> argparse.ArgumentParser:
     return parser
 
 
+def create_masks_parser() -> argparse.ArgumentParser:
+    """Create the argument parser for the masks subcommand."""
+    parser = argparse.ArgumentParser(
+        prog='edap masks',
+        description='Pick the hashcat masks that crack the most input words '
+                    'within a keyspace budget',
+        epilog='Example: edap masks wordlist.txt --budget 1e12 -o attack.hcmask',
+    )
+
+    parser.add_argument(
+        'input',
+        type=Path,
+        help='Input wordlist file',
+    )
+
+    parser.add_argument(
+        '--budget',
+        type=parse_budget,
+        required=True,
+        help='Total keyspace (number of guesses) to spend, e.g. 1e12',
+    )
+
+    parser.add_argument(
+        '--observed',
+        action='store_true',
+        help='Use custom charsets of only the chars seen in each pattern '
+             '(smaller keyspaces, ?1-?4 per mask)',
+    )
+
+    parser.add_argument(
+        '-o', '--output',
+        type=Path,
+        help='Output .hcmask file (default: stdout)',
+    )
+
+    parser.add_argument(
+        '--min-length',
+        type=int,
+        default=1,
+        help='Minimum word length to analyze (default: 1)',
+    )
+
+    parser.add_argument(
+        '--max-length',
+        type=int,
+        default=256,
+        help='Maximum word length to analyze (default: 256)',
+    )
+
+    parser.add_argument(
+        '-v', '--verbose',
+        action='store_true',
+        help='Verbose output',
+    )
+
+    parser.add_argument(
+        '-q', '--quiet',
+        action='store_true',
+        help='Suppress informational output',
+    )
+
+    return parser
+
+
+def masks_main(argv: List[str]) -> int:
+    """Entry point of the masks subcommand: write a budget-optimal .hcmask."""
+    args = create_masks_parser().parse_args(argv)
+    setup_logging(args.verbose, args.quiet)
+
+    if not args.input.exists():
+        logging.error(f"Input file not found: {args.input}")
+        return 1
+
+    result, _ = analyze_input(args.input, args.min_length, args.max_length, False)
+    if not result.total_words:
+        logging.error("No words to analyze")
+        return 1
+
+    candidates = propose_masks(result, observed=args.observed)
+    selected = select_masks(candidates, args.budget)
+
+    keyspace = sum(c.keyspace for c in selected)
+    cracked = sum(c.count for c in selected)
+    coverage = cracked / result.total_words
+
+    lines = [
+        f"# edap masks: {len(selected)} of {len(candidates)} masks, "
+        f"keyspace {keyspace:,} of budget {args.budget:,}",
+        f"# estimated coverage {coverage:.2%} ({cracked} of {result.total_words} input words)",
+    ]
+    lines.extend(c.to_hcmask() for c in selected)
+    text = "\n".join(lines) + "\n"
+
+    if args.output:
+        args.output.write_text(text, encoding='utf-8')
+        logging.info(f"Masks written to: {args.output}")
+    else:
+        sys.stdout.write(text)
+
+    for c in selected:
+        logging.debug(f"{c.to_hcmask()}  count={c.count} keyspace={c.keyspace:,} "
+                      f"cracks/guess={c.efficiency:.3g}")
+    logging.info(f"Selected {len(selected)} masks, keyspace {keyspace:,}, "
+                 f"estimated coverage {coverage:.2%}")
+    return 0
+
+
+def create_rank_parser() -> argparse.ArgumentParser:
+    """Create the argument parser for the rank subcommand."""
+    parser = argparse.ArgumentParser(
+        prog='edap rank',
+        description='Reorder a wordlist by log probability under a model '
+                    'learned from a training wordlist, most probable first',
+        epilog='Example: edap rank training.txt huge.txt -m markov --workers 8 -o ranked.txt',
+    )
+
+    parser.add_argument(
+        'input',
+        type=Path,
+        help='Training wordlist the model is learned from',
+    )
+
+    parser.add_argument(
+        'candidates',
+        type=Path,
+        help='Wordlist to rank (one candidate per line, any size)',
+    )
+
+    parser.add_argument(
+        '-m', '--model',
+        choices=RANK_MODELS,
+        default='markov',
+        help='Scoring model (default: markov)',
+    )
+
+    parser.add_argument(
+        '--markov-order', '--order',
+        dest='markov_order',
+        type=int,
+        default=2,
+        help='Markov chain n-gram order (default: 2)',
+    )
+
+    parser.add_argument(
+        '--markov-model',
+        type=Path,
+        metavar='FILE',
+        help='Load a saved Markov model instead of training on the input',
+    )
+
+    parser.add_argument(
+        '--save-markov-model',
+        type=Path,
+        metavar='FILE',
+        help='Save the trained Markov model for later runs',
+    )
+
+    parser.add_argument(
+        '-o', '--output',
+        type=Path,
+        help='Output file (default: stdout)',
+    )
+
+    parser.add_argument(
+        '-f', '--format',
+        choices=['text', 'csv', 'jsonl'],
+        default='text',
+        help='Output format (default: text)',
+    )
+
+    parser.add_argument(
+        '--with-prob',
+        action='store_true',
+        help="Add each line's natural log probability as a logprob field "
+             "(csv and jsonl formats)",
+    )
+
+    parser.add_argument(
+        '--min-logprob',
+        type=float,
+        metavar='LOGPROB',
+        help='Drop lines whose log probability is below this '
+             '(write it with =, e.g. --min-logprob=-20)',
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Worker processes scoring, sorting and merging runs (default: 1)',
+    )
+
+    parser.add_argument(
+        '--chunk-mb',
+        type=float,
+        default=16,
+        help='Megabytes of input sorted in memory per run, per worker (default: 16)',
+    )
+
+    parser.add_argument(
+        '--tmp-dir',
+        type=Path,
+        help='Directory for temporary run files (default: system temp dir)',
+    )
+
+    parser.add_argument(
+        '--min-length',
+        type=int,
+        default=1,
+        help='Minimum word length to analyze (default: 1)',
+    )
+
+    parser.add_argument(
+        '--max-length',
+        type=int,
+        default=256,
+        help='Maximum word length to analyze (default: 256)',
+    )
+
+    parser.add_argument(
+        '-v', '--verbose',
+        action='store_true',
+        help='Verbose output',
+    )
+
+    parser.add_argument(
+        '-q', '--quiet',
+        action='store_true',
+        help='Suppress informational output',
+    )
+
+    return parser
+
+
+def rank_main(argv: List[str]) -> int:
+    """Entry point of the rank subcommand: sort a wordlist by model probability."""
+    args = create_rank_parser().parse_args(argv)
+    setup_logging(args.verbose, args.quiet)
+
+    for path in (args.input, args.candidates):
+        if not path.exists():
+            logging.error(f"Input file not found: {path}")
+            return 1
+    if args.workers < 1 or args.chunk_mb <= 0:
+        logging.error("--workers must be at least 1 and --chunk-mb positive")
+        return 1
+    if args.with_prob and args.format == 'text':
+        logging.error("--with-prob requires -f csv or jsonl")
+        return 1
+
+    result, _ = analyze_input(args.input, args.min_length, args.max_length, False)
+    if not result.total_words:
+        logging.error("No words to analyze")
+        return 1
+
+    markov_transitions = None
+    if args.model == 'markov':
+        markov_transitions = prepare_markov(result, args)
+        if markov_transitions is None:
+            return 1
+
+    ranker = Ranker(
+        get_generator_factory(
+            RANK_MODES[args.model],
+            markov_order=args.markov_order,
+            markov_transitions=markov_transitions,
+        ),
+        result,
+        workers=args.workers,
+        chunk_bytes=max(1, int(args.chunk_mb * (1 << 20))),
+        min_logprob=args.min_logprob,
+        tmp_dir=args.tmp_dir,
+    )
+    logging.info(f"Ranking {args.candidates} with the {args.model} model...")
+
+    ranked = ranker.rank(args.candidates)
+    stream = ranked if args.with_prob else (word for word, _ in ranked)
+    exporter = ResultExporter(format=args.format)
+    try:
+        # Lines that are not valid UTF-8 go back out as the bytes they came in as
+        if args.output:
+            exporter.export_stream_to_file(
+                stream, args.output, errors='surrogateescape', with_prob=args.with_prob,
+            )
+            logging.info(f"Output written to: {args.output}")
+        else:
+            if isinstance(sys.stdout, io.TextIOWrapper):
+                sys.stdout.reconfigure(errors='surrogateescape')
+            exporter.export_stream(stream, sys.stdout, with_prob=args.with_prob)
+            sys.stdout.flush()
+    except BrokenPipeError:
+        _silence_stdout()
+        return 0
+    finally:
+        ranked.close()
+
+    logging.info(f"Ranked {ranker.lines} lines in {ranker.runs} runs"
+                 + (f", dropped {ranker.dropped} below --min-logprob" if ranker.dropped else ""))
+    return 0
+
+
 def analyze_input(
     filepath: Path,
     min_length: int,
     max_length: int,
     show_stats: bool,
-) -> 'AnalysisResult':
+) -> Tuple[AnalysisResult, PatternAnalyzer]:
     """Analyze the input file."""
     analyzer = PatternAnalyzer(min_length=min_length, max_length=max_length)
     result = analyzer.analyze_file(filepath)
@@ -222,69 +777,364 @@ def analyze_input(
     return result, analyzer
 
 
-def generate_strings(
-    result,
+def prepare_markov(
+    result: AnalysisResult,
+    args: argparse.Namespace,
+) -> Optional[Dict[str, Dict[str, int]]]:
+    """
+    Load or train the Markov chain for -m markov.
+
+    Training streams the input file, so only transition counts are held
+    in memory. Returns the transitions, or None after logging an error.
+    """
+    if args.markov_model:
+        try:
+            args.markov_order, transitions = MarkovGenerator.load_model(args.markov_model)
+        except (OSError, ValueError) as e:
+            logging.error(f"Cannot load Markov model: {e}")
+            return None
+        logging.info(f"Loaded order-{args.markov_order} Markov model: {args.markov_model}")
+    else:
+        if args.markov_order < 1:
+            logging.error("--markov-order must be at least 1")
+            return None
+        trainer = MarkovGenerator(result, order=args.markov_order, transitions={})
+        trained = trainer.train_on_file(args.input, min_length=args.min_length, max_length=args.max_length)
+        transitions = trainer.get_transitions()
+        logging.info(f"Trained order-{args.markov_order} Markov chain on {trained} words")
+
+    if args.save_markov_model:
+        MarkovGenerator(
+            result, order=args.markov_order, transitions=transitions,
+        ).save_model(args.save_markov_model)
+        logging.info(f"Markov model written to: {args.save_markov_model}")
+
+    return transitions
+
+
+def get_generator_factory(
+    mode: str,
+    regex_pattern: Optional[str] = None,
+    markov_order: int = 2,
+    markov_transitions: Optional[Dict[str, Dict[str, int]]] = None,
+    hybrid_mode: str = 'balanced',
+    adaptive: bool = False,
+    weight_bounds: Tuple[float, float] = (0.25, 4.0),
+) -> Callable[..., BaseGenerator]:
+    """
+    Get a picklable generator factory for the specified mode.
+
+    The factory is called as factory(analysis, seed=..., exclude_original=...),
+    so it can also be shipped to worker processes.
+    """
+    if mode == 'random':
+        return RandomGenerator
+    elif mode == 'smart':
+        return SmartGenerator
+    elif mode == 'pattern':
+        return PatternGenerator
+    elif mode == 'regex':
+        if not regex_pattern:
+            logging.error("Regex mode requires --regex pattern")
+            sys.exit(1)
+        return functools.partial(RegexGenerator, pattern=regex_pattern)
+    elif mode == 'markov':
+        return functools.partial(
+            MarkovGenerator,
+            order=markov_order,
+            transitions=markov_transitions,
+        )
+    elif mode == 'pcfg':
+        return PCFGGenerator
+    elif mode == 'hybrid':
+        return functools.partial(
+            create_hybrid_generator,
+            mode=hybrid_mode,
+            adaptive=adaptive,
+            weight_bounds=weight_bounds,
+        )
+
+    logging.error(f"Unknown mode: {mode}")
+    sys.exit(1)
+
+
+def iter_strings(
+    result: AnalysisResult,
     mode: str,
     count: int,
     seed: Optional[int],
     allow_duplicates: bool,
     regex_pattern: Optional[str] = None,
     type_pattern: Optional[str] = None,
-    target_length: Optional[int] = None,
-) -> List[str]:
-    """Generate strings using the specified mode."""
-    # Select generator
-    if mode == 'random':
-        generator = RandomGenerator(
+    target_length: Optional[Union[int, Iterable[int]]] = None,
+    emitted_store: Optional[EmittedStore] = None,
+    workers: int = 1,
+    ordered: bool = True,
+    counter: bool = False,
+    skip: int = 0,
+    stride: int = 1,
+    limit: Optional[int] = None,
+    dedupe: bool = True,
+    markov_order: int = 2,
+    markov_transitions: Optional[Dict[str, Dict[str, int]]] = None,
+    hybrid_mode: str = 'balanced',
+    original_words: Optional[Set[str]] = None,
+    enumerate_ordered: bool = False,
+    permute: bool = False,
+    quota: bool = False,
+    concurrent: bool = False,
+    adaptive: bool = False,
+    weight_bounds: Tuple[float, float] = (0.25, 4.0),
+    with_prob: bool = False,
+    min_logprob: Optional[float] = None,
+    with_guess: bool = False,
+) -> Iterator[Union[str, Record]]:
+    """
+    Lazily generate strings using the specified mode.
+
+    Nothing is materialized: strings are produced as the consumer pulls
+    them, and count=0 keeps producing until the consumer stops.
+    Input words (original_words) are skipped unless allow_duplicates.
+    Candidates whose log probability is below min_logprob are never
+    produced, and with_prob yields (string, log probability) pairs.
+    With enumerate_ordered, with_guess adds each candidate's guess
+    number (1 for the first) after the log probability.
+    """
+    factory = get_generator_factory(
+        mode, regex_pattern, markov_order, markov_transitions, hybrid_mode,
+        adaptive, weight_bounds,
+    )
+
+    lengths = None
+    if target_length is not None:
+        lengths = [target_length] if isinstance(target_length, int) else list(target_length)
+
+    if counter or permute:
+        generator = factory(
             result,
             seed=seed,
             exclude_original=not allow_duplicates,
         )
-    elif mode == 'smart':
-        generator = SmartGenerator(
+        generator.set_emitted_store(emitted_store)
+        generator.set_original_words(original_words or set())
+        generator.set_min_logprob(min_logprob)
+        if lengths is not None:
+            generator.set_lengths(lengths)
+
+        stop = skip + limit * stride if limit is not None else None
+        emitted = 0
+        next_index = skip
+        if permute:
+            flag = '--permute'
+            indexed = cast(PatternGenerator, generator).generate_permuted(
+                type_pattern, skip, stop, stride,
+            )
+        else:
+            flag = '--counter'
+            indexed = generator.generate_indexed(skip, stop, stride, allow_duplicates=not dedupe)
+
+        for index, word in indexed:
+            yield (word, generator.score(word)) if with_prob else word
+            emitted += 1
+            next_index = index + stride
+            if emitted == count:
+                break
+        else:
+            if stop is None:
+                logging.info("Keyspace exhausted")
+                return
+            next_index = stop
+
+        logging.info(f"Resume with: {flag} --seed {seed} --skip {next_index} --stride {stride}")
+        return
+
+    # One producer process per hybrid sub-generator
+    if concurrent:
+        producers = ConcurrentHybridGenerator(
+            get_hybrid_preset(hybrid_mode),
             result,
             seed=seed,
             exclude_original=not allow_duplicates,
+            lengths=lengths,
         )
-    elif mode == 'pattern':
-        generator = PatternGenerator(
-            result,
-            seed=seed,
-            exclude_original=not allow_duplicates,
+        producers.set_original_words(original_words or set())
+        yield from producers.generate_iter(
+            count,
+            allow_duplicates=not dedupe,
+            emitted_store=emitted_store,
         )
-    elif mode == 'regex':
-        if not regex_pattern:
-            logging.error("Regex mode requires --regex pattern")
-            sys.exit(1)
-        generator = RegexGenerator(
+        return
+
+    # Fan out across a process pool (explicit patterns stay serial)
+    if workers > 1 and not (mode == 'pattern' and type_pattern):
+        parallel = ParallelGenerator(
+            factory,
             result,
-            pattern=regex_pattern,
+            workers=workers,
             seed=seed,
+            ordered=ordered,
             exclude_original=not allow_duplicates,
+            lengths=lengths,
+            min_logprob=min_logprob,
         )
-    else:
-        logging.error(f"Unknown mode: {mode}")
-        sys.exit(1)
-
-    # Handle explicit pattern for pattern mode
-    if mode == 'pattern' and type_pattern:
-        generated = []
-        for _ in range(count):
-            word = generator.generate_from_explicit_pattern(type_pattern)
-            if word:
-                generated.append(word)
-        return generated
-
-    # Generate
-    generated = generator.generate(count)
+        parallel.set_original_words(original_words or set())
+        words = parallel.generate_iter(
+            count,
+            allow_duplicates=not dedupe,
+            emitted_store=emitted_store,
+        )
+        if not with_prob:
+            yield from words
+            return
+        # The workers apply the cutoff; the output scores are looked up here
+        scorer = factory(result, seed=seed, exclude_original=not allow_duplicates)
+        if lengths is not None:
+            scorer.set_lengths(lengths)
+        for word in words:
+            yield word, scorer.log_prob(word)
+        return
+
+    generator = factory(
+        result,
+        seed=seed,
+        exclude_original=not allow_duplicates,
+    )
+    generator.set_emitted_store(emitted_store)
+    generator.set_original_words(original_words or set())
+    generator.set_min_logprob(min_logprob)
 
-    # Calculate and display weights
-    if logging.getLogger().level <= logging.INFO:
-        for word in generated:
-            weight = generator.calculate_weight(word)
-            logging.debug(f"Generated: {word} (weight={weight})")
+    def annotated(words: Iterable[str]) -> Iterator[Union[str, Record]]:
+        """The words, paired with their score when with_prob."""
+        if not with_prob:
+            return iter(words)
+        return ((word, generator.score(word)) for word in words)
 
-    return generated
+    # Handle explicit pattern for pattern mode (the pattern fixes the length)
+    if mode == 'pattern' and type_pattern:
+        pattern_generator = cast(PatternGenerator, generator)
+        size = pattern_generator.keyspace(type_pattern).size
+        logging.info(f"Pattern {type_pattern}: keyspace {size:,}")
+        emitted = 0
+        for item in annotated(pattern_generator.generate_explicit_iter(
+            type_pattern, count, allow_duplicates=not dedupe,
+        )):
+            yield item
+            emitted += 1
+        if dedupe and emitted < count:
+            logging.info(f"Pattern {type_pattern} exhausted after {emitted:,} unique candidates")
+        return
+
+    if lengths is not None:
+        generator.set_lengths(lengths)
+
+    # Fixed per-stratum quotas, one stratum at a time
+    if quota:
+        yield from annotated(cast(PatternGenerator, generator).generate_stratified(count))
+        return
+
+    # Probability-ordered enumeration needs no sampling or dedupe set
+    if enumerate_ordered:
+        if mode == 'markov':
+            ordered_words = cast(MarkovGenerator, generator).generate_ordered(count)
+        else:
+            ordered_words = generator.generate_top(count)
+        if not with_guess:
+            yield from annotated(ordered_words)
+            return
+        for guess, word in enumerate(ordered_words, 1):
+            yield (word, generator.score(word), guess) if with_prob else (word, guess)
+        return
+
+    # Display scores
+    show_scores = logging.getLogger().isEnabledFor(logging.DEBUG)
+
+    for word in generator.generate_iter(count, allow_duplicates=not dedupe):
+        if show_scores:
+            logging.debug(f"Generated: {word} (logprob={generator.score(word):.2f})")
+        yield (word, generator.score(word)) if with_prob else word
+
+    if dedupe and generator.saturation.exhausted:
+        logging.info(f"Saturated: {generator.saturation}")
+
+    if isinstance(generator, HybridGenerator) and generator.adaptive:
+        weights = ", ".join(f"{name} {weight:.2f}" for name, weight in generator.effective_weights)
+        logging.info(f"Effective hybrid weights: {weights}")
+
+    if generator.attempts:
+        logging.info(f"Acceptance rate: {generator.acceptance_rate:.1%} "
+                     f"of {generator.attempts} constrained fills")
+
+
+def iter_mask(
+    mask: Mask,
+    count: int,
+    skip: int = 0,
+    stride: int = 1,
+    limit: Optional[int] = None,
+    emitted_store: Optional[EmittedStore] = None,
+) -> Iterator[str]:
+    """
+    Lazily enumerate a mask's keyspace from index skip.
+
+    Stops after count candidates (0 = no cap) or limit indices, and logs
+    the index to resume from.
+    """
+    stop = skip + limit * stride if limit is not None else None
+    covered = 0
+    emitted = 0
+    for word in mask.candidates(skip, stop, stride):
+        covered += 1
+        if emitted_store is not None and not emitted_store.claim(word):
+            continue
+        yield word
+        emitted += 1
+        if emitted == count:
+            break
+
+    next_index = skip + covered * stride
+    if next_index >= mask.size:
+        logging.info("Keyspace exhausted")
+    else:
+        logging.info(f"Resume with: --mask '{mask}' --skip {next_index} --stride {stride}")
+
+
+def generate_strings(*args: Any, **kwargs: Any) -> List[Union[str, Record]]:
+    """Generate strings using the specified mode (see iter_strings)."""
+    return list(iter_strings(*args, **kwargs))
+
+
+def _commit_written(
+    items: Iterable[Union[str, Record]],
+    sink: TextIO,
+    store: EmittedStore,
+) -> Iterator[Union[str, Record]]:
+    """
+    Confirm emitted-store claims only after their candidates are written.
+
+    Candidates are pulled a batch at a time: the batch's claims are
+    committed as pending (releasing the write lock) before any of it is
+    written, and confirmed once the sink has been flushed. So the lock
+    is never held while output blocks, and a failed write leaves only
+    pending claims, which are released.
+    """
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, store.batch_size))
+        store.flush()
+        if not batch:
+            return
+        yield from batch
+        sink.flush()
+        store.confirm()
+
+
+def _silence_stdout() -> None:
+    """Point stdout at devnull so the final flush after a broken pipe cannot fail."""
+    try:
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+    except (OSError, ValueError, AttributeError):
+        pass
 
 
 def show_regex_patterns(result, specificity: str = 'specific') -> None:
@@ -329,6 +1179,13 @@ def launch_ui() -> int:
 
 def main(argv: Optional[List[str]] = None) -> int:
     """Main entry point."""
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == 'masks':
+        return masks_main(argv[1:])
+    if argv and argv[0] == 'rank':
+        return rank_main(argv[1:])
+
     parser = create_parser()
     args = parser.parse_args(argv)
 
@@ -338,9 +1195,9 @@ def main(argv: Optional[List[str]] = None) -> int:
 
     setup_logging(args.verbose, args.quiet)
 
-    # Show banner
+    # Show banner on stderr, so piped candidates stay clean
     if not args.no_banner and not args.quiet:
-        print(BANNER)
+        print(BANNER, file=sys.stderr)
 
     # Validate input (required when not using --ui)
     if not args.input:
@@ -372,34 +1229,211 @@ def main(argv: Optional[List[str]] = None) -> int:
     if args.analyze_only:
         return 0
 
-    # Generate
-    logging.info(f"Generating {args.count} strings using {args.mode} mode...")
+    mask = None
+    if args.mask is not None:
+        if args.counter or args.permute or args.enumerate or args.workers > 1:
+            logging.error("--mask cannot be combined with --counter, --permute, "
+                          "--enumerate or --workers")
+            return 1
+        custom = {
+            number: getattr(args, f'custom_charset{number}')
+            for number in range(1, 5)
+            if getattr(args, f'custom_charset{number}') is not None
+        }
+        try:
+            mask = Mask(args.mask, custom)
+        except ValueError as e:
+            logging.error(f"Invalid mask: {e}")
+            return 1
+        if args.mask_observed:
+            mask = mask.restricted(result)
+        logging.info(f"Mask {args.mask}: keyspace {mask.size:,}")
+
+    markov_transitions = None
+    if args.mode == 'markov' and mask is None:
+        markov_transitions = prepare_markov(result, args)
+        if markov_transitions is None:
+            return 1
+
+    if args.enumerate:
+        if args.mode not in ('markov', 'pcfg', 'random', 'pattern'):
+            logging.error("--enumerate requires -m markov, pcfg, random or pattern")
+            return 1
+        if args.workers > 1 or args.counter:
+            logging.error("--enumerate cannot be combined with --workers or --counter")
+            return 1
+
+    if args.workers < 1:
+        logging.error("--workers must be at least 1")
+        return 1
 
-    generated = generate_strings(
-        result,
-        args.mode,
-        args.count,
-        args.seed,
-        args.allow_duplicates,
-        args.regex,
-        args.pattern,
-        args.length,
-    )
+    if args.counter and args.workers > 1:
+        # Counter runs are split by index instead: one process per --skip
+        logging.error("--counter cannot be combined with --workers; "
+                      "run one process per --skip k --stride N instead")
+        return 1
 
-    logging.info(f"Generated {len(generated)} strings")
+    if args.permute:
+        if args.mode != 'pattern':
+            logging.error("--permute requires -m pattern")
+            return 1
+        if args.counter or args.enumerate or args.workers > 1:
+            logging.error("--permute cannot be combined with --counter, --enumerate or --workers")
+            return 1
+
+    if args.quota:
+        if args.mode != 'pattern' or args.pattern:
+            logging.error("--quota requires -m pattern without --pattern")
+            return 1
+        if args.count == 0 or args.no_dedupe:
+            logging.error("--quota needs a count (-n) and dedupe")
+            return 1
+        if args.counter or args.permute or args.enumerate or args.workers > 1 or mask is not None:
+            logging.error("--quota cannot be combined with --counter, --permute, "
+                          "--enumerate, --workers or --mask")
+            return 1
+
+    if args.adaptive:
+        if args.mode != 'hybrid' or args.concurrent:
+            logging.error("--adaptive requires -m hybrid without --concurrent")
+            return 1
+        # Weights follow wall-clock timing, so the output depends on load
+        if args.seed is not None or args.counter or args.workers > 1:
+            logging.error("--adaptive cannot be combined with --seed, --counter or --workers "
+                          "(adaptive weights are timing-dependent)")
+            return 1
+
+    if args.concurrent:
+        if args.mode != 'hybrid':
+            logging.error("--concurrent requires -m hybrid")
+            return 1
+        if args.counter or args.enumerate or args.workers > 1 or mask is not None:
+            logging.error("--concurrent cannot be combined with --counter, --enumerate, "
+                          "--workers or --mask")
+            return 1
+
+    if args.with_prob or args.min_logprob is not None:
+        if mask is not None or args.concurrent:
+            logging.error("--with-prob and --min-logprob cannot be combined with "
+                          "--mask or --concurrent")
+            return 1
+        if args.with_prob and args.format not in ('csv', 'jsonl'):
+            logging.error("--with-prob requires -f csv or jsonl")
+            return 1
+
+    if args.with_guess and (not args.enumerate or args.format not in ('csv', 'jsonl')):
+        logging.error("--with-guess requires --enumerate and -f csv or jsonl")
+        return 1
+
+    if args.counter or args.permute or mask is not None:
+        if args.skip < 0 or args.stride < 1 or (args.limit is not None and args.limit < 0):
+            logging.error("--skip and --limit must be >= 0 and --stride >= 1")
+            return 1
+        if args.seed is None and mask is None:
+            # Indexed runs are only resumable with a known key
+            args.seed = secrets.randbits(32)
+            logging.info(f"Using random seed {args.seed}")
+
+    # Generate
+    if mask is not None:
+        logging.info("Enumerating mask keyspace...")
+    elif args.count == 0:
+        logging.info(f"Streaming strings using {args.mode} mode until output is closed...")
+    else:
+        logging.info(f"Generating {args.count} strings using {args.mode} mode...")
 
-    # Export
     exporter = ResultExporter(
         format=args.format,
         hash_algorithm=args.hash,
     )
 
-    if args.output:
-        exporter.export_to_file(generated, args.output)
-        logging.info(f"Output written to: {args.output}")
-    else:
-        output = exporter.export(generated)
-        print(output)
+    emitted_store = None
+    completed = False
+    sink = None
+    stream: Iterator[Union[str, Record]]
+
+    try:
+        if args.emitted_db:
+            # Claims are confirmed by _commit_written() once their output is written
+            emitted_store = EmittedStore(args.emitted_db, deferred=True)
+        if mask is not None:
+            stream = iter_mask(
+                mask,
+                args.count,
+                args.skip,
+                args.stride,
+                args.limit,
+                emitted_store,
+            )
+        else:
+            stream = iter_strings(
+                result,
+                mode=args.mode,
+                count=args.count,
+                seed=args.seed,
+                allow_duplicates=args.allow_duplicates,
+                regex_pattern=args.regex,
+                type_pattern=args.pattern,
+                target_length=args.length,
+                emitted_store=emitted_store,
+                workers=args.workers,
+                ordered=not args.unordered,
+                counter=args.counter,
+                skip=args.skip,
+                stride=args.stride,
+                limit=args.limit,
+                dedupe=not args.no_dedupe,
+                markov_order=args.markov_order,
+                markov_transitions=markov_transitions,
+                hybrid_mode=args.hybrid_mode,
+                original_words=analyzer.get_unique_words(),
+                enumerate_ordered=args.enumerate,
+                permute=args.permute,
+                quota=args.quota,
+                concurrent=args.concurrent,
+                adaptive=args.adaptive,
+                weight_bounds=args.weight_bounds,
+                with_prob=args.with_prob,
+                min_logprob=args.min_logprob,
+                with_guess=args.with_guess,
+            )
+
+        # Generate -> hash -> format -> write, one string at a time
+        sink = exporter.open_stream(args.output) if args.output else sys.stdout
+        if emitted_store is not None:
+            stream = _commit_written(stream, sink, emitted_store)
+        written = exporter.export_stream(
+            stream, sink, with_prob=args.with_prob, with_guess=args.with_guess,
+        )
+        sink.flush()
+        if emitted_store is not None:
+            emitted_store.close()
+        completed = True
+        if args.output:
+            logging.info(f"Output written to: {args.output}")
+    except InsufficientDataError as e:
+        logging.error(str(e))
+        return 1
+    except sqlite3.OperationalError as e:
+        logging.error(f"Emitted store {args.emitted_db}: {e}")
+        return 1
+    except BrokenPipeError:
+        # The consumer (e.g. a cracker reading stdin) closed the pipe
+        _silence_stdout()
+        return 0
+    finally:
+        if args.output and sink is not None:
+            sink.close()
+        if emitted_store is not None and not completed:
+            # Claims of candidates that may not have been written are dropped,
+            # so a resumed run emits them again rather than never
+            try:
+                emitted_store.close(commit=False)
+            except sqlite3.OperationalError:
+                # Left pending; released once this process has exited
+                pass
+
+    logging.info(f"Generated {written} strings")
 
     return 0
 
@@ -0,0 +1,555 @@
+"""
+Compiled analysis model for EDAP.
+
+Packs the tables of an AnalysisResult into a single flat, integer-coded
+buffer that can be written to a file, mmapped, or placed in
+multiprocessing shared memory and attached zero-copy by worker processes.
+"""
+
+import json
+import mmap
+import sys
+from array import array
+from collections import Counter
+from collections.abc import Mapping
+from multiprocessing import shared_memory
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Dict, Iterator, List, Literal, Optional, Set, Tuple, Type, Union
+
+from edap.models import AnalysisResult, CharType, LengthStats
+
+MAGIC = b"EDAPCM1\x00"
+_WORD = 8  # Sections are 64-bit integer arrays, padded to 8 bytes
+
+# Anything exposing the buffer protocol: bytes, mmap, shared memory
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+
+class CompiledModel:
+    """
+    Flat, integer-coded view of an AnalysisResult.
+
+    Characters are interned into a sorted alphabet (index ci, of `size`
+    chars), `positions` is the longest length and `words` the number of
+    64-bit words per mask; every table is a flat integer array:
+
+    - length_counts[li]: words of the li-th observed length
+    - position_counts[(position_base[li] + pos) * size + ci]: char counts
+    - pattern_counts / pattern_offsets / pattern_bytes: type patterns
+    - cooc_rows[ci * positions + pos]: row of co-occurrence masks (-1 if none)
+    - cooc_masks[(row * positions + target) * words + k]: alphabet bitset of
+      chars seen at target when char ci was at pos, split into 64-bit words
+    - grammar_counts / grammar_offsets / grammar_bytes: PCFG structures and
+      terminals (UTF-8), in the ranges the header lists; decoded only when
+      a PCFG generator reads them
+    """
+
+    _SECTIONS: Tuple[Tuple[str, Literal["B", "Q", "q"]], ...] = (
+        ("length_counts", "Q"),
+        ("position_counts", "Q"),
+        ("global_counts", "Q"),
+        ("pattern_counts", "Q"),
+        ("pattern_offsets", "Q"),
+        ("pattern_bytes", "B"),
+        ("cooc_rows", "q"),
+        ("cooc_masks", "Q"),
+        ("grammar_counts", "Q"),
+        ("grammar_offsets", "Q"),
+        ("grammar_bytes", "B"),
+    )
+
+    def __init__(self, buffer: Buffer, header: Dict[str, Any], tables: Dict[str, memoryview]):
+        """
+        Use from_analysis(), from_buffer(), load() or SharedModel.attach().
+
+        Args:
+            buffer: Object owning the memory (kept alive with the model)
+            header: Decoded header
+            tables: Section name -> typed memoryview into buffer
+        """
+        self._buffer = buffer
+        self.header = header
+        self.tables = tables
+
+        self.alphabet: str = header["alphabet"]
+        self.index: Dict[str, int] = {c: i for i, c in enumerate(self.alphabet)}
+        self.lengths: List[int] = header["lengths"]
+        self.length_index: Dict[int, int] = {L: i for i, L in enumerate(self.lengths)}
+        self.max_positions: int = header["max_positions"]
+        self.mask_words: int = header["mask_words"]
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_analysis(cls, analysis: AnalysisResult) -> "CompiledModel":
+        """Compile an analysis result."""
+        return cls.from_buffer(cls._pack(analysis))
+
+    @classmethod
+    def _pack(cls, analysis: AnalysisResult) -> bytes:
+        """Serialize an analysis result to the compiled byte layout."""
+        alphabet = "".join(sorted(analysis.charset))
+        index = {c: i for i, c in enumerate(alphabet)}
+        size = len(alphabet)
+        words = max(1, (size + 63) // 64)
+        lengths = sorted(analysis.length_stats)
+        positions = max(lengths) if lengths else 0
+
+        length_counts = array("Q")
+        position_counts = array("Q")
+        position_base = []
+        pattern_counts = array("Q")
+        pattern_offsets = array("Q", [0])
+        pattern_bytes = bytearray()
+        pattern_range = []
+
+        for length in lengths:
+            ls = analysis.length_stats[length]
+            length_counts.append(ls.count)
+            position_base.append(len(position_counts) // max(1, size))
+            for pos in range(length):
+                row = [0] * size
+                for char, count in ls.positions[pos].char_counts.items():
+                    row[index[char]] = count
+                position_counts.extend(row)
+
+            start = len(pattern_counts)
+            for pattern, count in ls.patterns.most_common():
+                pattern_bytes.extend(pattern.encode("ascii"))
+                pattern_offsets.append(len(pattern_bytes))
+                pattern_counts.append(count)
+            pattern_range.append([start, len(pattern_counts)])
+
+        global_counts = array("Q", [analysis.global_char_frequency.get(c, 0) for c in alphabet])
+
+        cooc_rows = array("q", [-1]) * (size * positions)
+        cooc_masks = array("Q")
+        for char, pos_data in analysis.cooccurrence.items():
+            ci = index.get(char)
+            if ci is None:
+                continue
+            for pos, targets in pos_data.items():
+                if pos >= positions:
+                    continue
+                cooc_rows[ci * positions + pos] = len(cooc_masks) // (positions * words)
+                block = [0] * (positions * words)
+                for target, chars in targets.items():
+                    mask = 0
+                    for other in chars:
+                        if other in index:
+                            mask |= 1 << index[other]
+                    for k in range(words):
+                        block[target * words + k] = (mask >> (64 * k)) & 0xFFFFFFFFFFFFFFFF
+                cooc_masks.extend(block)
+
+        grammar_counts = array("Q")
+        grammar_offsets = array("Q", [0])
+        grammar_bytes = bytearray()
+
+        def pack_counts(counts: Mapping[str, int]) -> List[int]:
+            start = len(grammar_counts)
+            for text, count in counts.items():
+                grammar_bytes.extend(text.encode("utf-8", "surrogatepass"))
+                grammar_offsets.append(len(grammar_bytes))
+                grammar_counts.append(count)
+            return [start, len(grammar_counts)]
+
+        structure_range = pack_counts(analysis.structures)
+        terminal_ranges = {key: pack_counts(counts) for key, counts in analysis.terminals.items()}
+
+        sections = {
+            "length_counts": length_counts,
+            "position_counts": position_counts,
+            "global_counts": global_counts,
+            "pattern_counts": pattern_counts,
+            "pattern_offsets": pattern_offsets,
+            "pattern_bytes": array("B", pattern_bytes),
+            "cooc_rows": cooc_rows,
+            "cooc_masks": cooc_masks,
+            "grammar_counts": grammar_counts,
+            "grammar_offsets": grammar_offsets,
+            "grammar_bytes": array("B", grammar_bytes),
+        }
+
+        header: Dict[str, Any] = {
+            "byteorder": sys.byteorder,
+            "alphabet": alphabet,
+            "discarded": "".join(sorted(analysis.discarded_charset)),
+            "lengths": lengths,
+            "position_base": position_base,
+            "pattern_range": pattern_range,
+            "total_words": analysis.total_words,
+            "unique_words": analysis.unique_words,
+            "min_length": analysis.min_length,
+            "max_length": analysis.max_length,
+            "max_positions": positions,
+            "mask_words": words,
+            "structure_range": structure_range,
+            "terminal_ranges": terminal_ranges,
+            "sections": {},
+        }
+
+        # Section offsets are relative to the end of the header
+        body = bytearray()
+        for name, _ in cls._SECTIONS:
+            header["sections"][name] = [len(body), len(sections[name])]
+            body.extend(sections[name].tobytes())
+            body.extend(b"\x00" * (-len(body) % _WORD))
+
+        raw = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        raw += b" " * (-len(raw) % _WORD)
+        return MAGIC + len(raw).to_bytes(_WORD, "little") + raw + bytes(body)
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_buffer(cls, buffer: Buffer) -> "CompiledModel":
+        """
+        Attach to a compiled buffer without copying its tables.
+
+        Args:
+            buffer: bytes, mmap, or shared memory buffer
+        """
+        view = memoryview(buffer)
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError("Not a compiled EDAP model")
+
+        size = int.from_bytes(view[len(MAGIC):len(MAGIC) + _WORD], "little")
+        start = len(MAGIC) + _WORD
+        header = json.loads(bytes(view[start:start + size]).decode("utf-8"))
+        body = start + size
+
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError("Compiled model was built on a different byte order")
+
+        tables = {}
+        for name, typecode in cls._SECTIONS:
+            offset, count = header["sections"][name]
+            offset += body
+            width = 1 if typecode == "B" else _WORD
+            tables[name] = view[offset:offset + count * width].cast(typecode)
+
+        return cls(buffer, header, tables)
+
+    def to_bytes(self) -> bytes:
+        """Return the compiled buffer as bytes."""
+        return bytes(memoryview(self._buffer))
+
+    def save(self, filepath: Union[str, Path]) -> None:
+        """Write the compiled model to a file."""
+        Path(filepath).write_bytes(self.to_bytes())
+
+    @classmethod
+    def load(cls, filepath: Union[str, Path]) -> "CompiledModel":
+        """Memory-map a compiled model file (read-only, zero-copy)."""
+        with open(filepath, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls.from_buffer(mapped)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the compiled buffer."""
+        return memoryview(self._buffer).nbytes
+
+    # ------------------------------------------------------------------
+    # Table access
+    # ------------------------------------------------------------------
+
+    def length_weights(self) -> Dict[int, int]:
+        """Word counts per observed length."""
+        counts = self.tables["length_counts"]
+        return {length: counts[i] for i, length in enumerate(self.lengths)}
+
+    def position_counts(self, length: int, pos: int) -> memoryview:
+        """Per-alphabet char counts at a position (zero-copy slice)."""
+        size = len(self.alphabet)
+        row = self.header["position_base"][self.length_index[length]] + pos
+        return self.tables["position_counts"][row * size:(row + 1) * size]
+
+    def patterns(self, length: int) -> List[Tuple[str, int]]:
+        """Type patterns for a length, most common first."""
+        start, end = self.header["pattern_range"][self.length_index[length]]
+        offsets = self.tables["pattern_offsets"]
+        data = self.tables["pattern_bytes"]
+        counts = self.tables["pattern_counts"]
+        return [
+            (bytes(data[offsets[i]:offsets[i + 1]]).decode("ascii"), counts[i])
+            for i in range(start, end)
+        ]
+
+    def cooc_row(self, char_index: int, pos: int) -> int:
+        """Co-occurrence row for a char at a position (-1 if never seen)."""
+        if pos >= self.max_positions:
+            return -1
+        return self.tables["cooc_rows"][char_index * self.max_positions + pos]
+
+    def cooc_mask(self, char_index: int, pos: int, target_pos: int) -> Optional[int]:
+        """
+        Alphabet bitmask of chars seen at target_pos alongside a char at pos.
+
+        Returns:
+            Bitmask, or None if there is no co-occurrence data
+        """
+        row = self.cooc_row(char_index, pos)
+        if row < 0 or target_pos >= self.max_positions:
+            return None
+        words = self.mask_words
+        base = (row * self.max_positions + target_pos) * words
+        masks = self.tables["cooc_masks"]
+        mask = 0
+        for k in range(words):
+            mask |= masks[base + k] << (64 * k)
+        return mask or None
+
+    def chars_of(self, mask: int) -> Set[str]:
+        """Decode an alphabet bitmask into a set of chars."""
+        chars = set()
+        while mask:
+            low = mask & -mask
+            chars.add(self.alphabet[low.bit_length() - 1])
+            mask ^= low
+        return chars
+
+    # ------------------------------------------------------------------
+    # Reconstruction
+    # ------------------------------------------------------------------
+
+    def to_analysis(self) -> AnalysisResult:
+        """
+        Rebuild an AnalysisResult backed by this model.
+
+        Length and position statistics are decoded into regular objects;
+        co-occurrence is served by a read-only view over the compiled
+        masks, so the largest table is never copied.
+        """
+        alphabet = self.alphabet
+        length_stats: Dict[int, LengthStats] = {}
+        length_counts = self.tables["length_counts"]
+
+        for li, length in enumerate(self.lengths):
+            ls = LengthStats(length=length)
+            ls.count = length_counts[li]
+            for pos in range(length):
+                ps = ls.positions[pos]
+                for ci, count in enumerate(self.position_counts(length, pos)):
+                    if count:
+                        char = alphabet[ci]
+                        ps.char_counts[char] = count
+                        ps.type_counts[CharType.from_char(char)] += count
+            ls.patterns = Counter(dict(self.patterns(length)))
+            length_stats[length] = ls
+
+        global_chars: Counter[str] = Counter()
+        global_types: Counter[CharType] = Counter()
+        for ci, count in enumerate(self.tables["global_counts"]):
+            if count:
+                global_chars[alphabet[ci]] = count
+                global_types[CharType.from_char(alphabet[ci])] += count
+
+        return AnalysisResult(
+            total_words=self.header["total_words"],
+            unique_words=self.header["unique_words"],
+            charset=set(alphabet),
+            discarded_charset=set(self.header["discarded"]),
+            length_stats=length_stats,
+            global_char_frequency=global_chars,
+            global_type_frequency=global_types,
+            min_length=self.header["min_length"],
+            max_length=self.header["max_length"],
+            cooccurrence=CooccurrenceView(self),
+            structures=_GrammarCounts(self, *self.header["structure_range"]),
+            terminals=_TerminalsView(self),
+        )
+
+    def release(self) -> None:
+        """Drop the table views so the underlying buffer can be closed."""
+        for view in self.tables.values():
+            view.release()
+        self.tables = {}
+
+
+class CooccurrenceView(Mapping):
+    """
+    Read-only char -> pos -> target_pos -> set(chars) view over the
+    compiled co-occurrence masks, matching AnalysisResult.cooccurrence.
+    """
+
+    def __init__(self, model: CompiledModel):
+        self._model = model
+
+    @property
+    def model(self) -> CompiledModel:
+        """The compiled model behind the view, for direct table access."""
+        return self._model
+
+    def __getitem__(self, char: str) -> "_CharCooccurrence":
+        ci = self._model.index.get(char)
+        if ci is None or not _CharCooccurrence(self._model, ci):
+            raise KeyError(char)
+        return _CharCooccurrence(self._model, ci)
+
+    def __iter__(self) -> Iterator[str]:
+        for ci, char in enumerate(self._model.alphabet):
+            if _CharCooccurrence(self._model, ci):
+                yield char
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class _CharCooccurrence(Mapping):
+    """pos -> target_pos -> set(chars) for one char."""
+
+    def __init__(self, model: CompiledModel, char_index: int):
+        self._model = model
+        self._ci = char_index
+
+    def __getitem__(self, pos: int) -> "_PositionCooccurrence":
+        if not isinstance(pos, int) or self._model.cooc_row(self._ci, pos) < 0:
+            raise KeyError(pos)
+        return _PositionCooccurrence(self._model, self._ci, pos)
+
+    def __iter__(self) -> Iterator[int]:
+        for pos in range(self._model.max_positions):
+            if self._model.cooc_row(self._ci, pos) >= 0:
+                yield pos
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class _PositionCooccurrence(Mapping):
+    """target_pos -> set(chars) for one char at one position."""
+
+    def __init__(self, model: CompiledModel, char_index: int, pos: int):
+        self._model = model
+        self._ci = char_index
+        self._pos = pos
+
+    def __getitem__(self, target: int) -> Set[str]:
+        mask = None
+        if isinstance(target, int):
+            mask = self._model.cooc_mask(self._ci, self._pos, target)
+        if mask is None:
+            raise KeyError(target)
+        return self._model.chars_of(mask)
+
+    def __iter__(self) -> Iterator[int]:
+        for target in range(self._model.max_positions):
+            if self._model.cooc_mask(self._ci, self._pos, target) is not None:
+                yield target
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class _GrammarCounts(Mapping):
+    """text -> count over one range of the grammar tables, decoded on first use."""
+
+    def __init__(self, model: CompiledModel, start: int, end: int):
+        self._model = model
+        self._start = start
+        self._end = end
+        self._counts: Optional[Dict[str, int]] = None
+
+    def _decoded(self) -> Dict[str, int]:
+        if self._counts is None:
+            offsets = self._model.tables["grammar_offsets"]
+            data = self._model.tables["grammar_bytes"]
+            counts = self._model.tables["grammar_counts"]
+            self._counts = {
+                bytes(data[offsets[i]:offsets[i + 1]]).decode("utf-8", "surrogatepass"): counts[i]
+                for i in range(self._start, self._end)
+            }
+        return self._counts
+
+    def __getitem__(self, text: str) -> int:
+        return self._decoded()[text]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._decoded())
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+
+class _TerminalsView(Mapping):
+    """Segment key -> terminal counts, each decoded on first use."""
+
+    def __init__(self, model: CompiledModel):
+        self._ranges: Dict[str, List[int]] = model.header["terminal_ranges"]
+        self._model = model
+        self._views: Dict[str, _GrammarCounts] = {}
+
+    def __getitem__(self, key: str) -> _GrammarCounts:
+        view = self._views.get(key)
+        if view is None:
+            start, end = self._ranges[key]
+            view = self._views[key] = _GrammarCounts(self._model, start, end)
+        return view
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._ranges)
+
+    def __len__(self) -> int:
+        return len(self._ranges)
+
+
+class SharedModel:
+    """
+    A compiled model published in multiprocessing shared memory.
+
+    The publishing process owns the segment and unlinks it on close();
+    workers call attach() with the segment name and read the same pages.
+    """
+
+    def __init__(self, model: CompiledModel):
+        """
+        Copy a compiled model into a new shared memory segment.
+
+        Args:
+            model: Compiled model to publish
+        """
+        data = model.to_bytes()
+        self._shm = shared_memory.SharedMemory(create=True, size=len(data))
+        buf = self._shm.buf
+        assert buf is not None  # only None once closed
+        buf[:len(data)] = data
+        self.name = self._shm.name
+        self.model = CompiledModel.from_buffer(buf)
+
+    @staticmethod
+    def attach(name: str) -> Tuple[shared_memory.SharedMemory, CompiledModel]:
+        """
+        Attach to a published model.
+
+        Returns:
+            (segment, model); keep the segment referenced while the model
+            is in use and close() it when done
+        """
+        shm = shared_memory.SharedMemory(name=name)
+        assert shm.buf is not None
+        return shm, CompiledModel.from_buffer(shm.buf)
+
+    def close(self) -> None:
+        """Release and unlink the segment."""
+        self.model.release()
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> "SharedModel":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> Literal[False]:
+        self.close()
+        return False
@@ -8,10 +8,33 @@ import hashlib
 import json
 import csv
 import io
+import math
 from abc import ABC, abstractmethod
 from enum import Enum
 from pathlib import Path
-from typing import Callable, Dict, Iterator, List, Optional, Union
+from typing import (
+    Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple, Union, cast,
+)
+
+# A candidate with its log probability (see BaseGenerator.scored)
+Scored = Tuple[str, float]
+# A candidate followed by its annotations: log probability and/or guess number
+Record = Tuple[Any, ...]
+
+
+def _log_prob_field(log_prob: float) -> Optional[float]:
+    """A log probability as written out (None for impossible candidates)."""
+    return None if math.isinf(log_prob) else round(log_prob, 6)
+
+
+def _record_fields(with_prob: bool, with_guess: bool) -> List[str]:
+    """Names of the annotations that follow the value in a record, in order."""
+    return (['logprob'] if with_prob else []) + (['guess'] if with_guess else [])
+
+
+def _field_value(name: str, value: Any) -> Any:
+    """An annotation as written out."""
+    return _log_prob_field(value) if name == 'logprob' else value
 
 
 class HashAlgorithm(Enum):
@@ -120,14 +143,14 @@ class Hasher:
 
     def hash_iter(
         self,
-        texts: Iterator[str],
+        texts: Iterable[str],
         encoding: str = 'utf-8',
     ) -> Iterator[str]:
         """
         Hash strings from an iterator.
 
         Args:
-            texts: Iterator of strings
+            texts: Iterable of strings
             encoding: Text encoding
 
         Yields:
@@ -163,6 +186,17 @@ class Exporter(ABC):
         """Export data to file."""
         pass
 
+    def write_stream(self, data: Iterable[str], stream: TextIO, **kwargs: Any) -> int:
+        """
+        Write items to an open stream as they arrive.
+
+        Returns:
+            Number of items written
+        """
+        items = list(data)
+        stream.write(self.export(items, **kwargs))
+        return len(items)
+
 
 class TextExporter(Exporter):
     """Export as plain text (one item per line)."""
@@ -173,6 +207,13 @@ class TextExporter(Exporter):
     def export(self, data: List[str], **kwargs) -> str:
         return self.separator.join(data)
 
+    def write_stream(self, data: Iterable[str], stream: TextIO, **kwargs: Any) -> int:
+        count = 0
+        for item in data:
+            stream.write(item + self.separator)
+            count += 1
+        return count
+
     def export_to_file(
         self,
         data: List[str],
@@ -217,6 +258,17 @@ class JsonExporter(Exporter):
         with open(filepath, 'w', encoding=encoding) as f:
             f.write(self.export(data, **kwargs))
 
+    def write_stream(self, data: Iterable[str], stream: TextIO, **kwargs: Any) -> int:
+        # Same layout as json.dumps(list, indent=...), one item at a time
+        pad = ' ' * self.indent
+        count = 0
+        stream.write('[')
+        for item in data:
+            stream.write((',\n' if count else '\n') + pad + json.dumps(item))
+            count += 1
+        stream.write('\n]\n' if count else ']\n')
+        return count
+
 
 class CsvExporter(Exporter):
     """Export as CSV."""
@@ -233,7 +285,27 @@ class CsvExporter(Exporter):
 
     def export(self, data: List[str], **kwargs) -> str:
         output = io.StringIO()
-        writer = csv.writer(output)
+        self.write_stream(data, output)
+        return output.getvalue()
+
+    def write_stream(
+        self,
+        data: Iterable[Union[str, Record]],
+        stream: TextIO,
+        with_prob: bool = False,
+        with_guess: bool = False,
+        **kwargs: Any,
+    ) -> int:
+        """
+        Write a header and one row per item.
+
+        With with_prob and/or with_guess the items are (value, log
+        probability, guess number) records holding just the requested
+        annotations, and a logprob column (empty for impossible
+        candidates) and/or a guess column is added.
+        """
+        fields = _record_fields(with_prob, with_guess)
+        writer = csv.writer(stream)
 
         # Write header
         header = ['value']
@@ -241,6 +313,7 @@ class CsvExporter(Exporter):
             header.insert(0, 'index')
         if self.include_hash and self.hash_algorithm:
             header.append(f'{self.hash_algorithm}_hash')
+        header.extend(fields)
 
         writer.writerow(header)
 
@@ -249,15 +322,24 @@ class CsvExporter(Exporter):
         if self.include_hash and self.hash_algorithm:
             hasher = Hasher(self.hash_algorithm)
 
-        for i, item in enumerate(data):
-            row = [item]
+        count = 0
+        extras: Sequence[Any] = ()
+        for i, entry in enumerate(data):
+            if fields:
+                item, *extras = cast(Record, entry)
+            else:
+                item = cast(str, entry)
+            row: List[Any] = [item]
             if self.include_index:
                 row.insert(0, i)
             if hasher:
                 row.append(hasher.hash(item))
+            for name, value in zip(fields, extras):
+                row.append(_field_value(name, value))
             writer.writerow(row)
+            count += 1
 
-        return output.getvalue()
+        return count
 
     def export_to_file(
         self,
@@ -289,6 +371,42 @@ class JsonLinesExporter(Exporter):
             lines.append(json.dumps(obj))
         return '\n'.join(lines)
 
+    def write_stream(
+        self,
+        data: Iterable[Union[str, Record]],
+        stream: TextIO,
+        include_metadata: bool = False,
+        with_prob: bool = False,
+        with_guess: bool = False,
+        **kwargs: Any,
+    ) -> int:
+        """
+        Write one JSON object per item.
+
+        With with_prob and/or with_guess the items are (value, log
+        probability, guess number) records holding just the requested
+        annotations, and each object gets a logprob field (null for
+        impossible candidates) and/or a guess field.
+        """
+        fields = _record_fields(with_prob, with_guess)
+        count = 0
+        extras: Sequence[Any] = ()
+        for i, entry in enumerate(data):
+            if fields:
+                item, *extras = cast(Record, entry)
+            else:
+                item = cast(str, entry)
+            obj: Dict[str, Any]
+            if include_metadata:
+                obj = {'index': i, 'value': item, 'length': len(item)}
+            else:
+                obj = {'value': item}
+            for name, value in zip(fields, extras):
+                obj[name] = _field_value(name, value)
+            stream.write(json.dumps(obj) + '\n')
+            count += 1
+        return count
+
     def export_to_file(
         self,
         data: List[str],
@@ -332,6 +450,7 @@ class ResultExporter:
         self.hasher = Hasher(hash_algorithm) if hash_algorithm else None
 
         # Create appropriate exporter
+        self._exporter: Exporter
         if format == OutputFormat.TEXT:
             self._exporter = TextExporter()
         elif format == OutputFormat.JSON:
@@ -386,6 +505,95 @@ class ResultExporter:
 
         self._exporter.export_to_file(data, filepath, **kwargs)
 
+    def export_stream(
+        self,
+        data: Iterable[Union[str, Record]],
+        stream: TextIO,
+        apply_hash: bool = True,
+        with_prob: bool = False,
+        with_guess: bool = False,
+        **kwargs: Any,
+    ) -> int:
+        """
+        Hash, format and write items as they are produced.
+
+        Memory stays constant regardless of how many items flow through,
+        so this works for endless generators.
+
+        Args:
+            data: Iterable of generated strings, or with with_prob and/or
+                  with_guess of (string, log probability, guess number)
+                  records holding just the requested annotations
+            stream: Open text stream to write to
+            apply_hash: Whether to apply hashing (if configured)
+            with_prob: Write each item's log probability (csv and jsonl)
+            with_guess: Write each item's guess number (csv and jsonl)
+            **kwargs: Additional format-specific options
+
+        Returns:
+            Number of items written
+
+        Raises:
+            ValueError: If with_prob or with_guess is set for a text or
+                        json format
+        """
+        if with_prob or with_guess:
+            if self.format not in (OutputFormat.CSV, OutputFormat.JSONL):
+                raise ValueError(
+                    f"Log probabilities and guess numbers need csv or jsonl output, "
+                    f"not {self.format.value}"
+                )
+            records = cast(Iterable[Record], data)
+            if apply_hash and self.hasher:
+                hasher = self.hasher
+                records = ((hasher.hash(record[0]),) + record[1:] for record in records)
+            exporter = cast(Union[CsvExporter, JsonLinesExporter], self._exporter)
+            return exporter.write_stream(
+                records, stream, with_prob=with_prob, with_guess=with_guess, **kwargs,
+            )
+
+        texts = cast(Iterable[str], data)
+        if apply_hash and self.hasher:
+            texts = self.hasher.hash_iter(texts)
+
+        return self._exporter.write_stream(texts, stream, **kwargs)
+
+    def export_stream_to_file(
+        self,
+        data: Iterable[Union[str, Record]],
+        filepath: Union[str, Path],
+        apply_hash: bool = True,
+        buffer_size: int = 1 << 20,
+        errors: str = 'strict',
+        **kwargs: Any,
+    ) -> int:
+        """
+        Stream items to a file through a large write buffer.
+
+        Returns:
+            Number of items written
+        """
+        with self.open_stream(filepath, buffer_size, errors) as f:
+            return self.export_stream(data, f, apply_hash, **kwargs)
+
+    def open_stream(
+        self,
+        filepath: Union[str, Path],
+        buffer_size: int = 1 << 20,
+        errors: str = 'strict',
+    ) -> TextIO:
+        """
+        Open an output file for export_stream() with this format's newline handling.
+
+        errors='surrogateescape' writes strings decoded with the same
+        handler back as their original bytes.
+        """
+        newline = '' if self.format == OutputFormat.CSV else None
+        return open(
+            Path(filepath), 'w', encoding='utf-8', errors=errors,
+            newline=newline, buffering=buffer_size,
+        )
+
     def export_with_original(
         self,
         original: List[str],
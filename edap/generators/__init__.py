@@ -8,7 +8,8 @@ from edap.generators.smart import SmartGenerator
 from edap.generators.pattern import PatternGenerator
 from edap.generators.regex_gen import RegexGenerator, RegexInferenceGenerator
 from edap.generators.markov import MarkovGenerator
-from edap.generators.hybrid import HybridGenerator, create_hybrid_generator
+from edap.generators.pcfg import PCFGGenerator
+from edap.generators.hybrid import HybridGenerator, create_hybrid_generator, get_hybrid_preset
 
 __all__ = [
     "BaseGenerator",
@@ -18,6 +19,8 @@ __all__ = [
     "RegexGenerator",
     "RegexInferenceGenerator",
     "MarkovGenerator",
+    "PCFGGenerator",
     "HybridGenerator",
     "create_hybrid_generator",
+    "get_hybrid_preset",
 ]
@@ -2,11 +2,43 @@
 Base generator class for EDAP.
 """
 
+import bisect
+import heapq
+import itertools
+import math
+import random
 import secrets
 from abc import ABC, abstractmethod
-from typing import Iterator, List, Optional, Set
-
-from edap.models import AnalysisResult, CharType
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+from edap.exceptions import InsufficientDataError
+from edap.generators.constraints import CooccurrenceBits
+from edap.generators.saturation import SaturationReport, SaturationTracker, Stratum
+from edap.models import AnalysisResult, CharType, LengthStats
+from edap.rng import CounterRandom, derive_key
+
+if TYPE_CHECKING:
+    from edap.store import EmittedStore
+
+T = TypeVar("T")
+
+# One slot of a product distribution: (text, log probability), most likely first
+Slot = List[Tuple[str, float]]
+
+# Set bits in an int (int.bit_count needs Python 3.10)
+_popcount = getattr(int, "bit_count", None) or (lambda mask: bin(mask).count("1"))
 
 
 class BaseGenerator(ABC):
@@ -33,19 +65,47 @@ class BaseGenerator(ABC):
         """
         self.analysis = analysis
         self.exclude_original = exclude_original
+        self.seed = seed
         self._original_words: Set[str] = set()
         self._generated: Set[str] = set()
+        self._emitted_store: Optional[EmittedStore] = None
+        self._counter_rng: Optional[CounterRandom] = None
+        self._target_lengths: Optional[Set[int]] = None
+        self._length_table: Optional[Tuple[List[int], List[int]]] = None
+        self._bits: Optional[CooccurrenceBits] = None
+        self._attempts = 0
+        self._accepted = 0
+        self._saturation = SaturationTracker()
+        self._min_logprob: Optional[float] = None
+        # length -> (log P(length), log P(char | position) per position)
+        self._log_table: Optional[Dict[int, Tuple[float, List[Dict[str, float]]]]] = None
+        self._last_score: Optional[Tuple[str, float]] = None
 
         # Use secrets for cryptographic randomness by default
         # For reproducibility, we'd need to use random module with seed
         self._use_secure_random = seed is None
         if seed is not None:
-            import random
             self._rng = random.Random(seed)
         else:
             self._rng = None
 
-    def _random_choice(self, seq: list):
+    def reseed(self, seed: Optional[int]) -> None:
+        """
+        Restart the random stream.
+
+        Args:
+            seed: New seed (None switches to secure random)
+        """
+        self.seed = seed
+        self._set_rng(random.Random(seed) if seed is not None else None)
+
+    def _set_rng(self, rng: Optional[random.Random]) -> None:
+        """Install a random stream (None switches to secure random)."""
+        self._use_secure_random = rng is None
+        if rng is not None:
+            self._rng = rng
+
+    def _random_choice(self, seq: Sequence[T]) -> T:
         """Choose a random element from a sequence."""
         if not seq:
             raise ValueError("Cannot choose from empty sequence")
@@ -73,10 +133,7 @@ class BaseGenerator(ABC):
         if total == 0:
             return self._random_choice(items)
 
-        if self._use_secure_random:
-            r = secrets.randbelow(total)
-        else:
-            r = self._rng.randint(0, total - 1)
+        r = self._random_below(total)
 
         cumulative = 0
         for item, weight in zip(items, weight_values):
@@ -86,24 +143,287 @@ class BaseGenerator(ABC):
 
         return items[-1]  # Fallback
 
+    def _random_below(self, n: int) -> int:
+        """Random integer in [0, n)."""
+        if self._use_secure_random:
+            return secrets.randbelow(n)
+        return self._rng.randint(0, n - 1)
+
+    def _random_float(self) -> float:
+        """Random float in [0.0, 1.0)."""
+        if self._use_secure_random:
+            return secrets.randbits(53) * 2 ** -53
+        return self._rng.random()
+
+    def _weighted_index(self, cumulative: Sequence[float]) -> int:
+        """
+        Choose an index from cumulative (float) weights by binary search.
+
+        Args:
+            cumulative: Non-decreasing running totals of the weights
+
+        Returns:
+            Index of the chosen weight
+        """
+        total = cumulative[-1]
+        if total <= 0:
+            raise ValueError("Cannot choose from zero total weight")
+        r = self._random_float() * total
+        return min(bisect.bisect_right(cumulative, r), len(cumulative) - 1)
+
+    def _weighted_bit(self, mask: int, weights: Sequence[int]) -> int:
+        """
+        Choose a set bit of an integer bitmask, weighted per bit.
+
+        Draws exactly like _weighted_choice over the bits in increasing
+        order, so bitset code reproduces seeded dict-based output.
+
+        Args:
+            mask: Non-zero bitmask of candidates
+            weights: Weight of each bit index
+
+        Returns:
+            Index of the chosen bit
+        """
+        bits = []
+        total = 0
+        while mask:
+            low = mask & -mask
+            bit = low.bit_length() - 1
+            bits.append(bit)
+            total += weights[bit]
+            mask ^= low
+
+        if total == 0:
+            return self._random_choice(bits)
+
+        r = self._random_below(total)
+        for bit in bits:
+            r -= weights[bit]
+            if r < 0:
+                return bit
+        return bits[-1]
+
+    def _get_bits(self) -> CooccurrenceBits:
+        """The compiled co-occurrence bitmasks (built on first use)."""
+        if self._bits is None:
+            self._bits = CooccurrenceBits(self.analysis)
+        return self._bits
+
+    def _fill_constrained(
+        self,
+        domains: Sequence[int],
+        weights: Sequence[Sequence[int]],
+        budget: int,
+        free: Iterable[int] = (),
+        soft: bool = False,
+    ) -> Optional[str]:
+        """
+        Fill every position with chars that pairwise co-occur.
+
+        Forward checking over the co-occurrence bitsets: placing a char
+        ANDs its row into the domains of the open positions, and a
+        placement that empties any of them is undone and the char struck
+        from its position. The most constrained open position (fewest
+        chars left, ties broken at random) is filled next; a position
+        with nothing left backtracks to the previous one.
+
+        With soft=True co-occurrence is a preference: narrowing that would
+        leave a position fewer than two chars is ignored for it, so every
+        fill succeeds without backtracking.
+
+        Args:
+            domains: Bitmask of allowed chars per position
+            weights: Per-position weight of each alphabet bit
+            budget: Maximum number of placements to try
+            free: Positions exempt from co-occurrence narrowing
+            soft: Treat co-occurrence as a preference (see above)
+
+        Returns:
+            The word, or None if no consistent word was found in budget
+        """
+        bits = self._get_bits()
+        length = len(domains)
+        free = set(free)
+        result = [""] * length
+        remaining = [budget]
+
+        def search(domains: List[int]) -> bool:
+            open_positions = [p for p in range(length) if not result[p]]
+            if not open_positions:
+                return True
+
+            sizes = [_popcount(domains[p]) for p in open_positions]
+            fewest = min(sizes)
+            pos = self._random_choice(
+                [p for p, size in zip(open_positions, sizes) if size == fewest]
+            )
+
+            candidates = domains[pos]
+            while candidates and remaining[0] > 0:
+                remaining[0] -= 1
+                if candidates & (candidates - 1):
+                    bit = self._weighted_bit(candidates, weights[pos])
+                else:
+                    bit = candidates.bit_length() - 1
+                candidates &= ~(1 << bit)
+                char = bits.alphabet[bit]
+
+                narrowed = bits.narrowed(domains, pos, char)
+                for p in free:
+                    narrowed[p] = domains[p]
+                if soft:
+                    narrowed = [
+                        mask if mask & (mask - 1) else base
+                        for mask, base in zip(narrowed, initial)
+                    ]
+                # Placed positions keep their char (co-occurrence is
+                # symmetric), so any empty domain is an open position
+                if 0 not in narrowed:
+                    result[pos] = char
+                    if search(narrowed):
+                        return True
+                    result[pos] = ""
+            return False
+
+        initial = list(domains)
+        self._attempts += 1
+        if not search(initial):
+            return None
+        self._accepted += 1
+        return "".join(result)
+
+    @property
+    def attempts(self) -> int:
+        """Number of constrained fills attempted."""
+        return self._attempts
+
+    @property
+    def acceptance_rate(self) -> float:
+        """Fraction of constrained fills that produced a word (1.0 before any)."""
+        return self._accepted / self._attempts if self._attempts else 1.0
+
+    @property
+    def saturation(self) -> SaturationReport:
+        """How far generate()/generate_iter() have saturated their space."""
+        return self._saturation.report()
+
+    def _strata(self, word: str) -> Tuple[Stratum, ...]:
+        """Strata a drawn word counts toward for saturation tracking."""
+        return (("length", len(word)),)
+
+    def _observe(self, word: str, new: bool) -> None:
+        """Track one deduped draw, reweighting the samplers once per window."""
+        if self._saturation.record(self._strata(word), new, word):
+            self._invalidate_samplers()
+
+    def _invalidate_samplers(self) -> None:
+        """Drop the compiled samplers so they pick up the saturation weights."""
+        self._length_table = None
+
+    def _reset_saturation(self) -> None:
+        """Forget the saturation state (and any weights derived from it)."""
+        self._saturation.reset()
+        self._invalidate_samplers()
+
+    def _compile_lengths(self) -> Tuple[List[int], List[int]]:
+        """Build the cumulative length sampler (honoring set_lengths)."""
+        lengths = []
+        cumulative = []
+        total = 0
+        for length, ls in self.analysis.length_stats.items():
+            if self._target_lengths is not None and length not in self._target_lengths:
+                continue
+            total += self._saturation.scale(("length", length), ls.count)
+            lengths.append(length)
+            cumulative.append(total)
+        return lengths, cumulative
+
     def _choose_length(self) -> int:
         """Choose a word length based on the length distribution."""
-        length_weights = {
-            length: ls.count
-            for length, ls in self.analysis.length_stats.items()
-        }
-        return self._weighted_choice(length_weights)
+        if self._length_table is None:
+            self._length_table = self._compile_lengths()
+
+        lengths, cumulative = self._length_table
+        if not lengths:
+            raise ValueError("Cannot choose from empty weights")
+        if cumulative[-1] == 0:
+            return self._random_choice(lengths)
+
+        r = self._random_below(cumulative[-1])
+        return lengths[bisect.bisect_right(cumulative, r)]
+
+    def set_lengths(self, lengths: Optional[Iterable[int]]) -> None:
+        """
+        Generate only words with one of the given lengths.
+
+        The length sampler is restricted to these lengths (renormalized
+        by their observed frequency), so no draws are rejected.
+
+        Args:
+            lengths: Allowed lengths, or None to lift the restriction
+
+        Raises:
+            InsufficientDataError: If none of the lengths was observed
+        """
+        if lengths is None:
+            self._target_lengths = None
+        else:
+            wanted = set(lengths)
+            observed = wanted & set(self.analysis.length_stats)
+            if not observed:
+                raise InsufficientDataError(
+                    f"words of length {', '.join(map(str, sorted(wanted)))}",
+                    f"lengths {', '.join(map(str, sorted(self.analysis.length_stats)))}",
+                )
+            self._target_lengths = observed
+        self._length_table = None
+
+    def set_length_range(self, min_length: int, max_length: int) -> None:
+        """
+        Generate only words with min_length <= len(word) <= max_length.
+
+        Args:
+            min_length: Shortest allowed length
+            max_length: Longest allowed length
+        """
+        if min_length > max_length:
+            raise ValueError(f"Empty length range: {min_length}-{max_length}")
+        self.set_lengths(range(min_length, max_length + 1))
 
     def set_original_words(self, words: Set[str]) -> None:
         """Set the original wordlist for exclusion checking."""
         self._original_words = words
 
+    def set_emitted_store(self, store: Optional["EmittedStore"]) -> None:
+        """
+        Share a persistent emitted store across runs.
+
+        Words already recorded in the store (by this or an earlier run)
+        are treated as duplicates, and every accepted word is claimed.
+        """
+        self._emitted_store = store
+
     def is_duplicate(self, word: str) -> bool:
         """Check if word is a duplicate (original or already generated)."""
         if self.exclude_original and word in self._original_words:
             return True
         return word in self._generated
 
+    def _record(self, word: str, allow_duplicates: bool = False) -> bool:
+        """
+        Record an accepted word.
+
+        Returns:
+            False if the emitted store already held the word (and
+            duplicates are not allowed), True otherwise
+        """
+        store = self._emitted_store
+        if store is not None and not store.claim(word) and not allow_duplicates:
+            return False
+        self._generated.add(word)
+        return True
+
     @abstractmethod
     def generate_one(self) -> Optional[str]:
         """
@@ -123,6 +443,13 @@ class BaseGenerator(ABC):
         """
         Generate multiple strings.
 
+        Sampling weight moves off lengths (and patterns) that keep
+        yielding duplicates, and generation stops early once several
+        windows of draws in a row find nothing new and the Chao1
+        estimate leaves less than one word; the saturation property
+        reports where the run stands. Words scoring below the
+        set_min_logprob() cutoff count as failed draws.
+
         Args:
             count: Number of strings to generate
             max_attempts: Max attempts before giving up (0 = count * 100)
@@ -136,6 +463,7 @@ class BaseGenerator(ABC):
 
         results = []
         attempts = 0
+        cutoff = self._min_logprob
 
         while len(results) < count and attempts < max_attempts:
             attempts += 1
@@ -143,12 +471,21 @@ class BaseGenerator(ABC):
 
             if word is None:
                 continue
+            if cutoff is not None and self.score(word) < cutoff:
+                continue
 
-            if not allow_duplicates and self.is_duplicate(word):
+            if allow_duplicates:
+                self._record(word, allow_duplicates)
+                results.append(word)
                 continue
 
-            results.append(word)
-            self._generated.add(word)
+            new = not self.is_duplicate(word) and self._record(word)
+            self._observe(word, new)
+            if new:
+                results.append(word)
+            elif self._saturation.exhausted:
+                # Windows without a new word and nothing estimated left
+                break
 
         return results
 
@@ -156,19 +493,27 @@ class BaseGenerator(ABC):
         self,
         count: int,
         max_attempts_per: int = 100,
+        allow_duplicates: bool = False,
     ) -> Iterator[str]:
         """
         Generate strings as an iterator.
 
+        Saturation and the log-probability cutoff apply as in generate().
+
         Args:
-            count: Number of strings to generate
+            count: Number of strings to generate (0 = endless, until the
+                   consumer stops or no new string can be found)
             max_attempts_per: Max attempts per string before giving up
+            allow_duplicates: If True, skip duplicate tracking entirely so
+                              memory stays constant on endless streams
 
         Yields:
             Generated strings
         """
+        endless = count == 0
         generated = 0
-        while generated < count:
+        cutoff = self._min_logprob
+        while endless or generated < count:
             attempts = 0
             while attempts < max_attempts_per:
                 attempts += 1
@@ -176,15 +521,179 @@ class BaseGenerator(ABC):
 
                 if word is None:
                     continue
+                if cutoff is not None and self.score(word) < cutoff:
+                    continue
+
+                if allow_duplicates:
+                    yield word
+                    break
 
-                if not self.is_duplicate(word):
-                    self._generated.add(word)
+                new = not self.is_duplicate(word) and self._record(word)
+                self._observe(word, new)
+                if new:
                     yield word
-                    generated += 1
                     break
+                if self._saturation.exhausted:
+                    return
             else:
-                # Max attempts reached for this word, move on
-                generated += 1
+                # Max attempts reached for this word, move on; an endless
+                # stream that cannot find a new word has saturated
+                if endless:
+                    return
+            generated += 1
+
+    def generate_at(self, index: int) -> Optional[str]:
+        """
+        Generate the candidate for a counter index.
+
+        Every random draw for the candidate comes from a keyed
+        counter-based stream for (seed, index), so the same index
+        always yields the same candidate regardless of what was
+        generated before it.
+
+        Args:
+            index: Candidate index (0 <= index < 2**64)
+
+        Returns:
+            Generated string, or None if generation failed at this index
+        """
+        if self._counter_rng is None:
+            if self.seed is None:
+                raise ValueError("Counter-based generation requires a seed")
+            self._counter_rng = CounterRandom(derive_key(self.seed))
+
+        self._counter_rng.seed(index)
+        if self._rng is not self._counter_rng:
+            self._set_rng(self._counter_rng)
+
+        return self.generate_one()
+
+    def generate_indexed(
+        self,
+        start: int = 0,
+        stop: Optional[int] = None,
+        step: int = 1,
+        allow_duplicates: bool = False,
+    ) -> Iterator[Tuple[int, str]]:
+        """
+        Generate candidates for the indices start, start + step, ...
+
+        Worker k of N covers its share with start=k, step=N; a stopped
+        run resumes exactly by restarting at the next index.
+
+        Args:
+            start: First index
+            stop: Stop before this index (None = unbounded)
+            step: Index stride
+            allow_duplicates: If True, emit repeated candidates too
+
+        Yields:
+            (index, candidate) tuples; failed and duplicate indices are skipped
+        """
+        indices: Iterable[int]
+        if stop is None:
+            indices = itertools.count(start, step)
+        else:
+            indices = range(start, stop, step)
+
+        for index in indices:
+            word = self.generate_at(index)
+
+            if word is None or not self._admit(word):
+                continue
+
+            if not allow_duplicates and self.is_duplicate(word):
+                continue
+
+            if not self._record(word, allow_duplicates):
+                continue
+
+            yield index, word
+
+    def _top_structures(self) -> Iterator[Tuple[float, List[Slot]]]:
+        """
+        Describe the model as products of independent slots.
+
+        Yields:
+            (log probability of the structure, slots) pairs; a candidate
+            picks one option per slot and its log probability is the
+            structure's plus those of the chosen options
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support top-k enumeration"
+        )
+
+    @staticmethod
+    def _slot(counts: Mapping[str, int]) -> Slot:
+        """Turn counts into a slot, most likely first."""
+        total = sum(counts.values())
+        ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        return [(char, math.log(count / total)) for char, count in ranked if count > 0]
+
+    def generate_top(self, k: int = 0) -> Iterator[str]:
+        """
+        Enumerate the most probable candidates in exact descending order.
+
+        Best-first search over the model's structures (the "next"
+        algorithm of PCFG crackers): every structure starts with its most
+        likely option in each slot, and popping a candidate pushes the
+        variants that step one slot (at or after its pivot) to the next
+        option. Each candidate is reached from exactly one parent, so
+        nothing is emitted twice and no dedupe set is kept.
+
+        Args:
+            k: Number of candidates to emit (0 = all)
+
+        Yields:
+            Candidates, most probable first
+        """
+        for word, _ in self._enumerate_top(k):
+            yield word
+
+    def _enumerate_top(self, k: int = 0) -> Iterator[Tuple[str, float]]:
+        """generate_top() yielding (candidate, log probability) pairs."""
+        heap = []
+        tiebreak = itertools.count()
+
+        for log_prob, slots in self._top_structures():
+            if not slots or not all(slots):
+                continue
+            # All options of a slot have the same length
+            length = sum(len(slot[0][0]) for slot in slots)
+            if self._target_lengths is not None and length not in self._target_lengths:
+                continue
+            score = log_prob + sum(slot[0][1] for slot in slots)
+            heap.append((-score, next(tiebreak), (0,) * len(slots), 0, slots))
+        heapq.heapify(heap)
+
+        store = self._emitted_store
+        emitted = 0
+
+        cutoff = self._min_logprob
+        while heap:
+            neg_score, _, choice, pivot, slots = heapq.heappop(heap)
+            if cutoff is not None and -neg_score < cutoff:
+                # Popped in descending order: everything left scores lower
+                return
+
+            for i in range(pivot, len(slots)):
+                j = choice[i]
+                if j + 1 < len(slots[i]):
+                    child = choice[:i] + (j + 1,) + choice[i + 1:]
+                    child_score = neg_score + slots[i][j][1] - slots[i][j + 1][1]
+                    heapq.heappush(heap, (child_score, next(tiebreak), child, i, slots))
+
+            word = "".join(slot[j][0] for slot, j in zip(slots, choice))
+            if self.exclude_original and word in self._original_words:
+                continue
+            if store is not None and not store.claim(word):
+                continue
+
+            self._last_score = (word, -neg_score)
+            yield word, -neg_score
+            emitted += 1
+            if emitted == k:
+                return
 
     def calculate_weight(self, word: str) -> int:
         """
@@ -204,3 +713,93 @@ class BaseGenerator(ABC):
                 weight += length_stats.positions[i].char_counts.get(char, 0)
 
         return weight
+
+    def _log_tables(self) -> Dict[int, Tuple[float, List[Dict[str, float]]]]:
+        """Log length and per-position char probabilities (built on first use)."""
+        if self._log_table is None:
+            total = sum(ls.count for ls in self.analysis.length_stats.values())
+            charset = sorted(self.analysis.charset)
+            table = {}
+            for length, ls in self.analysis.length_stats.items():
+                if ls.count == 0:
+                    continue
+                positions = []
+                for pos in range(length):
+                    if charset and self._samples_charset(ls, pos):
+                        positions.append(dict.fromkeys(charset, -math.log(len(charset))))
+                        continue
+                    counts = ls.positions[pos].char_counts if pos in ls.positions else {}
+                    pos_total = sum(counts.values())
+                    positions.append({char: math.log(count / pos_total)
+                                      for char, count in counts.items() if count > 0})
+                table[length] = (math.log(ls.count / total), positions)
+            self._log_table = table
+        return self._log_table
+
+    def _samples_charset(self, length_stats: LengthStats, pos: int) -> bool:
+        """
+        Whether the sampler draws a position uniformly from the whole charset.
+
+        Generators that fall back to the charset where a position has too
+        little data override this, so log_prob() scores those positions
+        the way they are drawn.
+        """
+        return False
+
+    def log_prob(self, word: str) -> float:
+        """
+        Log probability of a word under the positional model.
+
+        P(length) times P(char | position, length) for each char, looked
+        up in tables computed once per generator: the score generate_top()
+        enumerates by. Positions the sampler fills from the whole charset
+        (see _samples_charset) score uniformly. Generators with their own
+        model override this.
+
+        Args:
+            word: Candidate to score
+
+        Returns:
+            Natural log probability (-inf if the model cannot produce it)
+        """
+        entry = self._log_tables().get(len(word))
+        if entry is None:
+            return -math.inf
+        log_prob, positions = entry
+        for char, chars in zip(word, positions):
+            char_log_prob = chars.get(char)
+            if char_log_prob is None:
+                return -math.inf
+            log_prob += char_log_prob
+        return log_prob
+
+    def score(self, word: str) -> float:
+        """
+        log_prob() of a candidate this generator just produced.
+
+        The score computed for the cutoff (or by generate_top()) for the
+        last candidate is reused, so annotating output costs no second
+        lookup.
+        """
+        last = self._last_score
+        if last is not None and last[0] == word:
+            return last[1]
+        score = self.log_prob(word)
+        self._last_score = (word, score)
+        return score
+
+    def _admit(self, word: str) -> bool:
+        """Whether a word clears the log-probability cutoff."""
+        return self._min_logprob is None or self.score(word) >= self._min_logprob
+
+    def set_min_logprob(self, cutoff: Optional[float]) -> None:
+        """
+        Drop candidates whose log_prob() is below cutoff.
+
+        Sampling treats them as failed draws, indexed and permuted walks
+        skip them, and generate_top() stops at the first one.
+
+        Args:
+            cutoff: Minimum natural log probability, or None for no cutoff
+        """
+        self._min_logprob = cutoff
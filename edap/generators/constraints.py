@@ -0,0 +1,125 @@
+"""
+Co-occurrence constraints compiled to integer bitsets.
+
+Shared by the generators that fill a word position by position under
+co-occurrence constraints (smart and pattern modes).
+"""
+
+from typing import Dict, List, Tuple
+
+from edap.compiled import CompiledModel, CooccurrenceView
+from edap.models import AnalysisResult, CharType
+
+
+class CooccurrenceBits:
+    """
+    Co-occurrence compiled to integer bitmasks over the interned alphabet.
+
+    Bit i stands for alphabet[i] (the sorted charset), so the set bits of
+    a mask enumerate chars in sorted order:
+
+    - position_masks[length][pos]: chars seen at pos in words of that length
+    - position_weights[length][pos][i]: how often alphabet[i] was seen there
+    - position_choices[length][pos]: (chars, running totals) in the order
+      the counts were recorded, for sampling any char seen at pos
+    - type_masks[char_type]: chars of each CharType
+    - rows[pos * A + ci][target]: chars seen at target while alphabet[ci]
+      was at pos (-1, i.e. all bits, where there is no data)
+
+    Compatibility with the placed chars is then a chain of integer ANDs.
+    """
+
+    def __init__(self, analysis: AnalysisResult):
+        self.alphabet = "".join(sorted(analysis.charset))
+        self.index: Dict[str, int] = {c: i for i, c in enumerate(self.alphabet)}
+        size = len(self.alphabet)
+
+        self.type_masks: Dict[CharType, int] = dict.fromkeys(CharType, 0)
+        for bit, char in enumerate(self.alphabet):
+            self.type_masks[CharType.from_char(char)] |= 1 << bit
+
+        self.position_masks: Dict[int, List[int]] = {}
+        self.position_weights: Dict[int, List[List[int]]] = {}
+        self.position_choices: Dict[int, List[Tuple[List[str], List[int]]]] = {}
+        for length, ls in analysis.length_stats.items():
+            masks = []
+            weights = []
+            choices = []
+            for pos in range(length):
+                mask = 0
+                row = [0] * size
+                chars: List[str] = []
+                cumulative: List[int] = []
+                total = 0
+                for char, count in ls.positions[pos].char_counts.items():
+                    bit = self.index[char]
+                    mask |= 1 << bit
+                    row[bit] = count
+                    total += count
+                    chars.append(char)
+                    cumulative.append(total)
+                masks.append(mask)
+                weights.append(row)
+                choices.append((chars, cumulative))
+            self.position_masks[length] = masks
+            self.position_weights[length] = weights
+            self.position_choices[length] = choices
+
+        width = max(analysis.length_stats, default=0)
+        self.rows: Dict[int, List[int]] = {}
+        cooccurrence = analysis.cooccurrence
+        if isinstance(cooccurrence, CooccurrenceView) and cooccurrence.model.alphabet == self.alphabet:
+            # Walking the view decodes one set per entry; read the masks instead
+            self._load_rows(cooccurrence.model, width)
+            return
+        for char, pos_data in cooccurrence.items():
+            ci = self.index.get(char)
+            if ci is None:
+                continue
+            for pos, targets in pos_data.items():
+                row = [-1] * width
+                for target, seen in targets.items():
+                    if target < width:
+                        mask = 0
+                        for other in seen:
+                            mask |= 1 << self.index[other]
+                        row[target] = mask
+                self.rows[pos * size + ci] = row
+
+    def _load_rows(self, model: CompiledModel, width: int) -> None:
+        """Build rows straight from a compiled model's co-occurrence tables."""
+        size = len(self.alphabet)
+        positions = model.max_positions
+        words = model.mask_words
+        span = positions * words
+        width = min(width, positions)
+        starts = model.tables["cooc_rows"].tolist()
+        masks = model.tables["cooc_masks"]
+        for ci in range(size):
+            for pos in range(positions):
+                start = starts[ci * positions + pos]
+                if start < 0:
+                    continue
+                block = masks[start * span:(start + 1) * span].tolist()
+                if words == 1:
+                    merged = block
+                else:
+                    merged = [
+                        sum(block[base + k] << (64 * k) for k in range(words))
+                        for base in range(0, span, words)
+                    ]
+                # An empty mask means no data, as in the view
+                self.rows[pos * size + ci] = [mask or -1 for mask in merged[:width]]
+
+    def place(self, allowed: List[int], pos: int, char: str) -> None:
+        """Narrow the allowed masks of every position after placing char at pos."""
+        row = self.rows.get(pos * len(self.alphabet) + self.index[char])
+        if row is not None:
+            allowed[:] = [mask & other for mask, other in zip(allowed, row)]
+
+    def narrowed(self, allowed: List[int], pos: int, char: str) -> List[int]:
+        """Like place(), but return the narrowed masks as a new list."""
+        row = self.rows.get(pos * len(self.alphabet) + self.index[char])
+        if row is None:
+            return list(allowed)
+        return [mask & other for mask, other in zip(allowed, row)]
@@ -2,8 +2,12 @@
 Hybrid generator - combines multiple generation strategies.
 """
 
-from typing import Optional, List, Type
+import math
+import random
+import time
+from typing import Dict, Iterable, Optional, List, Tuple, Type
 
+from edap.exceptions import InsufficientDataError
 from edap.generators.base import BaseGenerator
 from edap.models import AnalysisResult
 
@@ -15,14 +19,22 @@ class HybridGenerator(BaseGenerator):
     This allows mixing different generation strategies, for example:
     - 50% Smart + 50% Pattern for balanced output
     - 70% Markov + 30% Random for variety with structure
+
+    With adaptive=True the weights follow each sub-generator's unique
+    yield per second (see _rebalance).
     """
 
+    # Deduped draws between adaptive rebalances
+    REBALANCE_EVERY = 256
+
     def __init__(
         self,
         analysis: AnalysisResult,
         generators: List[tuple],  # List of (GeneratorClass, weight, kwargs)
         seed: Optional[int] = None,
         exclude_original: bool = True,
+        adaptive: bool = False,
+        weight_bounds: Tuple[float, float] = (0.25, 4.0),
     ):
         """
         Initialize the hybrid generator.
@@ -33,8 +45,21 @@ class HybridGenerator(BaseGenerator):
                         e.g., [(SmartGenerator, 0.6, {}), (RandomGenerator, 0.4, {})]
             seed: Random seed for reproducibility
             exclude_original: If True, don't generate words from original set
+            adaptive: Shift weight toward the sub-generators with the
+                      highest unique yield per second during the run
+            weight_bounds: (low, high) multiples of its configured weight
+                           an adaptive sub-generator's weight stays within
+
+        Raises:
+            ValueError: If the bounds do not satisfy 0 < low <= 1 <= high
         """
+        low, high = weight_bounds
+        if not 0 < low <= 1 <= high:
+            raise ValueError(f"Weight bounds must satisfy 0 < low <= 1 <= high: {low}, {high}")
+
         super().__init__(analysis, seed, exclude_original)
+        self.adaptive = adaptive
+        self.weight_bounds = (low, high)
 
         self._generators: List[BaseGenerator] = []
         self._weights: List[float] = []
@@ -53,6 +78,15 @@ class HybridGenerator(BaseGenerator):
         total = sum(self._weights)
         if total > 0:
             self._weights = [w / total for w in self._weights]
+        self._base_weights = list(self._weights)
+        # Weights before adaptation (after set_lengths disabled any)
+        self._configured = list(self._weights)
+
+        # Adaptive yield measurements per sub-generator
+        self._last_source: Optional[int] = None
+        self._yield_words = [0.0] * len(self._generators)
+        self._yield_seconds = [0.0] * len(self._generators)
+        self._since_rebalance = 0
 
     def set_original_words(self, words: set) -> None:
         """Set original words for all sub-generators."""
@@ -60,17 +94,61 @@ class HybridGenerator(BaseGenerator):
         for gen in self._generators:
             gen.set_original_words(words)
 
+    def _set_rng(self, rng: Optional[random.Random]) -> None:
+        """Share one random stream with all sub-generators."""
+        super()._set_rng(rng)
+        for gen in self._generators:
+            gen._set_rng(rng)
+
+    def set_lengths(self, lengths: Optional[Iterable[int]]) -> None:
+        """
+        Restrict all sub-generators to the given lengths.
+
+        Sub-generators that cannot produce any of the lengths are
+        disabled until the restriction is lifted.
+        """
+        if lengths is not None:
+            lengths = set(lengths)
+        self._target_lengths = lengths
+
+        weights = []
+        for gen, weight in zip(self._generators, self._base_weights):
+            try:
+                gen.set_lengths(lengths)
+            except InsufficientDataError:
+                weight = 0.0
+            weights.append(weight)
+
+        total = sum(weights)
+        if total == 0 and self._generators:
+            raise InsufficientDataError(
+                f"generators for length {', '.join(map(str, sorted(lengths or ())))}"
+            )
+        self._weights = [w / total for w in weights]
+        self._configured = list(self._weights)
+
     def generate_one(self) -> Optional[str]:
         """Generate using a randomly selected generator based on weights."""
         if not self._generators:
             return None
 
         # Select generator based on weights
-        gen = self._select_generator()
-        return gen.generate_one()
+        index = self._select_index()
+        if not self.adaptive:
+            return self._generators[index].generate_one()
+
+        start = time.perf_counter()
+        word = self._generators[index].generate_one()
+        self._yield_seconds[index] += time.perf_counter() - start
+        self._last_source = index
+        return word
 
     def _select_generator(self) -> BaseGenerator:
         """Select a generator based on weights."""
+        return self._generators[self._select_index()]
+
+    def _select_index(self) -> int:
+        """Index of a generator selected based on weights."""
         if self._use_secure_random:
             import secrets
             r = secrets.randbelow(1000) / 1000
@@ -78,12 +156,89 @@ class HybridGenerator(BaseGenerator):
             r = self._rng.random()
 
         cumulative = 0
-        for gen, weight in zip(self._generators, self._weights):
+        for index, weight in enumerate(self._weights):
             cumulative += weight
             if r < cumulative:
-                return gen
+                return index
+
+        return len(self._generators) - 1
+
+    def log_prob(self, word: str) -> float:
+        """
+        Log probability of a word under the mixture of sub-generators.
+
+        log of the sum over sub-generators of weight * P(word), with the
+        configured weights (adaptive rebalancing does not move scores).
+        """
+        terms = [math.log(weight) + gen.log_prob(word)
+                 for gen, weight in zip(self._generators, self._configured) if weight > 0]
+        top = max(terms, default=-math.inf)
+        if top == -math.inf:
+            return top
+        return top + math.log(sum(math.exp(term - top) for term in terms))
+
+    def _observe(self, word: str, new: bool) -> None:
+        """Credit the sub-generator that drew the word (adaptive mode)."""
+        super()._observe(word, new)
+        if not self.adaptive or self._last_source is None:
+            return
+        self._yield_words[self._last_source] += new
+        self._since_rebalance += 1
+        if self._since_rebalance >= self.REBALANCE_EVERY:
+            self._rebalance()
+
+    def _rebalance(self) -> None:
+        """
+        Move weight toward the sub-generators with the best unique yield.
+
+        Each sub-generator's yield is new words per second spent in it
+        (time on failed or duplicate draws counts against it). Its weight
+        becomes its configured weight times its yield relative to the
+        weighted mean yield, clamped to weight_bounds and renormalized.
+        Measurements are halved after each rebalance, so the weights keep
+        tracking yields that drop as sub-generators saturate.
+        """
+        self._since_rebalance = 0
+        rates = [
+            accepted / seconds if seconds > 0 else None
+            for accepted, seconds in zip(self._yield_words, self._yield_seconds)
+        ]
+        measured = [(weight, rate) for weight, rate in zip(self._configured, rates)
+                    if rate is not None and weight > 0]
+        total = sum(weight for weight, _ in measured)
+        mean = sum(weight * rate for weight, rate in measured) / total if total else 0.0
+        if mean <= 0:
+            return
+
+        low, high = self.weight_bounds
+        factors = [min(high, max(low, rate / mean)) if rate is not None else 1.0
+                   for rate in rates]
+        weights = [weight * factor for weight, factor in zip(self._configured, factors)]
+        # Renormalizing can push a clamped weight past its bound; a few
+        # rounds of clamp-and-renormalize settle it
+        for _ in range(8):
+            total = sum(weights)
+            weights = [
+                min(high * base, max(low * base, weight / total))
+                for weight, base in zip(weights, self._configured)
+            ]
+        total = sum(weights)
+        self._weights = [weight / total for weight in weights]
+
+        self._yield_words = [accepted / 2 for accepted in self._yield_words]
+        self._yield_seconds = [seconds / 2 for seconds in self._yield_seconds]
+
+    @property
+    def effective_weights(self) -> List[Tuple[str, float]]:
+        """(generator class name, current weight) per sub-generator."""
+        return [(type(gen).__name__, weight)
+                for gen, weight in zip(self._generators, self._weights)]
 
-        return self._generators[-1]
+    @property
+    def yield_rates(self) -> List[Tuple[str, float]]:
+        """(generator class name, recent new words per second) per sub-generator."""
+        return [(type(gen).__name__, accepted / seconds if seconds > 0 else 0.0)
+                for gen, accepted, seconds in zip(self._generators, self._yield_words, self._yield_seconds)]
 
     def generate_blended(self) -> Optional[str]:
         """
@@ -122,29 +277,22 @@ class HybridGenerator(BaseGenerator):
         return "".join(result)
 
 
-def create_hybrid_generator(
-    analysis: AnalysisResult,
-    mode: str = "balanced",
-    seed: Optional[int] = None,
-    exclude_original: bool = True,
-) -> HybridGenerator:
+def get_hybrid_preset(mode: str = "balanced") -> List[tuple]:
     """
-    Factory function to create common hybrid configurations.
+    Sub-generators of a hybrid preset.
 
     Args:
-        analysis: Analysis result
-        mode: Preset mode - "balanced", "strict", "creative", "markov_smart"
-        seed: Random seed
-        exclude_original: Exclude original words
+        mode: Preset mode - "balanced", "strict" or "creative" (unknown
+              modes fall back to "balanced")
 
     Returns:
-        Configured HybridGenerator
+        List of (GeneratorClass, weight, kwargs) tuples
     """
     from edap.generators.smart import SmartGenerator
     from edap.generators.random_gen import RandomGenerator
     from edap.generators.pattern import PatternGenerator
 
-    presets = {
+    presets: Dict[str, List[tuple]] = {
         "balanced": [
             (SmartGenerator, 0.5, {}),
             (PatternGenerator, 0.3, {}),
@@ -161,11 +309,36 @@ def create_hybrid_generator(
         ],
     }
 
-    generators = presets.get(mode, presets["balanced"])
+    return presets.get(mode, presets["balanced"])
+
 
+def create_hybrid_generator(
+    analysis: AnalysisResult,
+    mode: str = "balanced",
+    seed: Optional[int] = None,
+    exclude_original: bool = True,
+    adaptive: bool = False,
+    weight_bounds: Tuple[float, float] = (0.25, 4.0),
+) -> HybridGenerator:
+    """
+    Factory function to create common hybrid configurations.
+
+    Args:
+        analysis: Analysis result
+        mode: Preset mode - "balanced", "strict", "creative"
+        seed: Random seed
+        exclude_original: Exclude original words
+        adaptive: Adapt the preset weights to unique yield per second
+        weight_bounds: (low, high) multiples of the preset weights
+
+    Returns:
+        Configured HybridGenerator
+    """
     return HybridGenerator(
         analysis,
-        generators=generators,
+        generators=get_hybrid_preset(mode),
         seed=seed,
         exclude_original=exclude_original,
+        adaptive=adaptive,
+        weight_bounds=weight_bounds,
     )
@@ -2,13 +2,69 @@
 Markov chain generator - generates strings based on n-gram transitions.
 """
 
+import bisect
+import json
+import math
+from array import array
 from collections import defaultdict
-from typing import Optional, Dict, List
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Dict, List, Tuple, Union
 
+from edap.exceptions import InsufficientDataError
 from edap.generators.base import BaseGenerator
 from edap.models import AnalysisResult
 
 
+MODEL_FORMAT = "edap-markov"
+MODEL_VERSION = 1
+
+MAX_LEVEL = 10   # Cap on a transition's level (OMEN uses 0-10)
+
+END_STATE = -2   # Transition to the end token
+UNRESOLVED = -1  # Next context has no transitions, not even after backoff
+
+
+class _CompiledChain:
+    """
+    Integer-coded transition table.
+
+    Contexts are numbered in a hash table; the outgoing transitions of
+    state s occupy [offsets[s], offsets[s + 1]) of the flat arrays, with
+    per-state running totals in `cumulative` and the already backed-off
+    successor state (or END_STATE / UNRESOLVED) in `next_state`.
+    """
+
+    def __init__(self, generator: "MarkovGenerator"):
+        transitions = generator._transitions
+        self.states: List[str] = list(transitions)
+        self.index: Dict[str, int] = {state: i for i, state in enumerate(self.states)}
+        self.offsets = array('q', [0])
+        self.cumulative = array('q')
+        self.next_state = array('q')
+        self.chars: List[str] = []
+
+        for state in self.states:
+            total = 0
+            for next_char, count in transitions[state].items():
+                total += count
+                self.cumulative.append(total)
+                self.chars.append(next_char)
+                if next_char == generator.END:
+                    self.next_state.append(END_STATE)
+                else:
+                    self.next_state.append(self.lookup(
+                        generator._resolve((state + next_char)[-generator.order:])
+                    ))
+            self.offsets.append(len(self.cumulative))
+
+        self.start = self.lookup(generator._start_state())
+        self.fallback = sorted(generator.analysis.charset)
+
+    def lookup(self, state: Optional[str]) -> int:
+        """State number of a resolved context (UNRESOLVED for None)."""
+        return UNRESOLVED if state is None else self.index[state]
+
+
 class MarkovGenerator(BaseGenerator):
     """
     Generates strings using Markov chain transitions.
@@ -29,6 +85,7 @@ class MarkovGenerator(BaseGenerator):
         seed: Optional[int] = None,
         exclude_original: bool = True,
         order: int = 2,
+        transitions: Optional[Dict[str, Dict[str, int]]] = None,
     ):
         """
         Initialize the Markov generator.
@@ -39,11 +96,35 @@ class MarkovGenerator(BaseGenerator):
             exclude_original: If True, don't generate words from original set
             order: Markov chain order (n-gram size). Higher = more similar to input.
                    1 = bigram (char pairs), 2 = trigram, etc.
+            transitions: Trained transition counts (from get_transitions() or
+                         load_model()) to use instead of the analysis data
         """
         super().__init__(analysis, seed, exclude_original)
         self.order = order
         self._transitions: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
-        self._build_transitions()
+        self._reset_tables()
+        if transitions is not None:
+            for context, counts in transitions.items():
+                self._transitions[context].update(counts)
+        else:
+            self._build_transitions()
+
+    def _reset_tables(self) -> None:
+        """Drop tables derived from the transitions."""
+        # state -> [(next_char, probability, next_state)] (END has no next state)
+        self._edges: Dict[str, List[Tuple[str, float, Optional[str]]]] = {}
+        # _completion[r][state]: scaled probability of emitting exactly r
+        # more chars and then END; true value is that * exp(_log_scale[r])
+        self._completion: List[Dict[str, float]] = []
+        self._log_scale: List[float] = []
+        # (remaining, state) -> conditional sampler [(next_char, next_state)], cumulative
+        self._steps: Dict[Tuple[int, str], Tuple[List[Tuple[str, str]], List[float]]] = {}
+        # Cumulative sampler over the target lengths
+        self._target_table: Optional[Tuple[List[int], List[float]]] = None
+        self._chain: Optional[_CompiledChain] = None
+        # Per compiled state: next char -> (log probability, next state)
+        self._log_edges: Optional[List[Dict[str, Tuple[float, int]]]] = None
+        self._last_score = None
 
     def _build_transitions(self) -> None:
         """Build transition probabilities from the analysis data."""
@@ -63,7 +144,7 @@ class MarkovGenerator(BaseGenerator):
                 for to_pos, next_chars in to_pos_data.items():
                     # If positions are adjacent, record transition
                     if to_pos == from_pos + 1:
-                        for next_char in next_chars:
+                        for next_char in sorted(next_chars):
                             self._transitions[char][next_char] += 1
 
         # Add start transitions from position 0 characters
@@ -89,87 +170,509 @@ class MarkovGenerator(BaseGenerator):
             words: List of words to train on
         """
         self._transitions.clear()
+        self._reset_tables()
 
         for word in words:
-            # Add start token
-            padded = self.START * self.order + word + self.END
+            self._add_word(word)
+
+    def _add_word(self, word: str) -> None:
+        """Count the n-gram transitions of one word."""
+        # Add start token
+        padded = self.START * self.order + word + self.END
+
+        # Build n-gram transitions
+        for i in range(len(padded) - self.order):
+            context = padded[i:i + self.order]
+            next_char = padded[i + self.order]
+            self._transitions[context][next_char] += 1
+
+    def train_on_file(
+        self,
+        filepath: Union[str, Path],
+        encoding: str = "utf-8",
+        min_length: int = 1,
+        max_length: int = 256,
+    ) -> int:
+        """
+        Train the Markov chain on a wordlist file, one line at a time.
+
+        Only the transition counts are kept in memory, never the words.
+
+        Args:
+            filepath: Path to the wordlist file
+            encoding: File encoding (undecodable bytes are skipped)
+            min_length: Skip shorter words (as PatternAnalyzer does)
+            max_length: Skip longer words
 
-            # Build n-gram transitions
-            for i in range(len(padded) - self.order):
-                context = padded[i:i + self.order]
-                next_char = padded[i + self.order]
-                self._transitions[context][next_char] += 1
+        Returns:
+            Number of words trained on
+        """
+        self._transitions.clear()
+        self._reset_tables()
+
+        trained = 0
+        with open(filepath, encoding=encoding, errors="ignore") as f:
+            for line in f:
+                word = line.strip()
+                if word and min_length <= len(word) <= max_length:
+                    self._add_word(word)
+                    trained += 1
+
+        return trained
+
+    def get_transitions(self) -> Dict[str, Dict[str, int]]:
+        """Transition counts as plain (picklable) nested dicts."""
+        return {context: dict(counts) for context, counts in self._transitions.items()}
+
+    def save_model(self, filepath: Union[str, Path]) -> None:
+        """
+        Save the trained chain as JSON.
+
+        Args:
+            filepath: Output path
+        """
+        data = {
+            "format": MODEL_FORMAT,
+            "version": MODEL_VERSION,
+            "order": self.order,
+            "transitions": self.get_transitions(),
+        }
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    @staticmethod
+    def load_model(filepath: Union[str, Path]) -> Tuple[int, Dict[str, Dict[str, int]]]:
+        """
+        Read a chain written by save_model().
+
+        Args:
+            filepath: Model path
+
+        Returns:
+            (order, transitions) for the order/transitions constructor arguments
+
+        Raises:
+            ValueError: If the file is not a saved Markov model
+        """
+        with open(filepath, encoding="utf-8") as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Not a saved Markov model: {filepath}") from e
+
+        if not isinstance(data, dict) or data.get("format") != MODEL_FORMAT:
+            raise ValueError(f"Not a saved Markov model: {filepath}")
+        if data.get("version") != MODEL_VERSION:
+            raise ValueError(f"Unsupported Markov model version: {data.get('version')}")
+
+        return data["order"], data["transitions"]
 
     def generate_one(self) -> Optional[str]:
         """Generate a single string using Markov chain transitions."""
         if not self._transitions:
             return None
 
-        # Start with the start token(s)
-        current = self.START * self.order
-        result = []
+        if self._target_lengths is not None:
+            return self._generate_exact(self._choose_target_length())
 
-        # Maximum length to prevent infinite loops
-        max_length = max(self.analysis.length_stats.keys()) * 2 if self.analysis.length_stats else 20
+        chain = self._get_chain()
+        offsets = chain.offsets
+        cumulative = chain.cumulative
+        state = chain.start
+        context = self.START * self.order
+        result = []
 
+        max_length = self._length_cap()
         while len(result) < max_length:
-            # Get possible next characters
-            if current not in self._transitions:
-                # No transitions from current state, try shorter context
-                for i in range(1, len(current)):
-                    shorter = current[i:]
-                    if shorter in self._transitions:
-                        current = shorter
-                        break
-                else:
-                    # Fall back to random char from charset
-                    if self.analysis.charset:
-                        next_char = self._random_choice(list(self.analysis.charset))
-                        result.append(next_char)
-                        current = (current + next_char)[-self.order:]
-                        continue
-                    else:
-                        break
-
-            transitions = self._transitions.get(current, {})
-            if not transitions:
+            if state == UNRESOLVED:
+                # Fall back to random char from charset
+                if not chain.fallback:
+                    break
+                next_char = self._random_choice(chain.fallback)
+                result.append(next_char)
+                context = (context + next_char)[-self.order:]
+                state = chain.lookup(self._resolve(context))
+                continue
+
+            lo = offsets[state]
+            hi = offsets[state + 1]
+            if lo == hi:
                 break
 
             # Choose next character weighted by frequency
-            next_char = self._weighted_choice(dict(transitions))
+            i = bisect.bisect_right(cumulative, self._random_below(cumulative[hi - 1]), lo, hi)
+            next_state = chain.next_state[i]
 
-            if next_char == self.END:
+            if next_state == END_STATE:
                 break
 
+            result.append(chain.chars[i])
+            if next_state == UNRESOLVED:
+                context = (chain.states[state] + chain.chars[i])[-self.order:]
+            state = next_state
+
+        return "".join(result) if result else None
+
+    def _length_cap(self) -> int:
+        """Longest word generate_one() walks to (prevents infinite loops)."""
+        return max(self.analysis.length_stats.keys()) * 2 if self.analysis.length_stats else 20
+
+    def _get_chain(self) -> _CompiledChain:
+        """The compiled chain (built on first use)."""
+        if self._chain is None:
+            self._chain = _CompiledChain(self)
+        return self._chain
+
+    def _log_chain(self) -> List[Dict[str, Tuple[float, int]]]:
+        """Log transition probabilities of the compiled chain (built on first use)."""
+        if self._log_edges is None:
+            chain = self._get_chain()
+            offsets = chain.offsets
+            cumulative = chain.cumulative
+            log_edges = []
+            for state in range(len(chain.states)):
+                lo = offsets[state]
+                hi = offsets[state + 1]
+                edges = {}
+                previous = 0
+                for i in range(lo, hi):
+                    count = cumulative[i] - previous
+                    previous = cumulative[i]
+                    if count > 0:
+                        edges[chain.chars[i]] = (
+                            math.log(count / cumulative[hi - 1]), chain.next_state[i],
+                        )
+                log_edges.append(edges)
+            self._log_edges = log_edges
+        return self._log_edges
+
+    def log_prob(self, word: str) -> float:
+        """
+        Log probability of a word under the chain.
+
+        The sum of the log transition probabilities along the word,
+        END included, walking the backed-off states as generate_one()
+        does (an unresolved context draws uniformly from the charset).
+        A walk cut off at the length cap takes no END transition.
+        """
+        if not self._transitions or len(word) > self._length_cap():
+            return -math.inf
+
+        chain = self._get_chain()
+        log_edges = self._log_chain()
+        state = chain.start
+        context = self.START * self.order
+        log_prob = 0.0
+
+        for char in word:
+            if state == UNRESOLVED:
+                if char not in self.analysis.charset:
+                    return -math.inf
+                log_prob -= math.log(len(chain.fallback))
+                context = (context + char)[-self.order:]
+                state = chain.lookup(self._resolve(context))
+                continue
+
+            edge = log_edges[state].get(char)
+            if edge is None or edge[1] == END_STATE:
+                return -math.inf
+            char_log_prob, next_state = edge
+            log_prob += char_log_prob
+            if next_state == UNRESOLVED:
+                context = (chain.states[state] + char)[-self.order:]
+            state = next_state
+
+        if len(word) == self._length_cap():
+            return log_prob
+        if state == UNRESOLVED:
+            # Fallback draws never end a word; only the length cap does
+            return -math.inf
+        if not log_edges[state]:
+            # No transitions at all: the walk simply stops here
+            return log_prob
+        end = log_edges[state].get(self.END)
+        return -math.inf if end is None else log_prob + end[0]
+
+    def _resolve(self, context: str) -> Optional[str]:
+        """Longest suffix of context that has transitions (the backoff state)."""
+        if context in self._transitions:
+            return context
+        for i in range(1, len(context)):
+            if context[i:] in self._transitions:
+                return context[i:]
+        return None
+
+    def _get_edges(self, state: str) -> List[Tuple[str, float, Optional[str]]]:
+        """Outgoing transitions of a state with probabilities and next states."""
+        edges = self._edges.get(state)
+        if edges is None:
+            transitions = self._transitions.get(state, {})
+            total = sum(transitions.values())
+            edges = []
+            for next_char, count in transitions.items():
+                if count <= 0:
+                    continue
+                next_state = None
+                if next_char != self.END:
+                    next_state = self._resolve((state + next_char)[-self.order:])
+                edges.append((next_char, count / total, next_state))
+            self._edges[state] = edges
+        return edges
+
+    def _extend_completion(self, remaining: int) -> None:
+        """
+        Extend the backward completion table up to `remaining` chars.
+
+        Level r holds, for every state, the probability that the chain
+        emits exactly r more characters and then ends. Each level is
+        rescaled to a maximum of 1 (the scale is kept in log space) so
+        long lengths do not underflow.
+        """
+        states = list(self._transitions)
+
+        while len(self._completion) <= remaining:
+            r = len(self._completion)
+            level = {}
+            for state in states:
+                weight = 0.0
+                for next_char, prob, next_state in self._get_edges(state):
+                    if r == 0:
+                        if next_char == self.END:
+                            weight += prob
+                    elif next_state is not None:
+                        weight += prob * self._completion[r - 1].get(next_state, 0.0)
+                level[state] = weight
+
+            peak = max(level.values(), default=0.0)
+            previous = self._log_scale[r - 1] if r else 0.0
+            if peak > 0:
+                level = {state: w / peak for state, w in level.items()}
+                self._log_scale.append(previous + math.log(peak))
+            else:
+                self._log_scale.append(previous)
+            self._completion.append(level)
+
+    def _start_state(self) -> Optional[str]:
+        """State the chain starts from."""
+        return self._resolve(self.START * self.order)
+
+    def _length_log_weight(self, length: int) -> float:
+        """Log probability that the chain produces a word of this length."""
+        state = self._start_state()
+        if state is None or length < 0:
+            return -math.inf
+        self._extend_completion(length)
+        weight = self._completion[length].get(state, 0.0)
+        if weight <= 0:
+            return -math.inf
+        return math.log(weight) + self._log_scale[length]
+
+    def _generate_exact(self, length: int) -> Optional[str]:
+        """
+        Sample a word of exactly `length` chars from the chain.
+
+        Each char is drawn from the transition distribution reweighted by
+        the completion weight of the resulting state, so every draw can
+        still finish at exactly the target length and nothing is rejected.
+        """
+        state = self._start_state()
+        if state is None or length <= 0:
+            return None
+
+        self._extend_completion(length)
+        result = []
+
+        for remaining in range(length - 1, -1, -1):
+            choices, cumulative = self._get_step(remaining, state)
+            if not choices:
+                return None
+
+            next_char, state = choices[self._weighted_index(cumulative)]
             result.append(next_char)
 
-            # Update context
-            current = (current + next_char)[-self.order:]
+        return "".join(result)
+
+    def _get_step(self, remaining: int, state: str) -> Tuple[List[Tuple[str, str]], List[float]]:
+        """Conditional next-char sampler for a state with `remaining` chars left after it."""
+        key = (remaining, state)
+        step = self._steps.get(key)
+        if step is None:
+            level = self._completion[remaining]
+            choices = []
+            cumulative = []
+            total = 0.0
+            for next_char, prob, next_state in self._get_edges(state):
+                if next_state is None:
+                    continue
+                weight = prob * level.get(next_state, 0.0)
+                if weight > 0:
+                    total += weight
+                    choices.append((next_char, next_state))
+                    cumulative.append(total)
+            step = (choices, cumulative)
+            self._steps[key] = step
+        return step
+
+    def set_lengths(self, lengths: Optional[Iterable[int]]) -> None:
+        """
+        Generate only words with one of the given lengths.
 
-        return "".join(result) if result else None
+        Lengths are drawn from the chain's own length distribution
+        restricted to the set, then each word is sampled exactly.
+        """
+        self._target_table = None
+        if lengths is None:
+            self._target_lengths = None
+            return
+
+        wanted = set(lengths)
+        possible = {L for L in wanted if self._length_log_weight(L) > -math.inf}
+        if not possible:
+            raise InsufficientDataError(
+                f"Markov paths of length {', '.join(map(str, sorted(wanted)))}"
+            )
+        self._target_lengths = possible
+
+    def _choose_target_length(self) -> int:
+        """Choose one of the target lengths by chain probability."""
+        if self._target_table is None:
+            lengths = sorted(self._target_lengths or ())
+            logs = [self._length_log_weight(L) for L in lengths]
+            peak = max(logs)
+            cumulative = []
+            total = 0.0
+            for log_weight in logs:
+                total += math.exp(log_weight - peak)
+                cumulative.append(total)
+            self._target_table = (lengths, cumulative)
+
+        lengths, cumulative = self._target_table
+        return lengths[self._weighted_index(cumulative)]
 
     def generate_one_with_length(self, target_length: int) -> Optional[str]:
         """
-        Generate a string of approximately the target length.
+        Generate a string of exactly the target length.
 
         Args:
             target_length: Desired string length
 
         Returns:
-            Generated string or None
-        """
-        # Try multiple times to get close to target length
-        best = None
-        best_diff = float('inf')
-
-        for _ in range(50):
-            word = self.generate_one()
-            if word:
-                diff = abs(len(word) - target_length)
-                if diff < best_diff:
-                    best = word
-                    best_diff = diff
-                if diff == 0:
-                    break
+            Generated string, or None if the chain cannot produce that length
+        """
+        return self._generate_exact(target_length)
+
+    def _level_edges(self) -> Tuple[List[List[Tuple[int, str, int]]], List[Optional[int]]]:
+        """
+        Discretize transitions into levels: level = round(-log2(p)), capped.
+
+        Returns:
+            Per state, its (level, char, next_state) edges sorted by level,
+            and per state the level of its END transition (None if absent)
+        """
+        chain = self._get_chain()
+        edges = []
+        end_levels = []
+        for state in range(len(chain.states)):
+            lo = chain.offsets[state]
+            hi = chain.offsets[state + 1]
+            total = chain.cumulative[hi - 1] if hi > lo else 0
+            previous = 0
+            out = []
+            end_level = None
+            for i in range(lo, hi):
+                count = chain.cumulative[i] - previous
+                previous = chain.cumulative[i]
+                level = min(MAX_LEVEL, round(-math.log2(count / total)))
+                if chain.next_state[i] == END_STATE:
+                    end_level = level
+                elif chain.next_state[i] != UNRESOLVED:
+                    out.append((level, chain.chars[i], chain.next_state[i]))
+            out.sort(key=lambda edge: edge[0])
+            edges.append(out)
+            end_levels.append(end_level)
+        return edges, end_levels
+
+    def generate_ordered(self, budget: int = 0, max_length: int = 0) -> Iterator[str]:
+        """
+        Enumerate strings in approximately decreasing probability (OMEN).
+
+        Transition probabilities are discretized into levels (level 0 is
+        the most likely); a string's level is the sum of its transition
+        levels including END. Levels are emitted in increasing order, so
+        likely candidates come first. Every string has exactly one path,
+        so nothing is emitted twice and no dedupe set is needed.
+
+        Args:
+            budget: Maximum number of strings to emit (0 = until exhausted)
+            max_length: Longest string to enumerate (0 = longest observed
+                        length, or the set_lengths() restriction)
 
-        return best
+        Yields:
+            Generated strings, most probable level first
+        """
+        if not self._transitions:
+            return
+
+        chain = self._get_chain()
+        if chain.start == UNRESOLVED:
+            return
+
+        if self._target_lengths is not None:
+            lengths = sorted(self._target_lengths)
+        else:
+            lengths = list(range(1, max(self.analysis.length_stats, default=0) + 1))
+        if max_length:
+            lengths = [L for L in lengths if L <= max_length]
+        if not lengths:
+            return
+
+        edges, end_levels = self._level_edges()
+        inf = math.inf
+
+        # min_levels[r][s]: cheapest way to emit exactly r more chars then END
+        min_levels = [[inf if lvl is None else lvl for lvl in end_levels]]
+        for r in range(1, lengths[-1] + 1):
+            below = min_levels[r - 1]
+            min_levels.append([
+                min((lvl + below[nxt] for lvl, _, nxt in state_edges), default=inf)
+                for state_edges in edges
+            ])
+
+        def walk(state: int, remaining: int, left: int, prefix: List[str]) -> Iterator[str]:
+            if remaining == 0:
+                if end_levels[state] == left:
+                    yield "".join(prefix)
+                return
+            below = min_levels[remaining - 1]
+            for level, char, nxt in edges[state]:
+                if level + below[nxt] > left:
+                    continue
+                prefix.append(char)
+                yield from walk(nxt, remaining - 1, left - level, prefix)
+                prefix.pop()
+
+        start = chain.start
+        reachable = [L for L in lengths if min_levels[L][start] < inf]
+        if not reachable:
+            return
+
+        emitted = 0
+        top = (MAX_LEVEL + 1) * (reachable[-1] + 1)
+        # Reachable lengths have a finite (integer) minimum level
+        first = int(min(min_levels[L][start] for L in reachable))
+        for total in range(first, top + 1):
+            for length in reachable:
+                if min_levels[length][start] > total:
+                    continue
+                for word in walk(start, length, total, []):
+                    if self.exclude_original and word in self._original_words:
+                        continue
+                    if not self._admit(word):
+                        continue
+                    store = self._emitted_store
+                    if store is not None and not store.claim(word):
+                        continue
+                    yield word
+                    emitted += 1
+                    if emitted == budget:
+                        return
@@ -2,10 +2,18 @@
 Pattern generator - generates strings matching character type patterns.
 """
 
-from typing import Optional, List
-
-from edap.generators.base import BaseGenerator
+import bisect
+import itertools
+import math
+import secrets
+from typing import Dict, Iterator, Optional, List, Tuple, Union
+
+from edap.generators.base import BaseGenerator, Slot
+from edap.generators.quotas import allocate_quotas
+from edap.generators.saturation import Stratum
+from edap.keyspace import MixedRadixKeyspace, UnionKeyspace, permuted
 from edap.models import AnalysisResult, CharType
+from edap.rng import derive_key
 
 
 class PatternGenerator(BaseGenerator):
@@ -16,6 +24,9 @@ class PatternGenerator(BaseGenerator):
     follow patterns like "UllnnU" (Upper, lower, lower, digit, digit, Upper).
     """
 
+    # Share of an explicit pattern's keyspace past which it is enumerated
+    ENUMERATE_FRACTION = 0.5
+
     def __init__(
         self,
         analysis: AnalysisResult,
@@ -35,16 +46,80 @@ class PatternGenerator(BaseGenerator):
         super().__init__(analysis, seed, exclude_original)
         self.max_retries = max_retries_per_position
 
+        # Per-length pattern samplers and per-pattern domains, built on first use
+        self._pattern_tables: Dict[int, Tuple[List[str], List[int]]] = {}
+        self._domain_tables: Dict[str, Tuple[List[int], List[int]]] = {}
+        self._type_chars: Optional[Dict[CharType, str]] = None
+        # length -> (log P(length), log P(pattern | length),
+        #            per position: char -> (log P(char | position, type), type code))
+        self._pattern_log_table: Optional[
+            Dict[int, Tuple[float, Dict[str, float], List[Dict[str, Tuple[float, str]]]]]
+        ] = None
+
     def _choose_pattern(self, length: int) -> Optional[str]:
         """Choose a pattern for the given length based on frequency."""
-        if length not in self.analysis.length_stats:
+        table = self._pattern_tables.get(length)
+        if table is None:
+            length_stats = self.analysis.length_stats.get(length)
+            counts = length_stats.patterns if length_stats else {}
+            patterns = list(counts)
+            cumulative = list(itertools.accumulate(
+                self._saturation.scale(("pattern", pattern), count)
+                for pattern, count in counts.items()
+            ))
+            table = self._pattern_tables[length] = (patterns, cumulative)
+
+        patterns, cumulative = table
+        if not patterns:
             return None
+        # Same draw as _weighted_choice over the pattern counts
+        return patterns[bisect.bisect_right(cumulative, self._random_below(cumulative[-1]))]
 
-        length_stats = self.analysis.length_stats[length]
-        if not length_stats.patterns:
-            return None
+    def _strata(self, word: str) -> Tuple[Stratum, ...]:
+        """Saturation strata of a word: its length and its type pattern."""
+        pattern = "".join(CharType.from_char(char).value for char in word)
+        return (("length", len(word)), ("pattern", pattern))
+
+    def _invalidate_samplers(self) -> None:
+        """Drop the length and pattern samplers (see BaseGenerator)."""
+        super()._invalidate_samplers()
+        self._pattern_tables.clear()
+
+    def _pattern_domains(self, pattern: str) -> Tuple[List[int], List[int]]:
+        """
+        Allowed-char bitmask of each position of a pattern (cached per pattern).
+
+        A position takes the chars of its type seen there; one that never
+        saw its type, or any position of a length never observed, takes
+        every char of the type and is exempt from co-occurrence.
+
+        Returns:
+            (domains, free) - the bitmasks and the exempt positions
+        """
+        table = self._domain_tables.get(pattern)
+        if table is not None:
+            return table
 
-        return self._weighted_choice(dict(length_stats.patterns))
+        bits = self._get_bits()
+        length = len(pattern)
+        seen = bits.position_masks.get(length)
+        domains = []
+        free = []
+        for pos, char_code in enumerate(pattern):
+            type_mask = bits.type_masks[CharType(char_code)]
+            domain = seen[pos] & type_mask if seen else 0
+            if not domain:
+                domain = type_mask
+                free.append(pos)
+            domains.append(domain)
+
+        # A single word of this length says nothing about co-occurrence
+        length_stats = self.analysis.length_stats.get(length)
+        if length_stats is None or length_stats.count <= 1:
+            free = list(range(length))
+
+        table = self._domain_tables[pattern] = (domains, free)
+        return table
 
     def generate_one(self) -> Optional[str]:
         """
@@ -68,151 +143,123 @@ class PatternGenerator(BaseGenerator):
         return self._generate_from_pattern(pattern)
 
     def _generate_from_pattern(self, pattern: str) -> Optional[str]:
-        """Generate a string following the exact pattern."""
+        """
+        Generate a string following the exact pattern.
+
+        Each position takes chars of the required type seen there, and
+        positions are filled most-constrained first by propagating
+        co-occurrence over bitsets (see _fill_constrained). Co-occurrence
+        is a preference: it is ignored for a position where it would
+        leave fewer than two chars, and a position that never saw its
+        type takes any char of that type.
+        """
         length = len(pattern)
 
         if length not in self.analysis.length_stats:
             # No stats for this length - use global charset
             return self._generate_from_pattern_global(pattern)
 
-        length_stats = self.analysis.length_stats[length]
-        cooc = self.analysis.cooccurrence
-
-        # Check if we have enough variety for co-occurrence based generation
-        has_variety = length_stats.count > 1
-
-        positions = list(range(length))
-        result = [""] * length
-        retries = 0
-
-        # Start with a random position
-        start_pos = self._random_choice(positions)
-        positions.remove(start_pos)
-
-        required_type = CharType(pattern[start_pos])
-        start_char = self._get_char_of_type(start_pos, required_type, length_stats)
-
-        if not start_char:
+        domains, free = self._pattern_domains(pattern)
+        if 0 in domains:
+            # A type with no chars in the charset
             return None
 
-        result[start_pos] = start_char
-
-        # Fill remaining positions
-        while positions and retries < self.max_retries:
-            pos = self._random_choice(positions)
-            required_type = CharType(pattern[pos])
-
-            # Only use co-occurrence filtering if we have variety
-            compatible = []
-            if has_variety:
-                compatible = self._find_compatible_typed_chars(
-                    result, pos, required_type, length_stats, cooc
-                )
-
-            if compatible and len(compatible) > 1:
-                # Weight by position frequency
-                pos_counts = length_stats.positions[pos].char_counts
-                weighted = {c: pos_counts.get(c, 1) for c in compatible}
-                char = self._weighted_choice(weighted)
-                result[pos] = char
-                positions.remove(pos)
-                retries = 0
-            else:
-                # Low variety - get any char of the required type
-                char = self._get_char_of_type(pos, required_type, length_stats)
-                if char:
-                    result[pos] = char
-                    positions.remove(pos)
-                    retries = 0
-                else:
-                    retries += 1
-
-        if positions:
-            # Couldn't fill all positions, fall back to global charset
-            for pos in positions:
-                required_type = CharType(pattern[pos])
-                char = self._get_char_of_type(pos, required_type, length_stats)
-                if char:
-                    result[pos] = char
-                else:
-                    return None
-
-        return "".join(result)
+        bits = self._get_bits()
+        return self._fill_constrained(
+            domains, bits.position_weights[length], self.max_retries * length,
+            free, soft=True,
+        )
 
     def _generate_from_pattern_global(self, pattern: str) -> Optional[str]:
         """Generate a string using only global charset (for unknown lengths)."""
+        if self._type_chars is None:
+            bits = self._get_bits()
+            self._type_chars = {
+                char_type: "".join(
+                    char for char in bits.alphabet if CharType.from_char(char) == char_type
+                )
+                for char_type in CharType
+            }
+
         result = []
         for char_code in pattern:
-            required_type = CharType(char_code)
-            chars_of_type = list(self.analysis.get_charset_by_type(required_type))
-            if chars_of_type:
-                result.append(self._random_choice(chars_of_type))
-            else:
+            chars_of_type = self._type_chars[CharType(char_code)]
+            if not chars_of_type:
                 return None
+            result.append(self._random_choice(chars_of_type))
         return "".join(result)
 
-    def _get_char_of_type(
-        self,
-        pos: int,
-        char_type: CharType,
-        length_stats,
-    ) -> Optional[str]:
-        """Get a character of the specified type at the given position."""
-        if pos not in length_stats.positions:
-            # Fallback to global charset
-            chars_of_type = list(self.analysis.get_charset_by_type(char_type))
-            if chars_of_type:
-                return self._random_choice(chars_of_type)
-            return None
+    def _pattern_slots(self, pattern: str) -> List[List[str]]:
+        """Chars each position of a pattern can take (as _generate_from_pattern picks them)."""
+        alphabet = self._get_bits().alphabet
+        domains, _ = self._pattern_domains(pattern)
+        return [
+            [char for bit, char in enumerate(alphabet) if domain >> bit & 1]
+            for domain in domains
+        ]
 
-        pos_stats = length_stats.positions[pos]
-        chars_of_type = pos_stats.get_chars_by_type(char_type)
+    def keyspace(self, pattern: Optional[str] = None) -> Union[MixedRadixKeyspace, UnionKeyspace]:
+        """
+        Keyspace of an explicit pattern, or of all observed patterns.
 
-        if not chars_of_type:
-            # Fallback to global charset
-            chars_of_type = list(self.analysis.get_charset_by_type(char_type))
+        Args:
+            pattern: Explicit type pattern like "Ullnn", or None for every
+                     observed pattern (honoring set_lengths)
 
-        if chars_of_type:
-            # Weight by frequency
-            weighted = {c: pos_stats.char_counts.get(c, 1) for c in chars_of_type}
-            return self._weighted_choice(weighted)
+        Returns:
+            Keyspace numbering every candidate exactly once
+        """
+        if pattern is not None:
+            return MixedRadixKeyspace(self._pattern_slots(pattern))
 
-        return None
+        parts = []
+        for length, length_stats in sorted(self.analysis.length_stats.items()):
+            if self._target_lengths is not None and length not in self._target_lengths:
+                continue
+            for observed in sorted(length_stats.patterns):
+                parts.append(MixedRadixKeyspace(self._pattern_slots(observed)))
+        return UnionKeyspace(parts)
 
-    def _find_compatible_typed_chars(
+    def generate_permuted(
         self,
-        current: list,
-        target_pos: int,
-        required_type: CharType,
-        length_stats,
-        cooc: dict,
-    ) -> List[str]:
+        pattern: Optional[str] = None,
+        start: int = 0,
+        stop: Optional[int] = None,
+        step: int = 1,
+    ) -> Iterator[Tuple[int, str]]:
         """
-        Find chars of required type compatible with placed chars.
-        """
-        if target_pos not in length_stats.positions:
-            return []
+        Walk the keyspace in a keyed pseudorandom order.
 
-        # Start with all chars of the required type at this position
-        pos_stats = length_stats.positions[target_pos]
-        candidates = set(pos_stats.get_chars_by_type(required_type))
+        A Feistel permutation keyed by the seed maps counter values to
+        keyspace indices, so every candidate appears exactly once, no
+        dedupe set is kept and the walk ends when the space is exhausted.
+        The same seed gives the same order, so a run resumes at any
+        counter value and workers can split it with start/step.
 
-        if not candidates:
-            return []
+        Args:
+            pattern: Explicit type pattern, or None for all observed patterns
+            start: First counter value
+            stop: Stop before this counter value (None = whole keyspace)
+            step: Counter stride
+
+        Yields:
+            (counter, candidate) tuples; input words and candidates below
+            the set_min_logprob() cutoff are skipped
+        """
+        if self.seed is not None:
+            key = derive_key(self.seed, person=b"edap-perm")
+        else:
+            key = secrets.token_bytes(32)
 
-        # Filter by co-occurrence
-        for pos, char in enumerate(current):
-            if not char:
+        store = self._emitted_store
+        for index, word in permuted(self.keyspace(pattern), key, start, stop, step):
+            if self.exclude_original and word in self._original_words:
                 continue
-
-            if char in cooc and pos in cooc[char] and target_pos in cooc[char][pos]:
-                seen_at_target = cooc[char][pos][target_pos]
-                candidates &= seen_at_target
-
-            if not candidates:
-                break
-
-        return list(candidates)
+            if not self._admit(word):
+                continue
+            if store is not None and not store.claim(word):
+                continue
+            yield index, word
 
     def generate_from_explicit_pattern(self, pattern: str) -> Optional[str]:
         """
@@ -226,6 +273,120 @@ class PatternGenerator(BaseGenerator):
         """
         return self._generate_from_pattern(pattern)
 
+    def generate_explicit_iter(
+        self,
+        pattern: str,
+        count: int,
+        max_attempts_per: int = 100,
+        allow_duplicates: bool = False,
+    ) -> Iterator[str]:
+        """
+        Generate unique strings for an explicit pattern.
+
+        Sampling draws N of K candidates in about K * ln(K / (K - N))
+        tries, which is cheap for N well below K and hopeless close to
+        it. So when count reaches ENUMERATE_FRACTION of the pattern's
+        keyspace (or is 0) the keyspace is walked in permuted order
+        instead (see generate_permuted): every candidate once, no
+        retries. The walk is uniform over the keyspace rather than
+        weighted by co-occurrence, which matters little once most of
+        the space is wanted.
+
+        Args:
+            pattern: Explicit type pattern like "Ullnn"
+            count: Number of strings to generate (0 = the whole keyspace)
+            max_attempts_per: Max sampling attempts per string
+            allow_duplicates: If True, sample without duplicate tracking
+
+        Yields:
+            Generated strings
+        """
+        size = self.keyspace(pattern).size
+        if not allow_duplicates and (count == 0 or count >= size * self.ENUMERATE_FRACTION):
+            for _, candidate in itertools.islice(self.generate_permuted(pattern), count or None):
+                self._generated.add(candidate)
+                yield candidate
+            return
+
+        store = self._emitted_store
+        endless = count == 0
+        generated = 0
+        while endless or generated < count:
+            for _ in range(max_attempts_per):
+                word = self._generate_from_pattern(pattern)
+                if word is None or not self._admit(word):
+                    continue
+                if allow_duplicates:
+                    if store is None or store.claim(word):
+                        yield word
+                    break
+                new = not self.is_duplicate(word) and self._record(word)
+                self._observe(word, new)
+                if new:
+                    yield word
+                    break
+                if self._saturation.exhausted:
+                    return
+            else:
+                if endless:
+                    return
+            generated += 1
+
+    def quota_strata(self) -> Dict[Tuple[int, str], Tuple[int, int]]:
+        """
+        The (length, pattern) strata of quota generation.
+
+        Returns:
+            (observed frequency, keyspace size) per stratum, honoring
+            set_lengths
+        """
+        strata = {}
+        for length, length_stats in sorted(self.analysis.length_stats.items()):
+            if self._target_lengths is not None and length not in self._target_lengths:
+                continue
+            for pattern, frequency in sorted(length_stats.patterns.items()):
+                strata[(length, pattern)] = (frequency, self.keyspace(pattern).size)
+        return strata
+
+    def generate_stratified(self, count: int, max_attempts_per: int = 100) -> Iterator[str]:
+        """
+        Generate count strings split across (length, pattern) strata.
+
+        Each stratum gets a quota in proportion to its observed frequency,
+        capped by its keyspace (see allocate_quotas), and is generated as
+        its own batch with generate_explicit_iter. Quotas a stratum cannot
+        fill (its space is taken by input words) are re-split among the
+        others, so small strata are neither skipped nor drawn into
+        duplicates and the mix per stratum is fixed by count alone.
+
+        Args:
+            count: Number of strings to generate
+            max_attempts_per: Max sampling attempts per string
+
+        Yields:
+            Generated strings, one stratum after another
+        """
+        strata = self.quota_strata()
+        remaining = count
+        while remaining > 0 and strata:
+            produced = 0
+            for stratum, quota in allocate_quotas(remaining, strata).items():
+                frequency, size = strata[stratum]
+                # Each batch tracks its own saturation
+                self._reset_saturation()
+                made = 0
+                for word in self.generate_explicit_iter(stratum[1], quota, max_attempts_per):
+                    yield word
+                    made += 1
+                produced += made
+                if made < quota:
+                    del strata[stratum]
+                else:
+                    strata[stratum] = (frequency, size - made)
+            if not produced:
+                return
+            remaining -= produced
+
     def get_available_patterns(self, length: Optional[int] = None) -> List[tuple]:
         """
         Get available patterns with their frequencies.
@@ -248,3 +409,72 @@ class PatternGenerator(BaseGenerator):
                 patterns.extend(length_stats.patterns.most_common())
 
         return sorted(patterns, key=lambda x: x[1], reverse=True)
+
+    def _pattern_log_tables(
+        self,
+    ) -> Dict[int, Tuple[float, Dict[str, float], List[Dict[str, Tuple[float, str]]]]]:
+        """Log length, pattern and per-position char-within-type probabilities."""
+        if self._pattern_log_table is None:
+            total = sum(ls.count for ls in self.analysis.length_stats.values())
+            table = {}
+            for length, ls in self.analysis.length_stats.items():
+                if ls.count == 0:
+                    continue
+                patterns = {pattern: math.log(count / ls.count)
+                            for pattern, count in ls.patterns.items() if count > 0}
+                positions = []
+                for pos in range(length):
+                    counts = ls.positions[pos].char_counts if pos in ls.positions else {}
+                    codes = {char: CharType.from_char(char).value for char in counts}
+                    type_totals: Dict[str, int] = {}
+                    for char, count in counts.items():
+                        type_totals[codes[char]] = type_totals.get(codes[char], 0) + count
+                    positions.append({
+                        char: (math.log(count / type_totals[codes[char]]), codes[char])
+                        for char, count in counts.items() if count > 0
+                    })
+                table[length] = (math.log(ls.count / total), patterns, positions)
+            self._pattern_log_table = table
+        return self._pattern_log_table
+
+    def log_prob(self, word: str) -> float:
+        """
+        Log probability of a word under the pattern model.
+
+        P(length) * P(pattern | length) times, for each char, its share
+        of the chars of its type seen at that position (the score
+        generate_top() enumerates by).
+        """
+        entry = self._pattern_log_tables().get(len(word))
+        if entry is None:
+            return -math.inf
+        log_prob, patterns, positions = entry
+        codes = []
+        for char, chars in zip(word, positions):
+            scored = chars.get(char)
+            if scored is None:
+                return -math.inf
+            log_prob += scored[0]
+            codes.append(scored[1])
+        pattern_log_prob = patterns.get("".join(codes))
+        if pattern_log_prob is None:
+            return -math.inf
+        return log_prob + pattern_log_prob
+
+    def _top_structures(self) -> Iterator[Tuple[float, List[Slot]]]:
+        """One structure per (length, pattern); slots hold chars of the pattern's types."""
+        total = sum(ls.count for ls in self.analysis.length_stats.values())
+        for _, ls in sorted(self.analysis.length_stats.items()):
+            if ls.count == 0:
+                continue
+            slot_cache = {}
+            for pattern, count in sorted(ls.patterns.items()):
+                slots = []
+                for pos, code in enumerate(pattern):
+                    key = (pos, code)
+                    if key not in slot_cache:
+                        counts = ls.positions[pos].char_counts
+                        chars = ls.positions[pos].get_chars_by_type(CharType(code))
+                        slot_cache[key] = self._slot({c: counts[c] for c in chars})
+                    slots.append(slot_cache[key])
+                yield math.log(ls.count / total) + math.log(count / ls.count), slots
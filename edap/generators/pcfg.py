@@ -0,0 +1,168 @@
+"""
+PCFG generator - generates strings from a learned segment grammar.
+"""
+
+import bisect
+import math
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from edap.generators.base import BaseGenerator, Slot
+from edap.models import AnalysisResult, split_segments
+
+_SEGMENT_KEY = re.compile(r"[LDS]\d+")
+
+
+class PCFGGenerator(BaseGenerator):
+    """
+    Generates strings from a probabilistic context-free grammar.
+
+    Words are modeled as segments (letter, digit and symbol runs) rather
+    than independent positions: a structure such as "L4D2" is chosen,
+    then each segment is filled with a terminal seen in that slot during
+    analysis ("pass", "12"). The probability of a guess is
+    P(structure) * product of P(terminal | segment).
+    """
+
+    def __init__(
+        self,
+        analysis: AnalysisResult,
+        seed: Optional[int] = None,
+        exclude_original: bool = True,
+    ):
+        """
+        Initialize the PCFG generator.
+
+        Args:
+            analysis: Analysis result from PatternAnalyzer
+            seed: Random seed for reproducibility
+            exclude_original: If True, don't generate words from original set
+        """
+        super().__init__(analysis, seed, exclude_original)
+        self._structure_table: Optional[Tuple[List[List[str]], List[int]]] = None
+        self._terminal_tables: Dict[str, Tuple[List[str], List[int]]] = {}
+        # (log P(structure), log P(terminal | segment key)), built on first use
+        self._grammar_log_table: Optional[Tuple[Dict[str, float], Dict[str, Dict[str, float]]]] = None
+
+    @staticmethod
+    def parse_structure(structure: str) -> List[str]:
+        """Split a structure like "L4D2" into segment keys ["L4", "D2"]."""
+        return _SEGMENT_KEY.findall(structure)
+
+    @staticmethod
+    def structure_length(keys: List[str]) -> int:
+        """Length of the words a structure produces."""
+        return sum(int(key[1:]) for key in keys)
+
+    def set_lengths(self, lengths: Optional[Iterable[int]]) -> None:
+        """Restrict generation to structures of the given lengths."""
+        super().set_lengths(lengths)
+        self._structure_table = None
+
+    def _compile_structures(self) -> Tuple[List[List[str]], List[int]]:
+        """Cumulative sampler over structures (honoring set_lengths)."""
+        structures = []
+        cumulative = []
+        total = 0
+        for structure, count in self.analysis.structures.items():
+            keys = self.parse_structure(structure)
+            if self._target_lengths is not None and \
+                    self.structure_length(keys) not in self._target_lengths:
+                continue
+            total += count
+            structures.append(keys)
+            cumulative.append(total)
+        return structures, cumulative
+
+    def _terminal_table(self, key: str) -> Tuple[List[str], List[int]]:
+        """Cumulative sampler over the terminals of a segment."""
+        table = self._terminal_tables.get(key)
+        if table is None:
+            terminals = []
+            cumulative = []
+            total = 0
+            for terminal, count in self.analysis.terminals.get(key, {}).items():
+                total += count
+                terminals.append(terminal)
+                cumulative.append(total)
+            table = self._terminal_tables[key] = (terminals, cumulative)
+        return table
+
+    def _pick(self, items: List[Any], cumulative: List[int]) -> Any:
+        """Draw an item from a cumulative count table."""
+        return items[bisect.bisect_right(cumulative, self._random_below(cumulative[-1]))]
+
+    def generate_one(self) -> Optional[str]:
+        """Generate a single string: a structure, then one terminal per segment."""
+        if self._structure_table is None:
+            self._structure_table = self._compile_structures()
+
+        structures, cumulative = self._structure_table
+        if not structures:
+            return None
+
+        parts = []
+        for key in self._pick(structures, cumulative):
+            terminals, counts = self._terminal_table(key)
+            if not terminals:
+                return None
+            parts.append(self._pick(terminals, counts))
+
+        return "".join(parts)
+
+    def _grammar_log_tables(self) -> Tuple[Dict[str, float], Dict[str, Dict[str, float]]]:
+        """Log structure and terminal probabilities of the grammar."""
+        if self._grammar_log_table is None:
+            total = sum(self.analysis.structures.values())
+            structures = {structure: math.log(count / total)
+                          for structure, count in self.analysis.structures.items() if count > 0}
+            terminals = {}
+            for key, counts in self.analysis.terminals.items():
+                key_total = sum(counts.values())
+                terminals[key] = {terminal: math.log(count / key_total)
+                                  for terminal, count in counts.items() if count > 0}
+            self._grammar_log_table = (structures, terminals)
+        return self._grammar_log_table
+
+    def log_prob(self, word: str) -> float:
+        """
+        Log probability of a word under the grammar.
+
+        log P(structure) plus log P(terminal | segment) for each of the
+        word's segments (the score generate_top() enumerates by).
+        """
+        structures, terminals = self._grammar_log_tables()
+        segments = split_segments(word)
+        log_prob = structures.get("".join(key for key, _ in segments))
+        if log_prob is None:
+            return -math.inf
+        for key, text in segments:
+            terminal_log_prob = terminals.get(key, {}).get(text)
+            if terminal_log_prob is None:
+                return -math.inf
+            log_prob += terminal_log_prob
+        return log_prob
+
+    def _top_structures(self) -> Iterator[Tuple[float, List[Slot]]]:
+        """One structure per grammar structure; slots hold segment terminals."""
+        total = sum(self.analysis.structures.values())
+        slots: Dict[str, Slot] = {}
+        for structure, count in self.analysis.structures.items():
+            keys = self.parse_structure(structure)
+            for key in keys:
+                if key not in slots:
+                    slots[key] = self._slot(self.analysis.terminals.get(key, {}))
+            yield math.log(count / total), [slots[key] for key in keys]
+
+    def generate_guesses(self, k: int = 0) -> Iterator[Tuple[int, str, float]]:
+        """
+        Enumerate guesses in decreasing probability with their guess numbers.
+
+        Args:
+            k: Number of guesses (0 = the whole grammar)
+
+        Yields:
+            (guess number starting at 1, guess, probability) tuples
+        """
+        for number, (word, log_prob) in enumerate(self._enumerate_top(k), 1):
+            yield number, word, math.exp(log_prob)
@@ -0,0 +1,52 @@
+"""
+Quota allocation across generation strata.
+"""
+
+from typing import Dict, Hashable, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+
+def allocate_quotas(count: int, strata: Dict[K, Tuple[int, int]]) -> Dict[K, int]:
+    """
+    Split count across strata in proportion to their weights, capped.
+
+    Largest-remainder apportionment: each stratum gets the floor of its
+    share and the units left over go to the largest fractional parts
+    (earlier strata first on ties). A stratum whose share reaches its cap
+    is pinned at the cap and the rest is re-split among the others.
+
+    Args:
+        count: Total to allocate
+        strata: (weight, cap) per stratum, in a stable order
+
+    Returns:
+        Positive quota per stratum, in the order of strata; they sum to
+        min(count, total cap of the strata with a positive weight)
+    """
+    quotas: Dict[K, int] = {}
+    open_strata = {key: (weight, cap) for key, (weight, cap) in strata.items()
+                   if weight > 0 and cap > 0}
+    remaining = count
+
+    while open_strata and remaining > 0:
+        total = sum(weight for weight, _ in open_strata.values())
+        capped = [key for key, (weight, cap) in open_strata.items()
+                  if remaining * weight >= cap * total]
+        if capped:
+            for key in capped:
+                quotas[key] = open_strata.pop(key)[1]
+                remaining -= quotas[key]
+            continue
+
+        shares = {key: divmod(remaining * weight, total)
+                  for key, (weight, _) in open_strata.items()}
+        leftover = remaining - sum(share for share, _ in shares.values())
+        ranked = sorted(shares, key=lambda key: shares[key][1], reverse=True)
+        for key in ranked[:leftover]:
+            shares[key] = (shares[key][0] + 1, 0)
+        for key, (share, _) in shares.items():
+            quotas[key] = share
+        remaining = 0
+
+    return {key: quotas[key] for key in strata if quotas.get(key, 0) > 0}
@@ -2,10 +2,10 @@
 Random generator - generates strings based on charset and length distribution.
 """
 
-from typing import Optional
+from typing import Iterator, List, Optional, Tuple
 
-from edap.generators.base import BaseGenerator
-from edap.models import AnalysisResult
+from edap.generators.base import BaseGenerator, Slot
+from edap.models import AnalysisResult, LengthStats
 
 
 class RandomGenerator(BaseGenerator):
@@ -59,10 +59,10 @@ class RandomGenerator(BaseGenerator):
                     char = self._random_choice(list(pos_stats.char_counts.keys()))
                 else:
                     # Only 1 char seen at this position, use global charset for variety
-                    char = self._random_choice(list(self.analysis.charset))
+                    char = self._random_choice(sorted(self.analysis.charset))
             else:
                 # Use global charset
-                char = self._random_choice(list(self.analysis.charset))
+                char = self._random_choice(sorted(self.analysis.charset))
 
             chars.append(char)
 
@@ -88,10 +88,28 @@ class RandomGenerator(BaseGenerator):
                 if pos_stats.char_counts:
                     char = self._weighted_choice(dict(pos_stats.char_counts))
                 else:
-                    char = self._random_choice(list(self.analysis.charset))
+                    char = self._random_choice(sorted(self.analysis.charset))
             else:
-                char = self._random_choice(list(self.analysis.charset))
+                char = self._random_choice(sorted(self.analysis.charset))
 
             chars.append(char)
 
         return "".join(chars)
+
+    def _samples_charset(self, length_stats: LengthStats, pos: int) -> bool:
+        """Positions generate_one() fills from the whole charset."""
+        return not (
+            self.use_position_charset
+            and length_stats.count > 1
+            and pos in length_stats.positions
+            and len(length_stats.positions[pos].char_counts) > 1
+        )
+
+    def _top_structures(self) -> Iterator[Tuple[float, List[Slot]]]:
+        """One structure per length; slots follow the log_prob() tables."""
+        for _, (log_prob, positions) in sorted(self._log_tables().items()):
+            slots = [
+                sorted(chars.items(), key=lambda item: (-item[1], item[0]))
+                for chars in positions
+            ]
+            yield log_prob, slots
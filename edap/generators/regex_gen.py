@@ -2,9 +2,10 @@
 Regex-based generator - generates strings matching a user-provided regex pattern.
 """
 
+import math
 import re
 import string
-from typing import Optional, List, Set, Dict
+from typing import Iterable, Optional, List, Set, Dict
 
 from edap.generators.base import BaseGenerator
 from edap.models import AnalysisResult, CharType
@@ -53,6 +54,8 @@ class RegexGenerator(BaseGenerator):
         self.use_learned_charset = use_learned_charset
         self._compiled = re.compile(pattern)
         self._parsed = self._parse_pattern(pattern)
+        # Sub-pattern -> instructions, for scoring groups and alternatives
+        self._sub_parsed: Dict[str, List[dict]] = {}
 
     def _parse_pattern(self, pattern: str) -> List[dict]:
         """
@@ -307,12 +310,107 @@ class RegexGenerator(BaseGenerator):
 
         generated = ''.join(result)
 
+        if self._target_lengths is not None and len(generated) not in self._target_lengths:
+            return None
+
         # Validate against original regex
         if self._compiled.fullmatch(generated):
             return generated
 
         return None
 
+    def log_prob(self, word: str) -> float:
+        """
+        Log probability that generate_one() draws a word.
+
+        Mirrors the sampler: repetition counts, class chars and
+        alternatives are uniform draws, and every way the instructions
+        can spell the word is summed. Draws the final match rejects are
+        not renormalized away.
+
+        Args:
+            word: Candidate to score
+
+        Returns:
+            Natural log probability (-inf if the pattern cannot produce it)
+        """
+        if self._target_lengths is not None and len(word) not in self._target_lengths:
+            return -math.inf
+        if not self._compiled.fullmatch(word):
+            return -math.inf
+        prob = self._spell(self._parsed, word, {0: 1.0}).get(len(word), 0.0)
+        return math.log(prob) if prob > 0 else -math.inf
+
+    def _spell(self, instructions: List[dict], word: str, starts: Dict[int, float]) -> Dict[int, float]:
+        """Probability of each offset in word where the instructions can end."""
+        for instruction in instructions:
+            quantifier = instruction.get('quantifier', {'min': 1, 'max': 1})
+            low, high = quantifier['min'], quantifier['max']
+            share = 1.0 / (high - low + 1)
+            ends: Dict[int, float] = {}
+            current = starts
+            for count in range(high + 1):
+                if count >= low:
+                    for end, prob in current.items():
+                        ends[end] = ends.get(end, 0.0) + prob * share
+                if count == high:
+                    break
+                current = self._spell_once(instruction, word, current)
+                if not current:
+                    break
+            starts = ends
+            if not starts:
+                break
+        return starts
+
+    def _spell_once(self, instruction: dict, word: str, starts: Dict[int, float]) -> Dict[int, float]:
+        """Like _spell() for a single repetition of one instruction."""
+        ends: Dict[int, float] = {}
+        inst_type = instruction['type']
+        if inst_type == 'literal':
+            for start, prob in starts.items():
+                if word.startswith(instruction['char'], start):
+                    end = start + len(instruction['char'])
+                    ends[end] = ends.get(end, 0.0) + prob
+        elif inst_type == 'class':
+            chars = self._filter_by_learned(instruction['chars'])
+            if not chars:
+                return dict(starts)
+            for start, prob in starts.items():
+                hits = chars.count(word[start]) if start < len(word) else 0
+                if hits:
+                    ends[start + 1] = ends.get(start + 1, 0.0) + prob * hits / len(chars)
+        elif inst_type == 'alternation':
+            options = instruction['options']
+            for start, prob in starts.items():
+                for option in options:
+                    spelled = self._spell(self._sub_instructions(option), word, {start: prob / len(options)})
+                    # An empty sub-result is replaced by the option's literal text
+                    empty = spelled.pop(start, 0.0)
+                    if empty and word.startswith(option, start):
+                        spelled[start + len(option)] = spelled.get(start + len(option), 0.0) + empty
+                    for end, end_prob in spelled.items():
+                        ends[end] = ends.get(end, 0.0) + end_prob
+        elif inst_type == 'group':
+            ends = self._spell(self._sub_instructions(instruction['pattern']), word, starts)
+        return ends
+
+    def _sub_instructions(self, pattern: str) -> List[dict]:
+        """Parsed instructions of a group or alternative (cached)."""
+        instructions = self._sub_parsed.get(pattern)
+        if instructions is None:
+            instructions = self._sub_parsed[pattern] = self._parse_pattern(pattern)
+        return instructions
+
+    def set_lengths(self, lengths: Optional[Iterable[int]]) -> None:
+        """
+        Keep only matches with one of the given lengths.
+
+        Lengths come from the pattern's quantifiers rather than the
+        analysis, so matches of other lengths are simply rejected.
+        """
+        self._target_lengths = set(lengths) if lengths is not None else None
+
     def generate_validated(
         self,
         count: int,
@@ -340,9 +438,8 @@ class RegexGenerator(BaseGenerator):
             if not self._compiled.fullmatch(word):
                 continue
 
-            if not self.is_duplicate(word):
+            if not self.is_duplicate(word) and self._record(word):
                 results.append(word)
-                self._generated.add(word)
 
         return results
 
@@ -363,6 +460,7 @@ class RegexInferenceGenerator(BaseGenerator):
     ):
         super().__init__(analysis, seed, exclude_original)
         self._inferred_patterns: Dict[int, List[str]] = {}
+        self._scorers: Dict[int, RegexGenerator] = {}
         self._infer_patterns()
 
     def _infer_patterns(self) -> None:
@@ -453,3 +551,21 @@ class RegexInferenceGenerator(BaseGenerator):
         )
 
         return gen.generate_one()
+
+    def log_prob(self, word: str) -> float:
+        """
+        Log probability that generate_one() draws a word.
+
+        P(length) times the probability that the length's most common
+        inferred regex (the one generate_one() uses) draws the word.
+        """
+        entry = self._log_tables().get(len(word))
+        patterns = self._inferred_patterns.get(len(word))
+        if entry is None or not patterns:
+            return -math.inf
+        scorer = self._scorers.get(len(word))
+        if scorer is None:
+            scorer = self._scorers[len(word)] = RegexGenerator(
+                self.analysis, f'^{patterns[0]}$', exclude_original=False,
+            )
+        return entry[0] + scorer.log_prob(word)
@@ -0,0 +1,182 @@
+"""
+Saturation tracking for sampling generators.
+
+Sampling with dedupe slows down as the reachable space fills up: a short
+length or a rare pattern soon yields little but duplicates. The tracker
+follows the share of new words per stratum (length, pattern) so the
+samplers can move weight off saturated strata, and estimates how much
+unique space is left (Chao1) so generation can stop instead of spinning.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+# A stratum is a (kind, value) pair such as ("length", 8) or ("pattern", "Ullnn")
+Stratum = Tuple[str, Hashable]
+
+# Consecutive windows without a new word before a run may stop
+PATIENCE = 4
+
+
+def chao1(singletons: int, doubletons: int) -> float:
+    """Bias-corrected Chao1 estimate of the words never drawn."""
+    return singletons * (singletons - 1) / (2 * (doubletons + 1))
+
+
+@dataclass
+class SaturationReport:
+    """Where a sampling run stands against its reachable space."""
+    draws: int
+    unique: int
+    new_rate: Optional[float]
+    saturated: List[str] = field(default_factory=list)
+    singletons: int = 0
+    doubletons: int = 0
+    empty_windows: int = 0
+
+    @property
+    def remaining(self) -> Optional[float]:
+        """
+        Estimated words never drawn yet (bias-corrected Chao1).
+
+        Words drawn exactly once (f1) and twice (f2) stand in for the
+        rare words not drawn at all: f1 * (f1 - 1) / (2 * (f2 + 1)).
+        Unlike a capture-recapture ratio this does not assume every
+        word is equally likely, so the long tail of a skewed sampler
+        still counts. None before a full window.
+        """
+        if self.new_rate is None:
+            return None
+        return chao1(self.singletons, self.doubletons)
+
+    @property
+    def exhausted(self) -> bool:
+        """
+        True once PATIENCE windows in a row found nothing new and
+        fewer than one undrawn word is estimated to be left.
+        """
+        remaining = self.remaining
+        return self.empty_windows >= PATIENCE and remaining is not None and remaining < 1
+
+    def __str__(self) -> str:
+        text = f"{self.unique:,} unique of {self.draws:,} draws"
+        remaining = self.remaining
+        if remaining is not None and remaining != float("inf"):
+            text += f", ~{remaining:,.0f} left"
+        if self.saturated:
+            text += f"; saturated: {', '.join(self.saturated)}"
+        return text
+
+
+class SaturationTracker:
+    """
+    Share of new words per stratum, and over the last window of draws.
+
+    Each stratum keeps an exponentially weighted new-word rate. Once any
+    stratum drops below SATURATED the tracker turns active and scale()
+    weights every stratum by its rate, so sampling weight follows the
+    expected yield of new words. Weights are refreshed once per window.
+    Draws per word are counted for the Chao1 estimate of what is left.
+    """
+
+    SATURATED = 0.5
+    # Fixed-point scale of active weights (integer samplers)
+    SCALE = 64
+
+    def __init__(self, window: int = 256, alpha: float = 1 / 64):
+        """
+        Initialize the tracker.
+
+        Args:
+            window: Draws per window (rate estimate and weight refresh)
+            alpha: Smoothing factor of the per-stratum rates
+        """
+        self.window = window
+        self.alpha = alpha
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget every draw."""
+        self.rates: Dict[Stratum, float] = {}
+        self.active = False
+        self.draws = 0
+        self.unique = 0
+        self.new_rate: Optional[float] = None
+        self.empty_windows = 0
+        self.singletons = 0
+        self.doubletons = 0
+        self._hits: Dict[Hashable, int] = {}
+        self._window_draws = 0
+        self._window_new = 0
+
+    def record(self, strata: Iterable[Stratum], new: bool, word: Hashable = None) -> bool:
+        """
+        Record one draw.
+
+        Args:
+            strata: Strata the drawn word belongs to
+            new: Whether the word was new (accepted)
+            word: The drawn word, counted for the Chao1 estimate
+
+        Returns:
+            True at the end of a window once active (weights should be rebuilt)
+        """
+        self.draws += 1
+        self.unique += new
+        for stratum in strata:
+            rate = self.rates.get(stratum, 1.0)
+            self.rates[stratum] = rate + self.alpha * (new - rate)
+        if word is not None:
+            self._count(word)
+
+        self._window_draws += 1
+        self._window_new += new
+        if self._window_draws < self.window:
+            return False
+
+        self.new_rate = self._window_new / self._window_draws
+        self.empty_windows = 0 if self._window_new else self.empty_windows + 1
+        self._window_draws = 0
+        self._window_new = 0
+        if not self.active:
+            self.active = any(rate < self.SATURATED for rate in self.rates.values())
+        return self.active
+
+    def scale(self, stratum: Stratum, weight: int) -> int:
+        """Sampling weight of a stratum (unchanged until active)."""
+        if not self.active:
+            return weight
+        return max(1, round(weight * self.SCALE * self.rates.get(stratum, 1.0)))
+
+    def _count(self, word: Hashable) -> None:
+        """Count one draw of a word, keeping f1 and f2 current."""
+        hits = self._hits.get(word, 0) + 1
+        self._hits[word] = hits
+        if hits == 1:
+            self.singletons += 1
+        elif hits == 2:
+            self.singletons -= 1
+            self.doubletons += 1
+        elif hits == 3:
+            self.doubletons -= 1
+
+    @property
+    def exhausted(self) -> bool:
+        """See SaturationReport.exhausted."""
+        return self.empty_windows >= PATIENCE and chao1(self.singletons, self.doubletons) < 1
+
+    def report(self) -> SaturationReport:
+        """Summary of the draws so far."""
+        saturated = sorted(
+            (stratum for stratum, rate in self.rates.items() if rate < self.SATURATED),
+            key=lambda stratum: (stratum[0], str(stratum[1])),
+        )
+        return SaturationReport(
+            draws=self.draws,
+            unique=self.unique,
+            new_rate=self.new_rate,
+            saturated=[f"{kind} {value}" for kind, value in saturated],
+            singletons=self.singletons,
+            doubletons=self.doubletons,
+            empty_windows=self.empty_windows,
+        )
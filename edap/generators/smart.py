@@ -2,10 +2,11 @@
 Smart generator - uses co-occurrence patterns and position weights.
 """
 
-from typing import Optional, Set
+import bisect
+from typing import List, Optional, Tuple
 
 from edap.generators.base import BaseGenerator
-from edap.models import AnalysisResult
+from edap.models import AnalysisResult, LengthStats
 
 
 class SmartGenerator(BaseGenerator):
@@ -37,6 +38,19 @@ class SmartGenerator(BaseGenerator):
         super().__init__(analysis, seed, exclude_original)
         self.max_retries = max_retries_per_position
 
+    def _samples_charset(self, length_stats: LengthStats, pos: int) -> bool:
+        """Positions generate_one() fills from the whole alphabet."""
+        return not (
+            length_stats.count > 1
+            and pos in length_stats.positions
+            and len(length_stats.positions[pos].char_counts) > 1
+        )
+
+    def _pick_seen(self, choices: Tuple[List[str], List[int]]) -> str:
+        """Any char seen at a position, weighted by count (as _weighted_choice draws)."""
+        chars, cumulative = choices
+        return chars[bisect.bisect_right(cumulative, self._random_below(cumulative[-1]))]
+
     def generate_one(self) -> Optional[str]:
         """
         Generate a single string using smart selection.
@@ -55,146 +69,72 @@ class SmartGenerator(BaseGenerator):
             return None
 
         length_stats = self.analysis.length_stats[length]
+        bits = self._get_bits()
+        weights = bits.position_weights[length]
+        choices = bits.position_choices[length]
         positions = list(range(length))
 
         # Check if we have enough variety to do smart generation
         # If only 1 word of this length, fall back to global charset
         has_variety = length_stats.count > 1
 
-        # Result array
+        # Result array, and the chars each position still allows
         result = [""] * length
+        allowed = list(bits.position_masks[length])
 
         # Start with a random position
         start_pos = self._random_choice(positions)
         positions.remove(start_pos)
 
         # Pick initial character weighted by frequency
-        if has_variety and start_pos in length_stats.positions:
-            pos_stats = length_stats.positions[start_pos]
-            if len(pos_stats.char_counts) > 1:
-                start_char = self._weighted_choice(dict(pos_stats.char_counts))
-            else:
-                # Only 1 char at this position, use global charset
-                start_char = self._random_choice(list(self.analysis.charset))
+        if has_variety and len(choices[start_pos][0]) > 1:
+            start_char = self._pick_seen(choices[start_pos])
         else:
-            start_char = self._random_choice(list(self.analysis.charset))
+            # Only 1 char at this position, use global charset
+            start_char = self._random_choice(bits.alphabet)
 
         result[start_pos] = start_char
+        bits.place(allowed, start_pos, start_char)
 
         # Fill remaining positions
         while positions:
             pos = self._random_choice(positions)
             positions.remove(pos)
 
-            # Find compatible characters (only if we have variety)
-            compatible = set()
-            if has_variety:
-                compatible = self._find_compatible_chars(result, pos, length_stats)
-
-            if compatible and len(compatible) > 1:
-                # Weight by position frequency
-                pos_counts = length_stats.positions[pos].char_counts
-                weighted_compatible = {
-                    c: pos_counts.get(c, 1) for c in compatible
-                }
-                char = self._weighted_choice(weighted_compatible)
-            elif has_variety and pos in length_stats.positions and len(length_stats.positions[pos].char_counts) > 1:
+            # Compatible characters (only if we have variety)
+            compatible = allowed[pos] if has_variety else 0
+
+            if compatible & (compatible - 1):
+                # More than one: weight by position frequency
+                char = bits.alphabet[self._weighted_bit(compatible, weights[pos])]
+            elif has_variety and len(choices[pos][0]) > 1:
                 # Fallback: use any char seen at this position (if variety exists)
-                char = self._weighted_choice(
-                    dict(length_stats.positions[pos].char_counts)
-                )
+                char = self._pick_seen(choices[pos])
             else:
                 # No variety at this position, use global charset
-                char = self._random_choice(list(self.analysis.charset))
+                char = self._random_choice(bits.alphabet)
 
             result[pos] = char
+            bits.place(allowed, pos, char)
 
         return "".join(result)
 
-    def _find_compatible_chars(
-        self,
-        current: list,
-        target_pos: int,
-        length_stats,
-    ) -> Set[str]:
-        """
-        Find characters compatible with already-placed characters.
-
-        A character is compatible if it was seen in the same word
-        with all currently placed characters at their positions.
-        """
-        cooc = self.analysis.cooccurrence
-
-        # Get chars that can go at target_pos
-        if target_pos not in length_stats.positions:
-            return set()
-
-        candidates = set(length_stats.positions[target_pos].char_counts.keys())
-
-        # Filter by co-occurrence with each placed character
-        for pos, char in enumerate(current):
-            if not char:
-                continue
-
-            # What chars did we see at target_pos when char was at pos?
-            if char in cooc and pos in cooc[char] and target_pos in cooc[char][pos]:
-                seen_at_target = cooc[char][pos][target_pos]
-                candidates &= seen_at_target
-            else:
-                # No co-occurrence data, don't filter
-                pass
-
-        return candidates
-
     def generate_one_strict(self) -> Optional[str]:
         """
         Generate with stricter co-occurrence requirements.
 
-        Will return None more often but produces higher-quality matches.
+        Every pair of chars in the result was seen together at their
+        positions. Constraint propagation (see _fill_constrained) makes
+        most attempts succeed; acceptance_rate reports how many do.
         """
         length = self._choose_length()
 
         if length not in self.analysis.length_stats:
             return None
 
-        length_stats = self.analysis.length_stats[length]
-        positions = list(range(length))
-
-        result = [""] * length
-        retries = 0
-
-        # Start with a random position
-        start_pos = self._random_choice(positions)
-        positions.remove(start_pos)
-
-        if start_pos in length_stats.positions:
-            start_char = self._weighted_choice(
-                dict(length_stats.positions[start_pos].char_counts)
-            )
-        else:
-            return None
-
-        result[start_pos] = start_char
-
-        while positions and retries < self.max_retries * length:
-            pos = self._random_choice(positions)
-
-            compatible = self._find_compatible_chars(result, pos, length_stats)
-
-            if not compatible:
-                retries += 1
-                continue
-
-            pos_counts = length_stats.positions[pos].char_counts
-            weighted = {c: pos_counts.get(c, 1) for c in compatible}
-            char = self._weighted_choice(weighted)
-
-            result[pos] = char
-            positions.remove(pos)
-            retries = 0
-
-        if positions:
-            # Couldn't fill all positions
-            return None
-
-        return "".join(result)
+        bits = self._get_bits()
+        return self._fill_constrained(
+            bits.position_masks[length],
+            bits.position_weights[length],
+            self.max_retries * length,
+        )
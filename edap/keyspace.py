@@ -0,0 +1,173 @@
+"""
+Keyspaces and keyed permutations for EDAP.
+
+A keyspace numbers every candidate of a mask or pattern, so a counter
+can be mapped to a candidate. Running the counter through a keyed
+permutation of the index range visits every candidate exactly once in a
+random-looking order: output is unique by construction, memory is
+constant and the run ends exactly when the space is exhausted.
+"""
+
+import bisect
+import hashlib
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+
+
+class MixedRadixKeyspace:
+    """
+    Cartesian product of per-position alphabets.
+
+    Index i is written in mixed radix (the last position varies
+    fastest), so unrank(0) is the first choice everywhere.
+    """
+
+    def __init__(self, slots: Sequence[Sequence[str]]):
+        """
+        Initialize the keyspace.
+
+        Args:
+            slots: Choices for each position (each a sequence of strings)
+        """
+        self.slots: List[Sequence[str]] = [list(slot) for slot in slots]
+        self.size = 1
+        for slot in self.slots:
+            self.size *= len(slot)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def unrank(self, index: int) -> str:
+        """Candidate with the given index."""
+        if not 0 <= index < self.size:
+            raise IndexError(f"Keyspace index out of range: {index}")
+        chars = []
+        for slot in reversed(self.slots):
+            index, digit = divmod(index, len(slot))
+            chars.append(slot[digit])
+        return "".join(reversed(chars))
+
+    def rank(self, word: str) -> Optional[int]:
+        """Index of a candidate, or None if it is not in the keyspace."""
+        if len(word) != len(self.slots):
+            return None
+        index = 0
+        for char, slot in zip(word, self.slots):
+            try:
+                index = index * len(slot) + slot.index(char)
+            except ValueError:
+                return None
+        return index
+
+
+class UnionKeyspace:
+    """Concatenation of keyspaces, indexed one after another."""
+
+    def __init__(self, parts: Sequence["Keyspace"]):
+        """
+        Initialize the keyspace.
+
+        Args:
+            parts: Keyspaces with a size and unrank()
+        """
+        # size, not len(): len() overflows past sys.maxsize
+        self.parts = [part for part in parts if part.size]
+        self._offsets: List[int] = []
+        self.size: int = 0
+        for part in self.parts:
+            self._offsets.append(self.size)
+            self.size += part.size
+
+    def __len__(self) -> int:
+        return self.size
+
+    def unrank(self, index: int) -> str:
+        """Candidate with the given index."""
+        if not 0 <= index < self.size:
+            raise IndexError(f"Keyspace index out of range: {index}")
+        part = bisect.bisect_right(self._offsets, index) - 1
+        return self.parts[part].unrank(index - self._offsets[part])
+
+
+Keyspace = Union[MixedRadixKeyspace, UnionKeyspace]
+
+
+class FeistelPermutation:
+    """
+    Keyed pseudorandom permutation of range(size).
+
+    A balanced Feistel network with a keyed BLAKE2b round function
+    permutes the smallest even-width bit domain that covers size;
+    cycle-walking (re-applying the network until the value lands below
+    size) restricts it to range(size). The domain is less than four
+    times size, so few steps are needed on average.
+    """
+
+    def __init__(self, size: int, key: bytes, rounds: int = 4):
+        """
+        Initialize the permutation.
+
+        Args:
+            size: Number of elements to permute
+            key: Secret key (up to 64 bytes)
+            rounds: Feistel rounds
+        """
+        if size < 0:
+            raise ValueError("size must be non-negative")
+        self.size = size
+        self.key = key
+        self.rounds = rounds
+        bits = max(2, (size - 1).bit_length()) if size > 1 else 2
+        self._half = (bits + 1) // 2
+        self._mask = (1 << self._half) - 1
+        self._width = (self._half + 7) // 8
+
+    def _round(self, number: int, value: int) -> int:
+        digest = hashlib.blake2b(
+            bytes([number]) + value.to_bytes(self._width, "little"),
+            key=self.key,
+            digest_size=min(64, max(8, self._width)),
+        ).digest()
+        return int.from_bytes(digest, "little") & self._mask
+
+    def _encrypt(self, value: int) -> int:
+        left = value >> self._half
+        right = value & self._mask
+        for number in range(self.rounds):
+            left, right = right, left ^ self._round(number, right)
+        return (left << self._half) | right
+
+    def __call__(self, index: int) -> int:
+        """Image of index under the permutation."""
+        if not 0 <= index < self.size:
+            raise IndexError(f"Permutation index out of range: {index}")
+        value = self._encrypt(index)
+        while value >= self.size:
+            value = self._encrypt(value)
+        return value
+
+
+def permuted(
+    keyspace: Keyspace,
+    key: bytes,
+    start: int = 0,
+    stop: Optional[int] = None,
+    step: int = 1,
+) -> Iterator[Tuple[int, str]]:
+    """
+    Walk a keyspace in keyed pseudorandom order.
+
+    Args:
+        keyspace: Keyspace with a size and unrank()
+        key: Permutation key
+        start: First counter value (to resume or split a run)
+        stop: Stop before this counter value (None = end of the keyspace)
+        step: Counter stride (worker k of N uses start=k, step=N)
+
+    Yields:
+        (counter, candidate) tuples; every candidate in range exactly once
+    """
+    size = keyspace.size
+    permutation = FeistelPermutation(size, key)
+    stop = size if stop is None else min(stop, size)
+    for index in range(start, stop, step):
+        yield index, keyspace.unrank(permutation(index))
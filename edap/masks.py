@@ -0,0 +1,394 @@
+"""
+Hashcat-style masks for EDAP.
+
+A mask such as "?u?l?l?l?d?d" fixes a charset for every position, and
+its keyspace is the cartesian product of those charsets. The type
+patterns found by the analyzer map directly onto masks (U -> ?u,
+l -> ?l, n -> ?d, @ -> ?s), and each position can be narrowed to the
+characters the input actually used there.
+
+Enumeration expands the last few positions into a block table once and
+prepends each prefix of the remaining positions to it, so the inner
+loop is a single list comprehension of string concatenations.
+
+propose_masks() and select_masks() turn an analysis into an attack plan:
+one mask per observed pattern, ranked by expected cracks per guess, and
+the set that covers the most input words within a keyspace budget.
+"""
+
+import bisect
+import itertools
+import string
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from edap.keyspace import MixedRadixKeyspace
+from edap.models import AnalysisResult, CharType
+
+# Hashcat's built-in charsets
+BUILTIN_CHARSETS: Dict[str, str] = {
+    "l": string.ascii_lowercase,
+    "u": string.ascii_uppercase,
+    "d": string.digits,
+    "h": "0123456789abcdef",
+    "H": "0123456789ABCDEF",
+    "s": " " + string.punctuation,
+}
+BUILTIN_CHARSETS["a"] = (
+    BUILTIN_CHARSETS["l"] + BUILTIN_CHARSETS["u"]
+    + BUILTIN_CHARSETS["d"] + BUILTIN_CHARSETS["s"]
+)
+
+# Mask token for each character type of a pattern
+TYPE_MASKS: Dict[CharType, str] = {
+    CharType.UPPER: "?u",
+    CharType.LOWER: "?l",
+    CharType.DIGIT: "?d",
+    CharType.SYMBOL: "?s",
+}
+
+# Largest number of candidates expanded into one block
+BLOCK_SIZE = 1 << 16
+
+# Branch-and-bound nodes select_masks() explores before settling
+SEARCH_NODES = 200_000
+
+
+def _tokens(spec: str, custom: Optional[Dict[str, str]] = None) -> Iterator[str]:
+    """Yield the charset of each position of a mask (or charset) spec."""
+    pos = 0
+    while pos < len(spec):
+        char = spec[pos]
+        if char != "?":
+            yield char
+            pos += 1
+            continue
+        if pos + 1 == len(spec):
+            raise ValueError(f"Mask ends with a bare '?': {spec!r}")
+        key = spec[pos + 1]
+        if key == "?":
+            yield "?"
+        elif key in BUILTIN_CHARSETS:
+            yield BUILTIN_CHARSETS[key]
+        elif custom is not None and key in custom:
+            yield custom[key]
+        else:
+            raise ValueError(f"Unknown charset ?{key} in {spec!r}")
+        pos += 2
+
+
+def parse_charset(spec: str) -> str:
+    """
+    Expand a custom charset like "?l?d_" into its characters.
+
+    Args:
+        spec: Literal characters and built-in charsets
+
+    Returns:
+        The characters in first-seen order, without repeats
+    """
+    return "".join(dict.fromkeys("".join(_tokens(spec))))
+
+
+def pattern_to_mask(pattern: str) -> str:
+    """
+    Convert a type pattern like "Ullnn" to a mask like "?u?l?l?d?d".
+
+    Args:
+        pattern: String of CharType values
+
+    Returns:
+        Hashcat mask
+    """
+    return "".join(TYPE_MASKS[CharType(code)] for code in pattern)
+
+
+class Mask:
+    """
+    A hashcat-style mask and its keyspace.
+
+    Candidates are numbered in mixed radix with the last position varying
+    fastest, matching MixedRadixKeyspace, so an index range can be
+    enumerated, resumed or split between machines.
+    """
+
+    def __init__(
+        self,
+        mask: str,
+        custom_charsets: Optional[Dict[int, str]] = None,
+    ):
+        """
+        Initialize the mask.
+
+        Args:
+            mask: Mask like "?u?l?l?d?d"; ?l ?u ?d ?h ?H ?s ?a are built
+                  in, ?1-?4 refer to custom charsets, ?? is a literal '?'
+                  and any other character is a literal
+            custom_charsets: Custom charsets by number (1-4), written with
+                             the same syntax, e.g. {1: "?l?d"}
+
+        Raises:
+            ValueError: If the mask or a custom charset is malformed
+        """
+        custom = {}
+        for number, spec in (custom_charsets or {}).items():
+            if number not in (1, 2, 3, 4):
+                raise ValueError(f"Custom charsets are numbered 1-4, got {number}")
+            custom[str(number)] = parse_charset(spec)
+
+        self.mask = mask
+        self._set_slots(
+            ["".join(dict.fromkeys(chars)) for chars in _tokens(mask, custom)]
+        )
+
+    @classmethod
+    def from_pattern(cls, pattern: str) -> "Mask":
+        """Mask of a type pattern like "UllnnU"."""
+        return cls(pattern_to_mask(pattern))
+
+    def _set_slots(self, slots: Sequence[str]) -> None:
+        self.slots: List[str] = list(slots)
+        self.keyspace = MixedRadixKeyspace(self.slots)
+        self.size = self.keyspace.size
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __str__(self) -> str:
+        return self.mask
+
+    def restricted(self, analysis: AnalysisResult) -> "Mask":
+        """
+        Narrow each position to the characters observed there.
+
+        Positions are matched against the input words of the mask's
+        length; a position with no observed match falls back to the
+        whole input charset. Literal positions are left alone. Kept
+        characters are ordered by how often they were seen, so the
+        start of the keyspace holds the likeliest candidates.
+
+        Args:
+            analysis: Analysis result from PatternAnalyzer
+
+        Returns:
+            A new Mask over the narrowed keyspace
+        """
+        length_stats = analysis.length_stats.get(len(self.slots))
+        slots = []
+        for pos, slot in enumerate(self.slots):
+            if len(slot) > 1:
+                counts: Dict[str, int] = {}
+                if length_stats is not None and pos in length_stats.positions:
+                    counts = length_stats.positions[pos].char_counts
+                narrowed = [c for c in slot if c in counts]
+                if not narrowed:
+                    narrowed = [c for c in slot if c in analysis.charset]
+                narrowed.sort(key=lambda c: -counts.get(c, 0))
+                slot = "".join(narrowed)
+            slots.append(slot)
+
+        mask = Mask.__new__(Mask)
+        mask.mask = self.mask
+        mask._set_slots(slots)
+        return mask
+
+    def iter_blocks(
+        self,
+        start: int = 0,
+        stop: Optional[int] = None,
+        step: int = 1,
+    ) -> Iterator[List[str]]:
+        """
+        Enumerate candidates in index order, a block at a time.
+
+        Args:
+            start: First index
+            stop: Stop before this index (None = end of the keyspace)
+            step: Index stride
+
+        Yields:
+            Lists of candidates (at most BLOCK_SIZE each); with step 1
+            each list is a run of consecutive indices
+        """
+        if step < 1:
+            raise ValueError("step must be positive")
+        stop = self.size if stop is None else min(stop, self.size)
+        if start >= stop:
+            return
+
+        # Expand the fastest-varying positions into one table
+        split = len(self.slots)
+        tail_size = 1
+        while split and tail_size * len(self.slots[split - 1]) <= BLOCK_SIZE:
+            split -= 1
+            tail_size *= len(self.slots[split])
+        tail = ["".join(chars) for chars in itertools.product(*self.slots[split:])]
+        head = MixedRadixKeyspace(self.slots[:split])
+
+        # One prefix per block; a stride slices the table instead of
+        # unranking every candidate
+        index = start
+        while index < stop:
+            prefix_index, low = divmod(index, tail_size)
+            prefix = head.unrank(prefix_index)
+            high = min(tail_size, stop - prefix_index * tail_size)
+            if low == 0 and high == tail_size and step == 1:
+                block = tail
+            else:
+                block = tail[low:high:step]
+            yield [prefix + suffix for suffix in block]
+            index += len(block) * step
+
+    def candidates(
+        self,
+        start: int = 0,
+        stop: Optional[int] = None,
+        step: int = 1,
+    ) -> Iterator[str]:
+        """
+        Enumerate candidates start, start + step, ... below stop.
+
+        Args:
+            start: First index (to resume or split a run)
+            stop: Stop before this index (None = end of the keyspace)
+            step: Index stride (worker k of N uses start=k, step=N)
+
+        Yields:
+            Candidates in index order
+        """
+        return itertools.chain.from_iterable(self.iter_blocks(start, stop, step))
+
+    def __iter__(self) -> Iterator[str]:
+        return self.candidates()
+
+
+@dataclass
+class MaskCandidate:
+    """A mask proposed from an observed type pattern."""
+    mask: str  # e.g. "?u?l?l?d?d", or "?1?2?2?3?3" with custom charsets
+    count: int  # input words with this pattern
+    keyspace: int
+    custom_charsets: Dict[int, str] = field(default_factory=dict)
+
+    @property
+    def efficiency(self) -> float:
+        """Expected cracks per guess (input words per candidate)."""
+        return self.count / self.keyspace if self.keyspace else 0.0
+
+    def to_hcmask(self) -> str:
+        """Line for a hashcat .hcmask file ("cs1,cs2,mask")."""
+        fields = [
+            self.custom_charsets[number].replace("?", "??").replace(",", "\\,")
+            for number in sorted(self.custom_charsets)
+        ]
+        return ",".join(fields + [self.mask])
+
+
+def propose_masks(analysis: AnalysisResult, observed: bool = False) -> List[MaskCandidate]:
+    """
+    Propose one mask per observed type pattern.
+
+    Args:
+        analysis: Analysis result from PatternAnalyzer
+        observed: If True, each character type gets a custom charset of
+                  only the chars of that type seen at the pattern's
+                  positions (at most four types, so it fits ?1-?4)
+
+    Returns:
+        Candidates sorted by decreasing efficiency
+    """
+    candidates = []
+    for _, length_stats in sorted(analysis.length_stats.items()):
+        for pattern, count in sorted(length_stats.patterns.items()):
+            if not observed:
+                mask = Mask.from_pattern(pattern)
+                candidates.append(MaskCandidate(mask.mask, count, mask.size))
+                continue
+
+            # Custom charset per type, numbered by first appearance
+            numbers: Dict[str, int] = {}
+            seen: Dict[str, set] = {}
+            for pos, code in enumerate(pattern):
+                numbers.setdefault(code, len(numbers) + 1)
+                chars = length_stats.positions[pos].get_chars_by_type(CharType(code))
+                seen.setdefault(code, set()).update(chars)
+            custom = {numbers[code]: "".join(sorted(chars)) for code, chars in seen.items()}
+            mask_text = "".join(f"?{numbers[code]}" for code in pattern)
+            size = 1
+            for code in pattern:
+                size *= len(seen[code])
+            candidates.append(MaskCandidate(mask_text, count, size, custom))
+
+    candidates.sort(key=lambda c: (-c.efficiency, c.keyspace, c.mask))
+    return candidates
+
+
+def select_masks(
+    candidates: Iterable[MaskCandidate],
+    budget: int,
+    max_nodes: int = SEARCH_NODES,
+) -> List[MaskCandidate]:
+    """
+    Pick the masks that cover the most input words within a keyspace budget.
+
+    This is a 0/1 knapsack (coverage is the value, keyspace the weight),
+    solved by branch and bound over the masks in decreasing efficiency,
+    pruned by the fractional bound. The search starts from the better
+    of the greedy pick and the best single mask that fits, so if it
+    stops after max_nodes nodes the result still covers at least half
+    of the optimum. Running the result in order front-loads the cracks.
+
+    Args:
+        candidates: Proposed masks
+        budget: Total number of guesses allowed
+        max_nodes: Search nodes before settling for the best set so far
+
+    Returns:
+        Selected masks in decreasing efficiency
+    """
+    items = [
+        c for c in sorted(candidates, key=lambda c: (-c.efficiency, c.keyspace, c.mask))
+        if 0 < c.keyspace <= budget
+    ]
+    if not items:
+        return []
+
+    # Prefix sums for the fractional bound of the items from i on
+    weights = list(itertools.accumulate((c.keyspace for c in items), initial=0))
+    values = list(itertools.accumulate((c.count for c in items), initial=0))
+
+    def bound(i: int, room: int) -> float:
+        j = bisect.bisect_right(weights, weights[i] + room) - 1
+        value: float = values[j] - values[i]
+        if j < len(items):
+            value += items[j].efficiency * (room - (weights[j] - weights[i]))
+        return value
+
+    greedy: List[int] = []
+    room = budget
+    for i, candidate in enumerate(items):
+        if candidate.keyspace <= room:
+            greedy.append(i)
+            room -= candidate.keyspace
+    best_value = sum(items[i].count for i in greedy)
+    best = greedy
+    single = max(range(len(items)), key=lambda i: items[i].count)
+    if items[single].count > best_value:
+        best_value, best = items[single].count, [single]
+
+    # Depth-first: (next item, room left, value so far, chosen items)
+    stack: List[Tuple[int, int, int, Tuple[int, ...]]] = [(0, budget, 0, ())]
+    nodes = 0
+    while stack and nodes < max_nodes:
+        i, room, value, chosen = stack.pop()
+        nodes += 1
+        if value > best_value:
+            best_value, best = value, list(chosen)
+        if i == len(items) or value + bound(i, room) <= best_value:
+            continue
+        stack.append((i + 1, room, value, chosen))
+        if items[i].keyspace <= room:
+            # Pushed last so the include branch is explored first
+            stack.append((i + 1, room - items[i].keyspace, value + items[i].count, chosen + (i,)))
+
+    return [items[i] for i in sorted(best)]
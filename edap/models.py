@@ -4,7 +4,7 @@ Data models and enums for EDAP.
 
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Dict, List, Set, Optional
+from typing import Dict, List, Mapping, Set, Optional, Tuple
 from collections import Counter
 
 
@@ -30,6 +30,34 @@ class CharType(Enum):
         return self.value
 
 
+def split_segments(word: str) -> List[Tuple[str, str]]:
+    """
+    Split a word into PCFG segments: runs of letters (L), digits (D)
+    and symbols (S).
+
+    Returns:
+        (segment key, text) pairs, e.g. "pass12!" ->
+        [("L4", "pass"), ("D2", "12"), ("S1", "!")]
+    """
+    segments = []
+    start = 0
+    for i in range(1, len(word) + 1):
+        if i == len(word) or _segment_class(word[i]) != _segment_class(word[start]):
+            text = word[start:i]
+            segments.append((f"{_segment_class(text[0])}{len(text)}", text))
+            start = i
+    return segments
+
+
+def _segment_class(char: str) -> str:
+    """Segment class of a character: L, D or S."""
+    if char.isalpha():
+        return "L"
+    if char.isdigit():
+        return "D"
+    return "S"
+
+
 @dataclass
 class PositionStats:
     """Statistics for a specific position in words of a given length."""
@@ -137,7 +165,12 @@ class AnalysisResult:
     max_length: int
 
     # Co-occurrence data: char -> position -> next_position -> set of chars seen
-    cooccurrence: Dict[str, Dict[int, Dict[int, Set[str]]]] = field(default_factory=dict)
+    cooccurrence: Mapping[str, Mapping[int, Mapping[int, Set[str]]]] = field(default_factory=dict)
+
+    # Segment grammar: structure ("L4D2") -> count, and
+    # segment key ("L4") -> terminal ("pass") -> count
+    structures: Mapping[str, int] = field(default_factory=Counter)
+    terminals: Mapping[str, Mapping[str, int]] = field(default_factory=dict)
 
     @property
     def length_distribution(self) -> Dict[int, float]:
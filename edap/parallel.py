@@ -0,0 +1,564 @@
+"""
+Parallel generation - fan a generator out across a process pool.
+
+Each chunk of work gets its own seed derived from the run seed, the
+worker slot and the chunk number, so the same seed and worker count
+always produce the same output when results are merged in order.
+
+ConcurrentHybridGenerator instead runs each hybrid sub-generator as its
+own producer process and merges their queues by weight.
+"""
+
+import hashlib
+import multiprocessing
+import queue
+import secrets
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import TYPE_CHECKING, Callable, Deque, Iterable, Iterator, List, Optional, Set
+
+from edap.compiled import CompiledModel, SharedModel
+from edap.exceptions import InsufficientDataError
+from edap.generators.base import BaseGenerator
+from edap.models import AnalysisResult
+
+if TYPE_CHECKING:
+    from edap.store import EmittedStore
+
+
+GeneratorFactory = Callable[..., BaseGenerator]
+
+# Per-process generator, built once by the pool initializer
+_worker_generator: Optional[BaseGenerator] = None
+# Shared memory segment backing the worker's model (kept referenced)
+_worker_segment = None
+
+
+def derive_seed(seed: int, *path: int) -> int:
+    """
+    Derive an independent 64-bit seed from a base seed.
+
+    Args:
+        seed: Run seed
+        *path: Stream coordinates, e.g. (worker, chunk)
+
+    Returns:
+        Derived seed
+    """
+    key = ":".join(str(part) for part in (seed,) + path).encode("ascii")
+    digest = hashlib.blake2b(key, digest_size=8, person=b"edap-seed").digest()
+    return int.from_bytes(digest, "big")
+
+
+def _init_worker(
+    factory: GeneratorFactory,
+    analysis: Optional[AnalysisResult],
+    exclude_original: bool,
+    original_words: Set[str],
+    shared_name: Optional[str] = None,
+    lengths: Optional[List[int]] = None,
+    min_logprob: Optional[float] = None,
+) -> None:
+    """Build the generator once per worker process."""
+    global _worker_generator, _worker_segment
+    if shared_name is not None:
+        _worker_segment, model = SharedModel.attach(shared_name)
+        analysis = model.to_analysis()
+    _worker_generator = factory(analysis, seed=0, exclude_original=exclude_original)
+    _worker_generator.set_original_words(original_words)
+    if lengths is not None:
+        _worker_generator.set_lengths(lengths)
+    _worker_generator.set_min_logprob(min_logprob)
+
+
+def _generate_chunk(seed: int, size: int, allow_duplicates: bool) -> List[str]:
+    """Generate one chunk of candidates in a worker process."""
+    gen = _worker_generator
+    assert gen is not None, "worker pool was not initialized"
+    gen.reseed(seed)
+    gen._generated.clear()
+    gen._reset_saturation()
+    return gen.generate(size, allow_duplicates=allow_duplicates)
+
+
+class ParallelGenerator:
+    """
+    Runs a generator across a process pool.
+
+    Workers generate fixed-size chunks, each from its own derived seed.
+    The parent merges chunks (in submission order, or as they finish),
+    removes duplicates across workers and stops once enough unique
+    candidates have been produced.
+    """
+
+    def __init__(
+        self,
+        factory: GeneratorFactory,
+        analysis: AnalysisResult,
+        workers: int = 2,
+        seed: Optional[int] = None,
+        chunk_size: int = 10000,
+        ordered: bool = True,
+        exclude_original: bool = True,
+        shared_model: bool = True,
+        lengths: Optional[Iterable[int]] = None,
+        min_logprob: Optional[float] = None,
+    ):
+        """
+        Initialize the parallel driver.
+
+        Args:
+            factory: Picklable callable building a generator, called as
+                     factory(analysis, seed=..., exclude_original=...)
+                     (a generator class or functools.partial of one)
+            analysis: Analysis result from PatternAnalyzer
+            workers: Number of worker processes
+            seed: Run seed (None picks a random one)
+            chunk_size: Candidates requested per worker task
+            ordered: Merge chunks in submission order (reproducible)
+                     instead of as soon as they finish
+            exclude_original: If True, don't generate words from original set
+            shared_model: Publish the compiled model in shared memory once
+                          instead of pickling the analysis to every worker
+            lengths: Generate only words of these lengths (see
+                     BaseGenerator.set_lengths)
+            min_logprob: Drop candidates scoring below this in the workers
+                         (see BaseGenerator.set_min_logprob)
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+
+        self.factory = factory
+        self.analysis = analysis
+        self.workers = workers
+        self.seed = seed if seed is not None else secrets.randbits(64)
+        self.chunk_size = max(1, chunk_size)
+        self.ordered = ordered
+        self.exclude_original = exclude_original
+        self.shared_model = shared_model
+        self.lengths = sorted(set(lengths)) if lengths is not None else None
+        self.min_logprob = min_logprob
+        self._original_words: Set[str] = set()
+        self._generated: Set[str] = set()
+
+    def set_original_words(self, words: Set[str]) -> None:
+        """Set the original wordlist for exclusion checking."""
+        self._original_words = words
+
+    def chunk_seed(self, task: int) -> int:
+        """Seed for the given task number (worker slot, chunk within slot)."""
+        return derive_seed(self.seed, task % self.workers, task // self.workers)
+
+    def _iter_chunks(self, size: int, allow_duplicates: bool) -> Iterator[List[str]]:
+        """Yield chunks from the pool until the consumer stops."""
+        if self.lengths is not None:
+            # Fail here: an error in the worker initializer would only
+            # surface as a broken pool
+            probe = self.factory(self.analysis, seed=0, exclude_original=self.exclude_original)
+            probe.set_lengths(self.lengths)
+
+        shared = None
+        analysis: Optional[AnalysisResult] = self.analysis
+        if self.shared_model:
+            shared = SharedModel(CompiledModel.from_analysis(self.analysis))
+            analysis = None
+
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(
+                    self.factory,
+                    analysis,
+                    self.exclude_original,
+                    self._original_words,
+                    shared.name if shared else None,
+                    self.lengths,
+                    self.min_logprob,
+                ),
+            ) as pool:
+                yield from self._drain(pool, size, allow_duplicates)
+        finally:
+            if shared is not None:
+                shared.close()
+
+    def _drain(
+        self,
+        pool: ProcessPoolExecutor,
+        size: int,
+        allow_duplicates: bool,
+    ) -> Iterator[List[str]]:
+        """Keep the pool busy and yield finished chunks."""
+        pending: Deque[Future[List[str]]] = deque()
+        task = 0
+
+        def submit() -> None:
+            nonlocal task
+            pending.append(pool.submit(
+                _generate_chunk,
+                self.chunk_seed(task),
+                size,
+                allow_duplicates,
+            ))
+            task += 1
+
+        try:
+            # Keep two tasks in flight per worker
+            for _ in range(self.workers * 2):
+                submit()
+
+            while pending:
+                if self.ordered:
+                    future = pending.popleft()
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    future = done.pop()
+                    pending.remove(future)
+
+                chunk = future.result()
+                submit()
+                yield chunk
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def generate_iter(
+        self,
+        count: int,
+        allow_duplicates: bool = False,
+        emitted_store: Optional["EmittedStore"] = None,
+        max_empty_chunks: int = 0,
+    ) -> Iterator[str]:
+        """
+        Generate strings across the pool as an iterator.
+
+        Args:
+            count: Number of strings to generate (0 = endless)
+            allow_duplicates: If True, skip the cross-worker dedupe stage
+            emitted_store: Optional persistent store of earlier output
+            max_empty_chunks: Stop after this many consecutive chunks add
+                              nothing new (0 = two per worker)
+
+        Yields:
+            Generated strings
+        """
+        if max_empty_chunks == 0:
+            max_empty_chunks = self.workers * 2
+
+        # Small runs should not pay for full-size chunks
+        size = self.chunk_size
+        if count:
+            size = min(size, max(1, -(-count // self.workers)))
+        produced = 0
+        empty = 0
+
+        for chunk in self._iter_chunks(size, allow_duplicates):
+            added = 0
+            for word in chunk:
+                if not allow_duplicates:
+                    if word in self._generated:
+                        continue
+                    if emitted_store is not None and not emitted_store.claim(word):
+                        continue
+                    self._generated.add(word)
+
+                yield word
+                added += 1
+                produced += 1
+                if produced == count:
+                    return
+
+            empty = 0 if added else empty + 1
+            if empty >= max_empty_chunks:
+                return
+
+    def generate(
+        self,
+        count: int,
+        allow_duplicates: bool = False,
+        emitted_store: Optional["EmittedStore"] = None,
+    ) -> List[str]:
+        """
+        Generate multiple strings across the pool.
+
+        Args:
+            count: Number of strings to generate
+            allow_duplicates: If True, skip the cross-worker dedupe stage
+            emitted_store: Optional persistent store of earlier output
+
+        Returns:
+            List of generated strings
+        """
+        return list(self.generate_iter(count, allow_duplicates, emitted_store))
+
+
+def _produce(
+    spec: tuple,
+    analysis: Optional[AnalysisResult],
+    shared_name: Optional[str],
+    seed: int,
+    exclude_original: bool,
+    original_words: Set[str],
+    lengths: Optional[List[int]],
+    chunk_size: int,
+    out: "multiprocessing.Queue",
+    stop: "multiprocessing.synchronize.Event",
+) -> None:
+    """Run one sub-generator, putting chunks on its queue until stopped."""
+    global _worker_segment
+    try:
+        if shared_name is not None:
+            _worker_segment, model = SharedModel.attach(shared_name)
+            analysis = model.to_analysis()
+        gen_class, _, kwargs = spec
+        gen = gen_class(analysis, seed=seed, exclude_original=exclude_original, **kwargs)
+        gen.set_original_words(original_words)
+        if lengths is not None:
+            gen.set_lengths(lengths)
+
+        while not stop.is_set():
+            chunk = gen.generate(chunk_size)
+            while not stop.is_set():
+                try:
+                    # An empty chunk tells the merger this producer is spent
+                    out.put(chunk, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            if not chunk:
+                return
+    except Exception as e:
+        out.put(e)
+
+
+class ConcurrentHybridGenerator:
+    """
+    Runs each hybrid sub-generator as its own producer process.
+
+    Every producer fills a bounded queue with chunks of new words. The
+    merger interleaves them by stride scheduling: each producer has a
+    pass value that advances by 1 / weight per word taken, and the word
+    comes from the lowest pass. A producer with nothing queued forfeits
+    its turn instead of stalling the rest, so a slow sub-generator (such
+    as regex or strict smart) only gets the share it can deliver and
+    never throttles the fast ones.
+
+    Each producer is seeded from the run seed and its slot, but the
+    interleaving depends on timing, so output order is not reproducible.
+    """
+
+    def __init__(
+        self,
+        generators: List[tuple],
+        analysis: AnalysisResult,
+        seed: Optional[int] = None,
+        chunk_size: int = 256,
+        queue_chunks: int = 4,
+        exclude_original: bool = True,
+        shared_model: bool = True,
+        lengths: Optional[Iterable[int]] = None,
+    ):
+        """
+        Initialize the concurrent hybrid.
+
+        Args:
+            generators: List of (GeneratorClass, weight, kwargs) tuples, as
+                        for HybridGenerator (classes must be picklable)
+            analysis: Analysis result from PatternAnalyzer
+            seed: Run seed (None picks a random one)
+            chunk_size: Words a producer generates per queue item
+            queue_chunks: Chunks each producer may have queued
+            exclude_original: If True, don't generate words from original set
+            shared_model: Publish the compiled model in shared memory once
+                          instead of pickling the analysis to every producer
+            lengths: Generate only words of these lengths (sub-generators
+                     that cannot produce any of them are left out)
+
+        Raises:
+            InsufficientDataError: If no sub-generator can produce the lengths
+        """
+        self.analysis = analysis
+        self.seed = seed if seed is not None else secrets.randbits(64)
+        self.chunk_size = max(1, chunk_size)
+        self.queue_chunks = max(1, queue_chunks)
+        self.exclude_original = exclude_original
+        self.shared_model = shared_model
+        self.lengths = sorted(set(lengths)) if lengths is not None else None
+        self._original_words: Set[str] = set()
+        self._generated: Set[str] = set()
+
+        # Fail here for lengths no sub-generator can produce, not in a producer
+        self.generators = []
+        error = None
+        for spec in generators:
+            gen_class, weight, kwargs = spec
+            if weight <= 0:
+                continue
+            if self.lengths is not None:
+                probe = gen_class(analysis, seed=0, exclude_original=exclude_original, **kwargs)
+                try:
+                    probe.set_lengths(self.lengths)
+                except InsufficientDataError as e:
+                    error = e
+                    continue
+            self.generators.append(spec)
+        if not self.generators:
+            raise error or ValueError("No sub-generator has a positive weight")
+
+    def set_original_words(self, words: Set[str]) -> None:
+        """Set the original wordlist for exclusion checking."""
+        self._original_words = words
+
+    def _iter_words(self) -> Iterator[str]:
+        """Start the producers and yield their words in weighted order."""
+        context = multiprocessing.get_context()
+        stop = context.Event()
+        queues = [context.Queue(self.queue_chunks) for _ in self.generators]
+
+        shared = None
+        analysis: Optional[AnalysisResult] = self.analysis
+        if self.shared_model:
+            shared = SharedModel(CompiledModel.from_analysis(self.analysis))
+            analysis = None
+
+        producers = [
+            context.Process(
+                target=_produce,
+                args=(
+                    spec,
+                    analysis,
+                    shared.name if shared else None,
+                    derive_seed(self.seed, slot),
+                    self.exclude_original,
+                    self._original_words,
+                    self.lengths,
+                    self.chunk_size,
+                    out,
+                    stop,
+                ),
+                daemon=True,
+            )
+            for slot, (spec, out) in enumerate(zip(self.generators, queues))
+        ]
+
+        try:
+            for producer in producers:
+                producer.start()
+            yield from self._merge(queues, producers)
+        finally:
+            stop.set()
+            for out in queues:
+                # Unblock producers waiting on a full queue
+                while True:
+                    try:
+                        out.get_nowait()
+                    except queue.Empty:
+                        break
+            for producer in producers:
+                producer.join(timeout=1)
+                if producer.is_alive():
+                    producer.terminate()
+            for out in queues:
+                out.close()
+                out.cancel_join_thread()
+            if shared is not None:
+                shared.close()
+
+    def _merge(
+        self,
+        queues: List["multiprocessing.Queue"],
+        producers: List["multiprocessing.Process"],
+    ) -> Iterator[str]:
+        """Stride-schedule words out of the producer queues."""
+        strides = [1.0 / weight for _, weight, _ in self.generators]
+        passes = [0.0] * len(queues)
+        buffers: List[Deque[str]] = [deque() for _ in queues]
+        live = set(range(len(queues)))
+
+        def refill(slot: int, timeout: Optional[float] = None) -> None:
+            try:
+                chunk = queues[slot].get(timeout=timeout) if timeout else queues[slot].get_nowait()
+            except queue.Empty:
+                return
+            if isinstance(chunk, Exception):
+                raise chunk
+            if not chunk:
+                live.discard(slot)
+            buffers[slot].extend(chunk)
+
+        while live or any(buffers):
+            order = sorted(range(len(queues)), key=lambda slot: passes[slot])
+            for slot in order:
+                if not buffers[slot] and slot in live:
+                    refill(slot)
+                if buffers[slot]:
+                    break
+            else:
+                # Nothing queued anywhere: wait on the next producer in line
+                waiting = [slot for slot in order if slot in live]
+                if waiting:
+                    refill(waiting[0], timeout=0.05)
+                for slot in waiting:
+                    if not producers[slot].is_alive() and not buffers[slot]:
+                        # Died without a final chunk; take what it left
+                        refill(slot)
+                        if not buffers[slot]:
+                            live.discard(slot)
+                continue
+
+            # Producers ahead of this one forfeit the turn they could not take
+            for skipped in order[:order.index(slot)]:
+                passes[skipped] = passes[slot]
+            passes[slot] += strides[slot]
+            yield buffers[slot].popleft()
+
+    def generate_iter(
+        self,
+        count: int,
+        allow_duplicates: bool = False,
+        emitted_store: Optional["EmittedStore"] = None,
+    ) -> Iterator[str]:
+        """
+        Generate strings from all producers as an iterator.
+
+        Args:
+            count: Number of strings to generate (0 = until every
+                   producer is spent or the consumer stops)
+            allow_duplicates: If True, skip the cross-producer dedupe stage
+            emitted_store: Optional persistent store of earlier output
+
+        Yields:
+            Generated strings
+        """
+        produced = 0
+        for word in self._iter_words():
+            if not allow_duplicates:
+                if word in self._generated:
+                    continue
+                if emitted_store is not None and not emitted_store.claim(word):
+                    continue
+                self._generated.add(word)
+
+            yield word
+            produced += 1
+            if produced == count:
+                return
+
+    def generate(
+        self,
+        count: int,
+        allow_duplicates: bool = False,
+        emitted_store: Optional["EmittedStore"] = None,
+    ) -> List[str]:
+        """
+        Generate multiple strings from all producers.
+
+        Args:
+            count: Number of strings to generate
+            allow_duplicates: If True, skip the cross-producer dedupe stage
+            emitted_store: Optional persistent store of earlier output
+
+        Returns:
+            List of generated strings
+        """
+        return list(self.generate_iter(count, allow_duplicates, emitted_store))
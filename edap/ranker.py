@@ -0,0 +1,269 @@
+"""
+Re-ranking of external wordlists by model probability.
+
+Every line of a wordlist is scored with a generator's log_prob() and the
+list is written back in descending probability. Lists far larger than
+memory are handled by an external merge sort: the file is cut into
+byte ranges at line boundaries, a process pool scores and sorts each
+range into a run file, and the runs are merged (in parallel passes of
+at most fan_in runs, then one streaming pass) into the output.
+
+Ties keep their input order: each run is sorted stably and runs are
+always merged in file order. Undecodable bytes are carried through as
+surrogate escapes, so every line comes out byte for byte as it went in
+once written back with errors="surrogateescape".
+"""
+
+import heapq
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Generator, List, Literal, Optional, TextIO, Tuple, Union
+
+from edap.generators.base import BaseGenerator
+from edap.models import AnalysisResult
+
+ScorerFactory = Callable[..., BaseGenerator]
+
+# Per-process scorer, built once by the pool initializer
+_worker_scorer: Optional[BaseGenerator] = None
+
+
+def _init_worker(factory: ScorerFactory, analysis: AnalysisResult) -> None:
+    """Build the scorer once per worker process."""
+    global _worker_scorer
+    _worker_scorer = factory(analysis, seed=0, exclude_original=False)
+
+
+def _run_key(line: str) -> float:
+    """Merge key of a run line: its negated score, so the best comes first."""
+    return -float(line[:line.index("\t")])
+
+
+def _open_run(path: str, mode: Literal["r", "w"] = "r") -> TextIO:
+    """Open a run file, keeping undecodable input bytes as surrogate escapes."""
+    return open(path, mode, encoding="utf-8", errors="surrogateescape", newline="\n")
+
+
+def _read_range(source: str, start: int, end: int, encoding: str) -> List[str]:
+    """The non-empty lines in a byte range of a file."""
+    with open(source, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    lines = data.decode(encoding, errors="surrogateescape").split("\n")
+    return [line.rstrip("\r") for line in lines if line.rstrip("\r")]
+
+
+def _write_run(
+    scorer: BaseGenerator,
+    lines: List[str],
+    path: str,
+    min_logprob: Optional[float],
+) -> Tuple[int, int]:
+    """Score lines and write them to a run file, most probable first."""
+    scored = []
+    dropped = 0
+    log_prob = scorer.log_prob
+    for line in lines:
+        score = log_prob(line)
+        if min_logprob is not None and score < min_logprob:
+            dropped += 1
+            continue
+        scored.append((score, line))
+    # Stable, so equal scores keep their input order
+    scored.sort(key=lambda item: -item[0])
+
+    with _open_run(path, "w") as f:
+        f.writelines(f"{score!r}\t{line}\n" for score, line in scored)
+    return len(scored), dropped
+
+
+def _sort_range(
+    source: str,
+    start: int,
+    end: int,
+    encoding: str,
+    path: str,
+    min_logprob: Optional[float],
+) -> Tuple[int, int]:
+    """Score and sort one byte range into a run file (in a worker process)."""
+    assert _worker_scorer is not None  # set by _init_worker
+    return _write_run(_worker_scorer, _read_range(source, start, end, encoding), path, min_logprob)
+
+
+def _merge_runs(paths: List[str], path: str) -> None:
+    """Merge sorted run files into one, deleting the inputs."""
+    files = [_open_run(p) for p in paths]
+    try:
+        with _open_run(path, "w") as out:
+            out.writelines(heapq.merge(*files, key=_run_key))
+    finally:
+        for f in files:
+            f.close()
+    for p in paths:
+        os.remove(p)
+
+
+class Ranker:
+    """
+    Sorts a wordlist by model probability with bounded memory.
+
+    Memory is bounded by chunk_bytes per worker during the sort and by
+    one buffered line per run during the merges; everything else lives
+    in temporary run files.
+    """
+
+    def __init__(
+        self,
+        factory: ScorerFactory,
+        analysis: AnalysisResult,
+        workers: int = 1,
+        chunk_bytes: int = 16 << 20,
+        fan_in: int = 64,
+        min_logprob: Optional[float] = None,
+        tmp_dir: Optional[Union[str, Path]] = None,
+    ):
+        """
+        Initialize the ranker.
+
+        Args:
+            factory: Picklable callable building the scoring generator,
+                     called as factory(analysis, seed=..., exclude_original=...)
+            analysis: Analysis result the model is learned from
+            workers: Processes scoring, sorting and merging runs (1 = in process)
+            chunk_bytes: Bytes of input per sorted run
+            fan_in: Most runs merged at once
+            min_logprob: Drop lines scoring below this
+            tmp_dir: Directory for run files (default: the system temp dir)
+
+        Raises:
+            ValueError: If workers < 1, chunk_bytes < 1 or fan_in < 2
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if chunk_bytes < 1:
+            raise ValueError("chunk_bytes must be positive")
+        if fan_in < 2:
+            raise ValueError("fan_in must be at least 2")
+
+        self.factory = factory
+        self.analysis = analysis
+        self.workers = workers
+        self.chunk_bytes = chunk_bytes
+        self.fan_in = fan_in
+        self.min_logprob = min_logprob
+        self.tmp_dir = tmp_dir
+
+        # Totals of the last rank() run
+        self.lines = 0
+        self.dropped = 0
+        self.runs = 0
+
+    def split(self, source: Union[str, Path]) -> List[Tuple[int, int]]:
+        """
+        Cut a file into byte ranges of about chunk_bytes, at line ends.
+
+        Returns:
+            (start, end) byte offsets covering the file
+        """
+        size = os.path.getsize(source)
+        ranges = []
+        start = 0
+        with open(source, "rb") as f:
+            while start < size:
+                end = start + self.chunk_bytes
+                if end < size:
+                    f.seek(end)
+                    f.readline()
+                    end = f.tell()
+                else:
+                    end = size
+                ranges.append((start, end))
+                start = end
+        return ranges
+
+    def rank(
+        self,
+        source: Union[str, Path],
+        encoding: str = "utf-8",
+    ) -> Generator[Tuple[str, float], None, None]:
+        """
+        Score every line of a file and yield them in descending probability.
+
+        Run files are removed when the iterator is exhausted or closed.
+
+        Args:
+            source: Wordlist to rank (one candidate per line; empty lines
+                    are skipped, undecodable bytes kept as surrogate escapes)
+            encoding: Encoding of the wordlist
+
+        Yields:
+            (line, log probability) pairs, most probable first
+        """
+        source = str(source)
+        self.lines = self.dropped = self.runs = 0
+        tmp = tempfile.mkdtemp(prefix="edap-rank-", dir=self.tmp_dir)
+        pool = None
+        try:
+            ranges = self.split(source)
+            paths = [os.path.join(tmp, f"run-{i}") for i in range(len(ranges))]
+
+            if self.workers > 1:
+                pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=_init_worker,
+                    initargs=(self.factory, self.analysis),
+                )
+                # Tasks carry only offsets; each worker reads its own range
+                n = len(ranges)
+                results = pool.map(
+                    _sort_range,
+                    [source] * n,
+                    [start for start, _ in ranges],
+                    [end for _, end in ranges],
+                    [encoding] * n,
+                    paths,
+                    [self.min_logprob] * n,
+                )
+            else:
+                scorer = self.factory(self.analysis, seed=0, exclude_original=False)
+                results = (
+                    _write_run(scorer, _read_range(source, start, end, encoding), path, self.min_logprob)
+                    for (start, end), path in zip(ranges, paths)
+                )
+            for kept, dropped in results:
+                self.lines += kept
+                self.dropped += dropped
+            self.runs = len(paths)
+
+            # Merge passes until one streaming merge can take every run
+            level = 0
+            while len(paths) > self.fan_in:
+                groups = [paths[i:i + self.fan_in] for i in range(0, len(paths), self.fan_in)]
+                merged = [os.path.join(tmp, f"merge-{level}-{i}") for i in range(len(groups))]
+                if pool is not None:
+                    list(pool.map(_merge_runs, groups, merged))
+                else:
+                    for group, path in zip(groups, merged):
+                        _merge_runs(group, path)
+                paths = merged
+                level += 1
+
+            if pool is not None:
+                pool.shutdown()
+                pool = None
+
+            files = [_open_run(p) for p in paths]
+            try:
+                for line in heapq.merge(*files, key=_run_key):
+                    score, _, word = line[:-1].partition("\t")
+                    yield word, float(score)
+            finally:
+                for f in files:
+                    f.close()
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            shutil.rmtree(tmp, ignore_errors=True)
@@ -0,0 +1,263 @@
+"""
+Persistent emitted-candidate store for EDAP.
+
+Keeps a record of every candidate emitted across runs so that repeated
+runs against the same model only produce new candidates.
+"""
+
+import hashlib
+import os
+import socket
+import sqlite3
+from pathlib import Path
+from types import TracebackType
+from typing import Iterable, Literal, Optional, Type, Union
+
+
+def _alive(pid: int) -> bool:
+    """Whether a process on this host is still running (assumed so off POSIX)."""
+    if os.name != "posix":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class EmittedStore:
+    """
+    Persistent set of already-emitted candidates backed by SQLite.
+
+    Candidates are stored as 16-byte BLAKE2b digests, so the database
+    size does not depend on candidate length and never holds plaintext.
+    Claims check and insert inside a write transaction, so two runs
+    sharing the same store can never both emit the same candidate.
+
+    Write transactions are short: at most batch_size claims, committed
+    by flush(). A caller writing the candidates somewhere should open
+    the store with deferred=True, flush() a batch of claims before
+    writing it and confirm() once it has reached its output. Deferred
+    claims are recorded as pending under the run that made them; they
+    block other runs from the candidate at once but only become
+    permanent when confirmed. Pending claims that are never confirmed
+    (close(commit=False) after an error, or a run that died) are
+    released, so those candidates are emitted again by a later run
+    instead of being lost.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        batch_size: int = 1000,
+        timeout: float = 60.0,
+        deferred: bool = False,
+    ):
+        """
+        Open (or create) an emitted store.
+
+        Args:
+            path: SQLite database file
+            batch_size: Claims per write transaction before committing
+            timeout: Seconds to wait for another run's write lock
+            deferred: Keep claims pending until confirm() instead of
+                      making them permanent when committed
+        """
+        self.path = Path(path)
+        self.batch_size = max(1, batch_size)
+        self.deferred = deferred
+        self._pending = 0
+        self._run: Optional[int] = None
+        self._closed = False
+
+        self._conn = sqlite3.connect(
+            str(self.path),
+            timeout=timeout,
+            isolation_level=None,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS emitted "
+            "(digest BLOB PRIMARY KEY) WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pending "
+            "(digest BLOB PRIMARY KEY, run INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs "
+            "(id INTEGER PRIMARY KEY, host TEXT NOT NULL, pid INTEGER NOT NULL)"
+        )
+        if deferred:
+            self._register()
+
+    def _register(self) -> None:
+        """Release pending claims of dead runs on this host and record this run."""
+        host = socket.gethostname()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self._conn.execute(
+                "SELECT id, pid FROM runs WHERE host = ?", (host,)
+            ).fetchall()
+            for run, pid in rows:
+                if not _alive(pid):
+                    self._conn.execute("DELETE FROM pending WHERE run = ?", (run,))
+                    self._conn.execute("DELETE FROM runs WHERE id = ?", (run,))
+            cursor = self._conn.execute(
+                "INSERT INTO runs (host, pid) VALUES (?, ?)", (host, os.getpid())
+            )
+            self._run = cursor.lastrowid
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _digest(word: str) -> bytes:
+        """Hash a candidate to its storage key."""
+        return hashlib.blake2b(
+            word.encode("utf-8", "surrogatepass"), digest_size=16
+        ).digest()
+
+    def _begin(self) -> None:
+        """Open a write transaction if one is not already open."""
+        if not self._conn.in_transaction:
+            self._conn.execute("BEGIN IMMEDIATE")
+
+    def _tick(self) -> None:
+        """Commit once the current batch is full."""
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.flush()
+
+    def claim(self, word: str) -> bool:
+        """
+        Atomically record a candidate.
+
+        Args:
+            word: Candidate to record
+
+        Returns:
+            True if the candidate was new, False if it was already emitted
+            or is pending in another run
+        """
+        digest = self._digest(word)
+        self._begin()
+        # Taken if already emitted, or pending in any run
+        taken = self._conn.execute(
+            "SELECT 1 FROM emitted WHERE digest = ? "
+            "UNION ALL SELECT 1 FROM pending WHERE digest = ?",
+            (digest, digest),
+        ).fetchone() is not None
+        new = False
+        if not taken:
+            if self.deferred:
+                self._conn.execute(
+                    "INSERT INTO pending (digest, run) VALUES (?, ?)", (digest, self._run)
+                )
+            else:
+                self._conn.execute("INSERT INTO emitted (digest) VALUES (?)", (digest,))
+            new = True
+        self._tick()
+        return new
+
+    def add_many(self, words: Iterable[str]) -> int:
+        """
+        Record many candidates (e.g. a wordlist emitted by another tool).
+
+        Returns:
+            Number of candidates that were new
+        """
+        added = 0
+        for word in words:
+            if self.claim(word):
+                added += 1
+        self.flush()
+        self.confirm()
+        return added
+
+    def __contains__(self, word: str) -> bool:
+        digest = self._digest(word)
+        row = self._conn.execute(
+            "SELECT 1 FROM emitted WHERE digest = ? "
+            "UNION ALL SELECT 1 FROM pending WHERE digest = ?",
+            (digest, digest),
+        ).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        """Number of permanently recorded candidates (pending claims excluded)."""
+        count: int = self._conn.execute("SELECT COUNT(*) FROM emitted").fetchone()[0]
+        return count
+
+    def flush(self) -> None:
+        """Commit the current batch of claims and release the write lock."""
+        if self._conn.in_transaction:
+            self._conn.execute("COMMIT")
+        self._pending = 0
+
+    def confirm(self) -> None:
+        """Make this run's flushed pending claims permanent (deferred stores)."""
+        if self._run is None:
+            return
+        self.flush()
+        self._conn.execute("BEGIN IMMEDIATE")
+        self._conn.execute(
+            "INSERT OR IGNORE INTO emitted (digest) "
+            "SELECT digest FROM pending WHERE run = ?",
+            (self._run,),
+        )
+        self._conn.execute("DELETE FROM pending WHERE run = ?", (self._run,))
+        self._conn.execute("COMMIT")
+
+    def rollback(self) -> None:
+        """Discard unconfirmed claims, e.g. when their output was not written."""
+        if self._conn.in_transaction:
+            self._conn.execute("ROLLBACK")
+        self._pending = 0
+        if self._run is not None:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("DELETE FROM pending WHERE run = ?", (self._run,))
+            self._conn.execute("COMMIT")
+
+    def close(self, commit: bool = True) -> None:
+        """
+        Close the database.
+
+        Pending claims that cannot be released (another run holds the
+        lock past the timeout) stay behind and are released by the next
+        deferred run on this host once this process has exited.
+
+        Args:
+            commit: Commit and confirm pending claims first (otherwise
+                    they are discarded)
+        """
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if commit:
+                self.flush()
+                self.confirm()
+            else:
+                self.rollback()
+            if self._run is not None:
+                self._conn.execute("DELETE FROM runs WHERE id = ?", (self._run,))
+                self._run = None
+        finally:
+            self._conn.close()
+
+    def __enter__(self) -> "EmittedStore":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> Literal[False]:
+        self.close(commit=exc_type is None)
+        return False
@@ -167,6 +167,15 @@ class TestPatternAnalyzer:
         assert 'b' in cooc['a'][0][1]
         assert 'e' in cooc['a'][0][1]
 
+    def test_segment_grammar(self):
+        """Test that letter/digit/symbol runs are learned as a grammar."""
+        analyzer = PatternAnalyzer()
+        result = analyzer.analyze_words(['pass12!', 'word12!', 'abc'])
+
+        assert result.structures == {'L4D2S1': 2, 'L3': 1}
+        assert result.terminals['L4'] == {'pass': 1, 'word': 1}
+        assert result.terminals['D2'] == {'12': 2}
+
     def test_position_stats_per_length(self):
         """Test that position stats are tracked per length."""
         analyzer = PatternAnalyzer()
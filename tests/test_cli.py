@@ -1,10 +1,11 @@
 """Tests for EDAP CLI."""
 
+import json
 import pytest
 import tempfile
 from pathlib import Path
 
-from edap.cli import create_parser, main
+from edap.cli import BANNER, create_parser, main
 
 
 @pytest.fixture
@@ -54,6 +55,15 @@ class TestCLIParser:
 
         assert args.count == 50
 
+    def test_parser_length_list(self, sample_wordlist):
+        parser = create_parser()
+
+        args = parser.parse_args([str(sample_wordlist), '--length', '6,8-10'])
+        assert args.length == [6, 8, 9, 10]
+
+        with pytest.raises(SystemExit):
+            parser.parse_args([str(sample_wordlist), '--length', '9-8'])
+
     def test_parser_mode(self, sample_wordlist):
         parser = create_parser()
 
@@ -121,6 +131,13 @@ class TestCLIMain:
         lines = [l for l in captured.out.strip().split('\n') if l]
         assert len(lines) == 5
 
+    def test_banner_stays_out_of_candidates(self, sample_wordlist, capsys):
+        assert main([str(sample_wordlist), '-n', '5']) == 0
+
+        captured = capsys.readouterr()
+        assert len(captured.out.split()) == 5
+        assert BANNER.strip() in captured.err
+
     def test_main_analyze_only(self, sample_wordlist, capsys):
         result = main([
             str(sample_wordlist),
@@ -219,6 +236,216 @@ class TestCLIMain:
 
         assert result == 0
 
+    def test_main_excludes_input_words(self, sample_wordlist, capsys):
+        result = main([
+            str(sample_wordlist),
+            '-n', '0',
+            '-m', 'random',
+            '--seed', '1',
+            '--no-banner',
+            '-q',
+        ])
+
+        assert result == 0
+        inputs = set(sample_wordlist.read_text().split())
+        assert not inputs & set(capsys.readouterr().out.split())
+
+    def test_main_markov_save_and_load(self, sample_wordlist, capsys):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            model = Path(tmpdir) / 'markov.json'
+            base = [str(sample_wordlist), '-n', '5', '-m', 'markov', '--order', '1',
+                    '--seed', '4', '--no-banner', '-q']
+
+            assert main(base + ['--save-markov-model', str(model)]) == 0
+            trained = capsys.readouterr().out
+            assert model.exists()
+
+            assert main(base + ['--markov-model', str(model)]) == 0
+            assert capsys.readouterr().out == trained
+
+    def test_main_markov_bad_model(self, sample_wordlist, capsys):
+        result = main([
+            str(sample_wordlist), '-m', 'markov', '--markov-model',
+            str(sample_wordlist), '--no-banner', '-q',
+        ])
+
+        assert result == 1
+
+    def test_main_markov_enumerate(self, sample_wordlist, capsys):
+        args = [str(sample_wordlist), '-n', '0', '-m', 'markov', '--order', '1',
+                '--enumerate', '--allow-duplicates', '--no-banner', '-q']
+
+        assert main(args) == 0
+        words = capsys.readouterr().out.split()
+        assert set(words) == set(sample_wordlist.read_text().split())
+        assert len(words) == len(set(words))
+
+        assert main(args[:3] + ['-m', 'regex', '--regex', 'a', '--enumerate',
+                                '--no-banner', '-q']) == 1
+
+    def test_main_permute_resume(self, sample_wordlist, capsys):
+        base = [str(sample_wordlist), '-m', 'pattern', '--permute', '--pattern', 'lll',
+                '--seed', '8', '--allow-duplicates', '--no-banner', '-q']
+
+        assert main(base + ['-n', '0']) == 0
+        full = capsys.readouterr().out.split()
+        assert len(full) == len(set(full)) == 27
+
+        assert main(base + ['-n', '0', '--skip', '5']) == 0
+        assert capsys.readouterr().out.split() == full[5:]
+
+        assert main(base[:1] + ['--permute', '--no-banner', '-q']) == 1
+
+    def test_main_explicit_pattern_unique(self, sample_wordlist, capsys):
+        base = [str(sample_wordlist), '-m', 'pattern', '--pattern', 'lll',
+                '--seed', '8', '--no-banner', '-q']
+
+        assert main(base + ['-n', '0']) == 0
+        words = capsys.readouterr().out.split()
+        assert len(words) == len(set(words)) == 27 - 3
+
+        assert main(base + ['-n', '40']) == 0
+        assert sorted(capsys.readouterr().out.split()) == sorted(words)
+
+    def test_main_quota(self, sample_wordlist, capsys):
+        base = [str(sample_wordlist), '-m', 'pattern', '--quota', '--seed', '2',
+                '--no-banner', '-q']
+
+        assert main(base + ['-n', '30']) == 0
+        words = capsys.readouterr().out.split()
+        assert len(words) == len(set(words)) == 30
+        assert sum(w.isupper() for w in words) == 6
+
+        assert main(base + ['-n', '0']) == 1
+        assert main(base + ['-n', '5', '--pattern', 'lll']) == 1
+
+    def test_main_mask(self, sample_wordlist, capsys):
+        base = [str(sample_wordlist), '--mask', '?1?d', '-1', 'ab',
+                '--no-banner', '-q']
+
+        assert main(base + ['-n', '0']) == 0
+        full = capsys.readouterr().out.split()
+        assert len(full) == 20
+        assert full[:2] == ['a0', 'a1']
+
+        assert main(base + ['-n', '0', '--skip', '1', '--stride', '2', '--limit', '5']) == 0
+        assert capsys.readouterr().out.split() == full[1:11:2]
+
+        assert main(base[:1] + ['--mask', '?l?u?d', '--mask-observed', '-n', '0',
+                                '--no-banner', '-q']) == 0
+        assert sorted(capsys.readouterr().out.split()) == [
+            'aB3', 'aE3', 'dB3', 'dE3', 'gB3', 'gE3']
+
+        assert main(base[:1] + ['--mask', '?z', '--no-banner', '-q']) == 1
+
+    def test_masks_subcommand(self, sample_wordlist, capsys):
+        assert main(['masks', str(sample_wordlist), '--budget', '2e4', '-q']) == 0
+        lines = capsys.readouterr().out.splitlines()
+
+        assert [line for line in lines if not line.startswith('#')] == ['?d?d?d', '?l?l?l']
+        assert '66.67%' in lines[1]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = Path(tmpdir) / 'attack.hcmask'
+            assert main(['masks', str(sample_wordlist), '--budget', '1e3',
+                         '--observed', '-o', str(output), '-q']) == 0
+            assert output.read_text().splitlines()[2:] == [
+                '123,?1?1?1', 'ABCDEF,?1?1?1', 'abcdefghi,?1?1?1']
+
+        with pytest.raises(SystemExit):
+            main(['masks', str(sample_wordlist), '--budget', 'lots'])
+
+    def test_rank_subcommand(self, sample_wordlist, capsys):
+        assert main(['rank', str(sample_wordlist), str(sample_wordlist),
+                     '-f', 'jsonl', '--with-prob', '-q']) == 0
+        rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        scores = [row['logprob'] for row in rows]
+
+        assert sorted(row['value'] for row in rows) == sorted(sample_wordlist.read_text().split())
+        assert scores == sorted(scores, reverse=True)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = Path(tmpdir) / 'ranked.txt'
+            assert main(['rank', str(sample_wordlist), str(sample_wordlist), '-m', 'pattern',
+                         '--workers', '2', '--chunk-mb', '0.00001', '-o', str(output), '-q']) == 0
+            assert len(output.read_text().splitlines()) == len(rows)
+
+        assert main(['rank', str(sample_wordlist), str(sample_wordlist), '--with-prob']) == 1
+
+    def test_rank_keeps_undecodable_bytes(self, sample_wordlist, tmp_path, capsysbinary):
+        lines = [b'abc\xff\xfedef', 'caf\u00e9'.encode('latin-1'), b'password1']
+        candidates = tmp_path / 'latin1.txt'
+        candidates.write_bytes(b'\n'.join(lines) + b'\n')
+        output = tmp_path / 'ranked.txt'
+
+        assert main(['rank', str(sample_wordlist), str(candidates), '-o', str(output), '-q']) == 0
+        assert sorted(output.read_bytes().splitlines()) == sorted(lines)
+
+        assert main(['rank', str(sample_wordlist), str(candidates), '-q']) == 0
+        assert sorted(capsysbinary.readouterr().out.splitlines()) == sorted(lines)
+
+    def test_main_hybrid_preset(self, sample_wordlist, capsys):
+        result = main([
+            str(sample_wordlist),
+            '-n', '5',
+            '-m', 'hybrid',
+            '--preset', 'strict',
+            '--seed', '42',
+            '--no-banner',
+            '-q',
+        ])
+
+        assert result == 0
+        assert capsys.readouterr().out.split()
+
+    def test_main_hybrid_adaptive(self, sample_wordlist, capsys):
+        base = [str(sample_wordlist), '-n', '20', '-m', 'hybrid', '--adaptive',
+                '--weight-bounds', '0.5,2', '--no-banner', '-q']
+
+        assert main(base) == 0
+        assert len(set(capsys.readouterr().out.split())) == 20
+
+        assert main(base + ['--concurrent']) == 1
+        # Timing-dependent weights cannot give reproducible output
+        assert main(base + ['--seed', '1']) == 1
+        assert main(base + ['--counter']) == 1
+        assert main(base + ['--workers', '2']) == 1
+        with pytest.raises(SystemExit):
+            main(base + ['--weight-bounds', '2,4'])
+
+    def test_main_with_guess(self, sample_wordlist, capsys):
+        base = [str(sample_wordlist), '-n', '5', '-m', 'random', '--enumerate',
+                '--no-banner', '-q']
+
+        assert main(base + ['-f', 'jsonl', '--with-prob', '--with-guess']) == 0
+        rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [row['guess'] for row in rows] == [1, 2, 3, 4, 5]
+        scores = [row['logprob'] for row in rows]
+        assert scores == sorted(scores, reverse=True)
+
+        assert main(base + ['-f', 'csv', '--with-guess']) == 0
+        assert capsys.readouterr().out.splitlines()[0] == 'value,guess'
+
+        sampled = [arg for arg in base if arg != '--enumerate']
+        assert main(sampled + ['-f', 'csv', '--with-guess']) == 1
+        assert main(base + ['--with-guess']) == 1
+
+    def test_main_with_prob(self, sample_wordlist, capsys):
+        base = [str(sample_wordlist), '-n', '10', '-m', 'pattern', '--seed', '1',
+                '--no-banner', '-q']
+
+        assert main(base + ['-f', 'jsonl', '--with-prob']) == 0
+        rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert len(rows) == 10
+        assert all(row['logprob'] <= 0 for row in rows)
+
+        cutoff = sorted(row['logprob'] for row in rows)[5]
+        assert main(base + ['-f', 'jsonl', '--with-prob', f'--min-logprob={cutoff}']) == 0
+        rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert rows and all(row['logprob'] >= cutoff for row in rows)
+
+        assert main(base + ['--with-prob']) == 1
+
     def test_main_show_stats(self, sample_wordlist, capsys):
         result = main([
             str(sample_wordlist),
@@ -254,3 +481,52 @@ class TestCLIMain:
         captured2 = capsys.readouterr()
 
         assert captured1.out == captured2.out
+
+    def test_main_counter_resume(self, sample_wordlist, capsys):
+        base = [str(sample_wordlist), '-m', 'random', '--counter',
+                '--seed', '3', '--allow-duplicates', '--no-banner', '-q']
+
+        main(base + ['-n', '6'])
+        full = capsys.readouterr().out.split()
+        main(base + ['-n', '3', '--skip', '3'])
+        tail = capsys.readouterr().out.split()
+
+        assert full[3:] == tail
+
+        assert main(base + ['-n', '6', '--workers', '2']) == 1
+        assert capsys.readouterr().out == ''
+
+    def test_main_endless_stops_when_saturated(self, sample_wordlist, capsys):
+        result = main([
+            str(sample_wordlist),
+            '-n', '0',
+            '-m', 'pattern',
+            '--seed', '1',
+            '--no-banner',
+            '-q',
+        ])
+
+        assert result == 0
+        lines = capsys.readouterr().out.split()
+        assert lines
+        assert len(lines) == len(set(lines))
+
+    def test_main_streams_to_closed_pipe(self, sample_wordlist, monkeypatch):
+        class ClosedPipe:
+            def write(self, text):
+                raise BrokenPipeError
+
+            def flush(self):
+                pass
+
+        monkeypatch.setattr('sys.stdout', ClosedPipe())
+
+        result = main([
+            str(sample_wordlist),
+            '-n', '0',
+            '--no-dedupe',
+            '--no-banner',
+            '-q',
+        ])
+
+        assert result == 0
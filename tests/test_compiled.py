@@ -0,0 +1,124 @@
+"""Tests for the compiled model."""
+
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from edap.analyzer import PatternAnalyzer
+from edap.compiled import CompiledModel, SharedModel
+from edap.generators import PCFGGenerator, RandomGenerator, SmartGenerator
+from edap.generators.constraints import CooccurrenceBits
+from edap.parallel import ParallelGenerator
+
+
+@pytest.fixture
+def analysis():
+    """Analysis result for testing."""
+    words = [
+        "password", "Password1", "admin123", "Admin@2024",
+        "test", "Test123!", "hello", "Hello123",
+    ]
+    return PatternAnalyzer().analyze_words(words)
+
+
+def _plain_cooccurrence(cooc):
+    return {
+        char: {pos: {t: set(chars) for t, chars in targets.items()}
+               for pos, targets in pos_data.items()}
+        for char, pos_data in cooc.items()
+    }
+
+
+class TestCompiledModel:
+    """Tests for CompiledModel."""
+
+    def test_round_trip(self, analysis):
+        restored = CompiledModel.from_analysis(analysis).to_analysis()
+
+        assert restored.charset == analysis.charset
+        assert restored.total_words == analysis.total_words
+        assert restored.global_char_frequency == analysis.global_char_frequency
+        assert restored.structures == analysis.structures
+        assert restored.terminals == analysis.terminals
+        for length, ls in analysis.length_stats.items():
+            other = restored.length_stats[length]
+            assert other.count == ls.count
+            assert other.patterns == ls.patterns
+            for pos, ps in ls.positions.items():
+                assert other.positions[pos].char_counts == ps.char_counts
+                assert other.positions[pos].type_counts == ps.type_counts
+
+    def test_cooccurrence_view(self, analysis):
+        view = CompiledModel.from_analysis(analysis).to_analysis().cooccurrence
+
+        assert _plain_cooccurrence(view) == analysis.cooccurrence
+        assert 'p' in view and 0 in view['p'] and 1 in view['p'][0]
+        assert 'Z' not in view
+
+    @pytest.mark.parametrize('wide', [False, True])
+    def test_cooccurrence_bits_from_tables(self, analysis, wide):
+        if wide:
+            # Past 64 chars every mask spans two table words
+            analysis = PatternAnalyzer().analyze_words(
+                [chr(c) * 3 + chr(c + 1) for c in range(33, 120)]
+            )
+        restored = CompiledModel.from_analysis(analysis).to_analysis()
+
+        assert CooccurrenceBits(restored).rows == CooccurrenceBits(analysis).rows
+
+    def test_grammar_stays_out_of_the_header(self, analysis):
+        model = CompiledModel.from_analysis(analysis)
+        restored = model.to_analysis()
+
+        assert 'structures' not in model.header and 'terminals' not in model.header
+        gen = PCFGGenerator(restored, exclude_original=False)
+        reference = PCFGGenerator(analysis, exclude_original=False)
+        for word in ['password', 'Admin@2024', 'hello123']:
+            assert gen.log_prob(word) == reference.log_prob(word)
+
+    def test_tables(self, analysis):
+        model = CompiledModel.from_analysis(analysis)
+
+        assert model.length_weights()[8] == analysis.length_stats[8].count
+        counts = model.position_counts(8, 0)
+        assert counts[model.index['p']] == 1
+        assert model.patterns(4) == [('llll', 1)]
+
+    def test_save_and_mmap_load(self, analysis):
+        model = CompiledModel.from_analysis(analysis)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / 'model.edapc'
+            model.save(path)
+            loaded = CompiledModel.load(path)
+
+            assert loaded.length_weights() == model.length_weights()
+            assert _plain_cooccurrence(loaded.to_analysis().cooccurrence) == \
+                analysis.cooccurrence
+            loaded.release()
+
+    def test_rejects_garbage(self):
+        with pytest.raises(ValueError):
+            CompiledModel.from_buffer(b'not a model at all')
+
+    def test_shared_memory_attach(self, analysis):
+        with SharedModel(CompiledModel.from_analysis(analysis)) as shared:
+            segment, model = SharedModel.attach(shared.name)
+            try:
+                assert model.length_weights() == shared.model.length_weights()
+                gen = SmartGenerator(model.to_analysis(), seed=1)
+                assert len(gen.generate(5)) == 5
+            finally:
+                model.release()
+                segment.close()
+
+    def test_parallel_with_and_without_shared_model(self, analysis):
+        shared = ParallelGenerator(
+            RandomGenerator, analysis, workers=2, seed=1, shared_model=True,
+        ).generate(30)
+        pickled = ParallelGenerator(
+            RandomGenerator, analysis, workers=2, seed=1, shared_model=False,
+        ).generate(30)
+
+        assert len(set(shared)) == 30
+        assert len(set(pickled)) == 30
@@ -1,5 +1,7 @@
 """Tests for EDAP exporters."""
 
+import io
+import itertools
 import json
 import pytest
 import tempfile
@@ -218,6 +220,82 @@ class TestResultExporter:
             filepath.unlink()
 
 
+class TestStreamingExport:
+    """Tests for streaming export."""
+
+    @pytest.mark.parametrize('fmt', ['text', 'json', 'csv', 'jsonl'])
+    def test_stream_matches_export(self, fmt):
+        data = ['alpha', 'beta', 'gamma']
+        exporter = ResultExporter(format=fmt)
+        stream = io.StringIO()
+
+        written = exporter.export_stream(iter(data), stream)
+
+        assert written == 3
+        assert stream.getvalue().strip() == exporter.export(data).strip()
+
+    def test_stream_json_empty(self):
+        stream = io.StringIO()
+        ResultExporter(format='json').export_stream(iter([]), stream)
+
+        assert json.loads(stream.getvalue()) == []
+
+    def test_stream_hashes_lazily(self):
+        exporter = ResultExporter(hash_algorithm='md5')
+        stream = io.StringIO()
+
+        def endless():
+            while True:
+                yield 'hello'
+
+        exporter.export_stream(itertools.islice(endless(), 2), stream)
+
+        assert stream.getvalue().split() == ['5d41402abc4b2a76b9719d911017c592'] * 2
+
+    def test_stream_with_prob(self):
+        data = [('alpha', -1.5), ('beta', float('-inf'))]
+
+        stream = io.StringIO()
+        assert ResultExporter(format='jsonl').export_stream(iter(data), stream, with_prob=True) == 2
+        assert [json.loads(line) for line in stream.getvalue().splitlines()] == [
+            {'value': 'alpha', 'logprob': -1.5},
+            {'value': 'beta', 'logprob': None},
+        ]
+
+        stream = io.StringIO()
+        ResultExporter(format='csv', hash_algorithm='md5').export_stream(iter(data[:1]), stream, with_prob=True)
+        header, row = stream.getvalue().splitlines()
+        assert header.split(',')[0] == 'value' and header.endswith(',logprob')
+        assert row.startswith(Hasher('md5').hash('alpha')) and row.endswith(',-1.5')
+
+        with pytest.raises(ValueError):
+            ResultExporter().export_stream(iter(data), io.StringIO(), with_prob=True)
+
+    def test_stream_with_guess(self):
+        stream = io.StringIO()
+        records = [('alpha', -1.5, 1), ('beta', -2.0, 2)]
+        ResultExporter(format='jsonl').export_stream(iter(records), stream, with_prob=True, with_guess=True)
+        assert [json.loads(line) for line in stream.getvalue().splitlines()] == [
+            {'value': 'alpha', 'logprob': -1.5, 'guess': 1},
+            {'value': 'beta', 'logprob': -2.0, 'guess': 2},
+        ]
+
+        stream = io.StringIO()
+        ResultExporter(format='csv').export_stream(iter([('alpha', 1)]), stream, with_guess=True)
+        assert stream.getvalue().splitlines() == ['value,guess', 'alpha,1']
+
+        with pytest.raises(ValueError):
+            ResultExporter(format='json').export_stream(iter(records), io.StringIO(), with_guess=True)
+
+    def test_stream_to_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / 'out.txt'
+            written = ResultExporter().export_stream_to_file(iter(['a', 'b']), path)
+
+            assert written == 2
+            assert path.read_text() == 'a\nb\n'
+
+
 class TestHashAlgorithm:
     """Tests for HashAlgorithm enum."""
 
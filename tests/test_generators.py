@@ -1,5 +1,9 @@
 """Tests for EDAP generators."""
 
+import itertools
+import math
+import random
+import string
 import pytest
 from collections import Counter
 
@@ -9,7 +13,12 @@ from edap.generators import (
     SmartGenerator,
     PatternGenerator,
     RegexGenerator,
+    RegexInferenceGenerator,
 )
+from edap.exceptions import InsufficientDataError
+from edap.generators import saturation
+from edap.generators.markov import MarkovGenerator
+from edap.generators.quotas import allocate_quotas
 from edap.models import CharType
 
 
@@ -80,6 +89,73 @@ class TestRandomGenerator:
         # Should generate words of different lengths
         assert len(lengths) > 1
 
+    def test_set_lengths(self, varied_length_analysis):
+        gen = RandomGenerator(varied_length_analysis, seed=42)
+        gen.set_lengths([2, 4])
+        words = gen.generate(20)
+
+        assert words
+        assert {len(w) for w in words} <= {2, 4}
+
+    def test_set_length_range(self, varied_length_analysis):
+        gen = RandomGenerator(varied_length_analysis, seed=42)
+        gen.set_length_range(3, 9)
+
+        assert {len(w) for w in gen.generate(20)} <= {3, 4}
+        with pytest.raises(ValueError):
+            gen.set_length_range(4, 3)
+
+    def test_set_lengths_unobserved(self, varied_length_analysis):
+        gen = RandomGenerator(varied_length_analysis, seed=42)
+
+        with pytest.raises(InsufficientDataError):
+            gen.set_lengths([7])
+
+    def test_generate_iter_endless_until_saturated(self, simple_analysis):
+        gen = RandomGenerator(simple_analysis, seed=42)
+        words = list(gen.generate_iter(0))
+
+        assert words
+        assert len(words) == len(set(words))
+
+    def test_generate_iter_without_dedupe(self, simple_analysis):
+        gen = RandomGenerator(simple_analysis, seed=42)
+        words = list(itertools.islice(gen.generate_iter(0, allow_duplicates=True), 5000))
+
+        assert len(words) == 5000
+        assert not gen._generated
+
+    def test_generate_top_exact_order(self):
+        analysis = PatternAnalyzer().analyze_words(['ab1', 'ac2', 'bb1', 'xy', 'xz', 'xy'])
+        gen = RandomGenerator(analysis, exclude_original=False)
+        words = list(gen.generate_top())
+
+        def log_prob(word):
+            ls = analysis.length_stats[len(word)]
+            p = math.log(ls.count / analysis.total_words)
+            for pos, char in enumerate(word):
+                counts = ls.positions[pos].char_counts
+                if len(counts) == 1:
+                    # Only 'x' was seen first in 2-char words: drawn from the charset
+                    p -= math.log(len(analysis.charset))
+                else:
+                    p += math.log(counts[char] / ls.count)
+            return p
+
+        scores = [log_prob(w) for w in words]
+        assert len(words) == len(set(words)) == 8 * 2 + 8
+        assert all(a >= b - 1e-12 for a, b in zip(scores, scores[1:]))
+        assert words[0] == 'ab1'
+        assert 'ay' in words
+
+    def test_generate_top_budget_and_lengths(self, varied_length_analysis):
+        gen = RandomGenerator(varied_length_analysis)
+        gen.set_lengths([3])
+
+        words = list(gen.generate_top(5))
+        assert len(words) == 5
+        assert all(len(w) == 3 for w in words)
+
     def test_exclude_original(self, simple_analysis):
         gen = RandomGenerator(simple_analysis, seed=42, exclude_original=True)
         gen.set_original_words({'abc', 'abd', 'abe'})
@@ -127,6 +203,51 @@ class TestSmartGenerator:
         weight_abc = gen.calculate_weight('abc')
         assert weight_abc > 0
 
+    def test_strict_chars_cooccur(self, simple_analysis):
+        gen = SmartGenerator(simple_analysis, seed=3)
+        cooc = simple_analysis.cooccurrence
+
+        words = [w for w in (gen.generate_one_strict() for _ in range(200)) if w]
+        assert words
+        for word in words:
+            for i, j in itertools.permutations(range(len(word)), 2):
+                assert word[j] in cooc[word[i]][i][j]
+
+    def test_strict_succeeds_on_sparse_data(self):
+        rng = random.Random(0)
+        words = [''.join(rng.choice(string.ascii_lowercase) for _ in range(8)) for _ in range(200)]
+        analysis = PatternAnalyzer().analyze_words(words)
+        cooc = analysis.cooccurrence
+        gen = SmartGenerator(analysis, seed=1)
+
+        results = [gen.generate_one_strict() for _ in range(100)]
+
+        assert all(results)
+        assert gen.attempts == 100
+        assert gen.acceptance_rate == 1.0
+        for word in results:
+            for i, j in itertools.permutations(range(8), 2):
+                assert word[j] in cooc[word[i]][i][j]
+
+    def test_fill_constrained_budget(self, simple_analysis):
+        gen = SmartGenerator(simple_analysis, seed=1)
+        bits = gen._get_bits()
+
+        assert gen._fill_constrained(bits.position_masks[3], bits.position_weights[3], 0) is None
+        assert gen.acceptance_rate == 0.0
+        assert gen._fill_constrained(bits.position_masks[3], bits.position_weights[3], 9)
+        assert gen.acceptance_rate == 0.5
+
+    def test_weighted_bit_draws_like_weighted_choice(self, simple_analysis):
+        weights = [5, 0, 3, 1, 0, 2]
+        mask = 0b101101
+        by_bit = SmartGenerator(simple_analysis, seed=9)
+        by_dict = SmartGenerator(simple_analysis, seed=9)
+
+        for _ in range(100):
+            expected = by_dict._weighted_choice({b: weights[b] for b in (0, 2, 3, 5)})
+            assert by_bit._weighted_bit(mask, weights) == expected
+
 
 class TestPatternGenerator:
     """Tests for PatternGenerator."""
@@ -159,6 +280,70 @@ class TestPatternGenerator:
         if word:
             assert word.islower() or all(c.islower() or c.isdigit() for c in word)
 
+    def test_generate_top_follows_patterns(self, simple_analysis):
+        gen = PatternGenerator(simple_analysis)
+        gen.set_original_words({'abc', 'ABC'})
+        words = list(gen.generate_top())
+        patterns = simple_analysis.length_stats[3].patterns
+
+        assert words
+        assert len(words) == len(set(words))
+        assert not set(words) & {'abc', 'ABC'}
+        for word in words:
+            assert ''.join(str(CharType.from_char(c)) for c in word) in patterns
+
+    def test_cooccurrence_is_a_preference(self):
+        analysis = PatternAnalyzer().analyze_words(['abc', 'def', 'ghi'])
+        gen = PatternGenerator(analysis, seed=2)
+
+        words = {gen.generate_from_explicit_pattern('lll') for _ in range(50)}
+
+        # Strict co-occurrence would only rebuild the input words
+        assert words - {'abc', 'def', 'ghi'}
+        assert gen.acceptance_rate == 1.0
+
+    def test_pattern_tables(self, simple_analysis):
+        gen = PatternGenerator(simple_analysis, seed=42)
+
+        assert gen._pattern_domains('lnl') is gen._pattern_domains('lnl')
+        assert gen._pattern_slots('lnl') == [['a'], ['1', '2', '3'], ['c', 'd', 'e']]
+        # Unseen lengths take every char of the type
+        assert gen._pattern_slots('Un') == [['A', 'B', 'C', 'D', 'E'], ['1', '2', '3']]
+        assert gen.generate_from_explicit_pattern('@ll') is None
+        with pytest.raises(ValueError):
+            gen.generate_from_explicit_pattern('lxl')
+
+    def test_generate_explicit_iter_unique(self, simple_analysis):
+        gen = PatternGenerator(simple_analysis, seed=42)
+        gen.set_original_words({'abc'})
+        size = gen.keyspace('lll').size
+
+        # Sampling well below the keyspace, enumeration near and at it
+        for count in (2, size - 1, 0):
+            gen = PatternGenerator(simple_analysis, seed=42)
+            gen.set_original_words({'abc'})
+            words = list(gen.generate_explicit_iter('lll', count))
+            assert len(words) == len(set(words)) == (count or size - 1)
+            assert 'abc' not in words
+
+        gen = PatternGenerator(simple_analysis, seed=42)
+        words = list(gen.generate_explicit_iter('lll', 20, allow_duplicates=True))
+        assert len(words) == 20
+
+    def test_generate_stratified(self, simple_analysis):
+        gen = PatternGenerator(simple_analysis, seed=42)
+        gen.set_original_words({'abc', 'ABC'})
+
+        assert gen.quota_strata() == {
+            (3, 'UUU'): (3, 3), (3, 'lll'): (3, 3), (3, 'lnl'): (3, 9)}
+        words = list(gen.generate_stratified(6))
+        patterns = Counter(''.join(str(CharType.from_char(c)) for c in w) for w in words)
+
+        assert len(words) == len(set(words)) == 6
+        assert patterns == {'UUU': 2, 'lll': 2, 'lnl': 2}
+        # Strata that run dry hand their quota to the rest
+        assert len(list(PatternGenerator(simple_analysis, seed=1).generate_stratified(50))) == 15
+
     def test_get_available_patterns(self, simple_analysis):
         gen = PatternGenerator(simple_analysis, seed=42)
 
@@ -229,6 +414,15 @@ class TestRegexGenerator:
             if word:
                 assert 2 <= len(word) <= 4
 
+    def test_set_lengths_filters_matches(self, simple_analysis):
+        gen = RegexGenerator(simple_analysis, r'[a-c]{2,5}', seed=42,
+                             use_learned_charset=False)
+        gen.set_lengths([3])
+
+        words = gen.generate(5)
+        assert words
+        assert all(len(w) == 3 for w in words)
+
     def test_generate_validated(self, simple_analysis):
         gen = RegexGenerator(
             simple_analysis,
@@ -295,3 +489,127 @@ class TestGeneratorWeight:
         weight_xyz = gen.calculate_weight('xyz')
 
         assert weight_abc > weight_xyz
+
+
+class TestLogProb:
+    """Tests for candidate scoring and the log-probability cutoff."""
+
+    @pytest.mark.parametrize('cls', [RandomGenerator, PatternGenerator])
+    def test_log_prob_matches_enumeration(self, cls, simple_analysis):
+        gen = cls(simple_analysis, exclude_original=False)
+
+        for word, log_prob in gen._enumerate_top():
+            assert math.isclose(gen.log_prob(word), log_prob, abs_tol=1e-12)
+        assert gen.log_prob('zzz') == -math.inf
+        assert gen.log_prob('abcd') == -math.inf
+
+    @pytest.mark.parametrize('cls,kwargs', [
+        (RandomGenerator, {}),
+        (SmartGenerator, {}),
+        (RegexGenerator, {'pattern': r'[a-c](xy|z)+\d?'}),
+        (RegexInferenceGenerator, {}),
+    ])
+    def test_generated_words_score_finite(self, cls, kwargs):
+        # A length seen once and positions seen with one char make the
+        # samplers draw from the whole charset
+        analysis = PatternAnalyzer().analyze_words(['ab1', 'ac2', 'bb1', 'xy', 'xz', 'q7x'])
+        gen = cls(analysis, seed=3, exclude_original=False, **kwargs)
+
+        words = gen.generate(40)
+        assert words
+        assert all(math.isfinite(gen.log_prob(w)) for w in words)
+
+    def test_regex_log_prob_matches_draws(self, simple_analysis):
+        gen = RegexGenerator(simple_analysis, r'(ab|c)\d?', use_learned_charset=False)
+
+        # Alternative a half, then no digit a half or one of ten digits
+        assert math.isclose(gen.log_prob('ab'), math.log(1 / 2 * 1 / 2))
+        assert math.isclose(gen.log_prob('c7'), math.log(1 / 2 * 1 / 2 * 1 / 10))
+        assert gen.log_prob('abc') == -math.inf
+
+    def test_pattern_log_prob(self, simple_analysis):
+        gen = PatternGenerator(simple_analysis)
+
+        # P(len 3) = 1, P(lll) = 3/9, then a of {a}, b of {b}, c of {c, d, e}
+        assert math.isclose(gen.log_prob('abc'), math.log(3 / 9 * 4 / 6))
+        assert gen.log_prob('Abc') == -math.inf
+
+    def test_min_logprob_cutoff(self, simple_analysis):
+        gen = PatternGenerator(simple_analysis, seed=42)
+        gen.set_min_logprob(-2.0)
+
+        words = gen.generate(50)
+        assert words
+        assert all(gen.log_prob(w) >= -2.0 for w in words)
+        assert all(gen.score(w) >= -2.0 for w in gen.generate_top())
+        assert len(list(gen.generate_top())) < len(list(PatternGenerator(simple_analysis).generate_top()))
+
+
+class TestSaturation:
+    """Tests for saturation-aware sampling."""
+
+    def test_generate_stops_when_exhausted(self, simple_analysis):
+        gen = RandomGenerator(simple_analysis, seed=42)
+        calls = []
+        generate_one = gen.generate_one
+        gen.generate_one = lambda: calls.append(1) or generate_one()
+
+        words = gen.generate(1000)
+
+        # Length 3 over an 11-char charset holds 1,331 words at most
+        assert len(words) == len(set(words))
+        assert len(calls) < 1000 * 100
+        report = gen.saturation
+        assert report.exhausted
+        assert report.remaining == 0
+        assert report.saturated == ['length 3']
+
+    def test_saturated_lengths_lose_weight(self):
+        rng = random.Random(0)
+        words = ['ab', 'ba'] * 50
+        words += [''.join(rng.choice(string.ascii_lowercase) for _ in range(6)) for _ in range(50)]
+        analysis = PatternAnalyzer().analyze_words(words)
+        gen = RandomGenerator(analysis, seed=1)
+
+        words = gen.generate(2000)
+
+        assert len(words) == 2000
+        assert gen.saturation.draws < 3000
+        assert 'length 2' in gen.saturation.saturated
+
+    def test_skewed_chain_is_not_cut_short(self, monkeypatch):
+        # A few common words and a long tail of rare recombinations
+        rng = random.Random(0)
+        bases = ['love', 'dragon', 'monkey', 'shadow', 'master', 'sun', 'star', 'blue']
+        suffixes = ['', '1', '12', '123', '!', '2020']
+        words = [
+            rng.choices(bases, weights=[8, 4, 3, 2, 2, 1, 1, 1])[0]
+            + rng.choices(suffixes, weights=[8, 4, 3, 3, 1, 1])[0]
+            for _ in range(2000)
+        ]
+        analysis = PatternAnalyzer().analyze_words(words)
+
+        gen = MarkovGenerator(analysis, seed=1)
+        stopped = gen.generate(300)
+        monkeypatch.setattr(saturation, 'PATIENCE', 10 ** 9)
+        spinning = MarkovGenerator(analysis, seed=1).generate(300)
+
+        # Stopping early must not give up words that more draws still find
+        assert len(stopped) == len(spinning) == 300
+        assert gen.saturation.remaining > 1
+
+
+class TestQuotas:
+    """Tests for quota allocation."""
+
+    def test_proportional_with_largest_remainder(self):
+        assert allocate_quotas(7, {'a': (1, 9), 'b': (1, 9), 'c': (1, 9)}) == {
+            'a': 3, 'b': 2, 'c': 2}
+        assert allocate_quotas(10, {'a': (5, 99), 'b': (3, 99), 'c': (2, 99)}) == {
+            'a': 5, 'b': 3, 'c': 2}
+
+    def test_caps_are_redistributed(self):
+        assert allocate_quotas(10, {'a': (5, 99), 'b': (3, 99), 'c': (2, 1)}) == {
+            'a': 6, 'b': 3, 'c': 1}
+        assert allocate_quotas(100, {'a': (1, 3), 'b': (1, 5), 'c': (0, 9)}) == {
+            'a': 3, 'b': 5}
@@ -0,0 +1,105 @@
+"""Tests for keyspaces and keyed permutations."""
+
+import pytest
+
+from edap.analyzer import PatternAnalyzer
+from edap.generators import PatternGenerator
+from edap.keyspace import FeistelPermutation, MixedRadixKeyspace, UnionKeyspace, permuted
+
+
+class TestKeyspace:
+    """Tests for MixedRadixKeyspace and UnionKeyspace."""
+
+    def test_unrank_and_rank(self):
+        keyspace = MixedRadixKeyspace(['ab', '012'])
+
+        assert len(keyspace) == 6
+        words = [keyspace.unrank(i) for i in range(6)]
+        assert words == ['a0', 'a1', 'a2', 'b0', 'b1', 'b2']
+        assert [keyspace.rank(w) for w in words] == list(range(6))
+        assert keyspace.rank('c0') is None
+
+    def test_out_of_range(self):
+        with pytest.raises(IndexError):
+            MixedRadixKeyspace(['ab']).unrank(2)
+
+    def test_union(self):
+        keyspace = UnionKeyspace([MixedRadixKeyspace(['ab']), MixedRadixKeyspace(['x', 'yz'])])
+
+        assert len(keyspace) == 4
+        assert [keyspace.unrank(i) for i in range(4)] == ['a', 'b', 'xy', 'xz']
+
+    def test_union_beyond_maxsize(self):
+        printable = [chr(c) for c in range(32, 127)]
+        big = MixedRadixKeyspace([printable] * 10)
+        keyspace = UnionKeyspace([MixedRadixKeyspace(['ab']), big])
+
+        assert keyspace.size == 2 + 95 ** 10
+        assert keyspace.unrank(2) == ' ' * 10
+        assert keyspace.unrank(keyspace.size - 1) == '~' * 10
+
+
+class TestFeistelPermutation:
+    """Tests for FeistelPermutation."""
+
+    @pytest.mark.parametrize('size', [0, 1, 2, 3, 17, 1000, 4097])
+    def test_is_permutation(self, size):
+        permutation = FeistelPermutation(size, b'key')
+        assert sorted(permutation(i) for i in range(size)) == list(range(size))
+
+    def test_keyed(self):
+        first = [FeistelPermutation(1000, b'one')(i) for i in range(20)]
+        second = [FeistelPermutation(1000, b'two')(i) for i in range(20)]
+
+        assert first != second
+        assert first != list(range(20))
+
+    def test_permuted_split_covers_space(self):
+        keyspace = MixedRadixKeyspace(['abc', 'abc', '0123'])
+        shares = [
+            [w for _, w in permuted(keyspace, b'k', start=k, step=3)]
+            for k in range(3)
+        ]
+
+        words = [w for share in shares for w in share]
+        assert len(words) == len(keyspace)
+        assert len(set(words)) == len(keyspace)
+
+    def test_permuted_beyond_maxsize(self):
+        printable = [chr(c) for c in range(32, 127)]
+        keyspace = MixedRadixKeyspace([printable] * 10)
+
+        walked = list(permuted(keyspace, b'k', start=10, stop=20))
+        assert [index for index, _ in walked] == list(range(10, 20))
+        words = [word for _, word in walked]
+        assert len(set(words)) == 10
+        assert all(len(word) == 10 for word in words)
+        assert all(keyspace.rank(word) is not None for word in words)
+
+
+class TestPatternPermutation:
+    """Tests for PatternGenerator.generate_permuted."""
+
+    @pytest.fixture
+    def analysis(self):
+        return PatternAnalyzer().analyze_words(['ab1', 'cd2', 'Ef3', 'xy'])
+
+    def test_whole_keyspace_once(self, analysis):
+        gen = PatternGenerator(analysis, seed=1, exclude_original=False)
+        words = [w for _, w in gen.generate_permuted()]
+
+        assert len(words) == len(gen.keyspace())
+        assert len(set(words)) == len(words)
+        assert not gen._generated
+
+    def test_seeded_and_resumable(self, analysis):
+        words = [w for _, w in PatternGenerator(analysis, seed=5).generate_permuted('lln')]
+        tail = [w for _, w in PatternGenerator(analysis, seed=5).generate_permuted('lln', start=4)]
+
+        assert words[4:] == tail
+
+    def test_skips_input_words(self, analysis):
+        gen = PatternGenerator(analysis, seed=1)
+        gen.set_original_words({'ab1', 'cd2'})
+
+        assert not {'ab1', 'cd2'} & {w for _, w in gen.generate_permuted()}
@@ -0,0 +1,183 @@
+"""Tests for hashcat-style masks."""
+
+import itertools
+
+import pytest
+
+from edap.analyzer import PatternAnalyzer
+from edap.masks import (
+    BLOCK_SIZE,
+    Mask,
+    MaskCandidate,
+    parse_charset,
+    pattern_to_mask,
+    propose_masks,
+    select_masks,
+)
+
+
+class TestMaskParsing:
+    """Tests for mask and charset parsing."""
+
+    def test_builtin_charsets(self):
+        mask = Mask('?u?l?d?s?a')
+
+        assert [len(slot) for slot in mask.slots] == [26, 26, 10, 33, 95]
+        assert len(mask) == 26 * 26 * 10 * 33 * 95
+
+    def test_literals_and_escaped_question_mark(self):
+        mask = Mask('pw???d')
+
+        assert mask.slots[:3] == ['p', 'w', '?']
+        assert len(mask) == 10
+
+    def test_custom_charsets(self):
+        mask = Mask('?1?2', {1: '?dab', 2: 'xyx'})
+
+        assert mask.slots == ['0123456789ab', 'xy']
+        assert parse_charset('?h?H') == '0123456789abcdefABCDEF'
+
+    @pytest.mark.parametrize('bad', ['?', 'ab?', '?x', '?1'])
+    def test_malformed(self, bad):
+        with pytest.raises(ValueError):
+            Mask(bad)
+
+    def test_custom_charset_number(self):
+        with pytest.raises(ValueError):
+            Mask('?5', {5: 'ab'})
+
+    def test_from_pattern(self):
+        assert pattern_to_mask('Ulln@') == '?u?l?l?d?s'
+        assert str(Mask.from_pattern('Ulln@')) == '?u?l?l?d?s'
+
+
+class TestMaskEnumeration:
+    """Tests for keyspace enumeration."""
+
+    def test_matches_cartesian_product(self):
+        mask = Mask('?d?1?d', {1: 'abc'})
+        expected = [''.join(p) for p in itertools.product(*mask.slots)]
+
+        assert list(mask) == expected
+        assert [mask.keyspace.unrank(i) for i in range(len(mask))] == expected
+
+    @pytest.mark.parametrize('start,stop', [(0, 1), (5, 999), (999, 1000), (1234, 26000), (25999, None)])
+    def test_ranges(self, start, stop):
+        mask = Mask('?l?d?d?d')
+        expected = list(mask)
+
+        assert list(mask.candidates(start, stop)) == expected[start:stop]
+
+    def test_partitions_cover_keyspace(self):
+        mask = Mask('?l?l?l?d')
+        chunks = [list(mask.candidates(k, None, 3)) for k in range(3)]
+
+        assert sorted(itertools.chain(*chunks)) == sorted(mask)
+        assert chunks[1] == list(mask)[1::3]
+
+    @pytest.mark.parametrize('start,stop,step', [(0, None, 7), (5, 200000, 3), (1, None, 70001)])
+    def test_strides_match_unrank(self, start, stop, step):
+        mask = Mask('?d?l?l?l?d')
+        end = len(mask) if stop is None else stop
+        expected = [mask.keyspace.unrank(i) for i in range(start, end, step)]
+
+        assert list(mask.candidates(start, stop, step)) == expected
+
+    def test_blocks_are_bounded(self):
+        mask = Mask('?a?a?a')
+        blocks = list(mask.iter_blocks())
+
+        assert max(len(block) for block in blocks) <= BLOCK_SIZE
+        assert sum(len(block) for block in blocks) == len(mask)
+
+    def test_empty_ranges(self):
+        assert list(Mask('?d').candidates(10)) == []
+        assert list(Mask('?d').candidates(3, 3)) == []
+
+
+class TestObservedMask:
+    """Tests for restricting masks to observed characters."""
+
+    def test_restricted_to_positions(self):
+        analysis = PatternAnalyzer().analyze_words(['Ab1', 'Ab2', 'Cd1', 'Ab1'])
+        mask = Mask('?u?l?d').restricted(analysis)
+
+        assert mask.slots == ['AC', 'bd', '12']
+        assert len(mask) == 8
+        assert str(mask) == '?u?l?d'
+
+    def test_falls_back_to_charset(self):
+        analysis = PatternAnalyzer().analyze_words(['ab1', 'cd2'])
+        mask = Mask('?l?u?d').restricted(analysis)
+
+        # No uppercase anywhere: that position has nothing left
+        assert mask.slots[1] == ''
+        assert len(mask) == 0
+        assert list(mask) == []
+
+        mask = Mask('?d?l?d').restricted(analysis)
+        assert sorted(mask.slots[0]) == ['1', '2']
+
+
+class TestMaskSelection:
+    """Tests for budget-driven mask selection."""
+
+    @pytest.fixture
+    def analysis(self):
+        return PatternAnalyzer().analyze_words(
+            ['Pass12', 'Word34', 'abc1', 'abc2', 'abc,', 'xyz!'])
+
+    def test_ranked_by_efficiency(self, analysis):
+        candidates = propose_masks(analysis)
+
+        assert [c.mask for c in candidates] == ['?l?l?l?d', '?l?l?l?s', '?u?l?l?l?d?d']
+        assert candidates[0].count == 2
+        assert candidates[0].keyspace == 26 ** 3 * 10
+        assert candidates[0].efficiency == pytest.approx(2 / 175760)
+
+    def test_observed_charsets(self, analysis):
+        candidates = {c.mask: c for c in propose_masks(analysis, observed=True)}
+        words = candidates['?1?2?2?2?3?3']
+
+        assert words.custom_charsets == {1: 'PW', 2: 'adors', 3: '1234'}
+        assert words.keyspace == 2 * 5 ** 3 * 4 ** 2
+        assert words.to_hcmask() == 'PW,adors,1234,?1?2?2?2?3?3'
+
+    def test_hcmask_escapes(self):
+        candidate = MaskCandidate('?1?2', 1, 4, {1: 'a,', 2: '?b'})
+        assert candidate.to_hcmask() == 'a\\,,??b,?1?2'
+
+    def test_budget(self, analysis):
+        candidates = propose_masks(analysis)
+
+        assert select_masks(candidates, 10) == []
+        # The second mask no longer fits, the third still does not
+        assert [c.mask for c in select_masks(candidates, 200000)] == ['?l?l?l?d']
+        assert len(select_masks(candidates, 10 ** 9)) == 3
+
+    def test_budget_beats_greedy(self):
+        # Greedy takes the denser ?d and then has no room for ?l?l
+        candidates = [MaskCandidate('?d', 5, 10), MaskCandidate('?l?l', 300, 676)]
+        assert [c.mask for c in select_masks(candidates, 676)] == ['?l?l']
+
+    def test_budget_is_optimal(self):
+        candidates = [
+            MaskCandidate(f'?d{i}', count, keyspace)
+            for i, (count, keyspace) in enumerate(
+                [(60, 10), (100, 20), (120, 30), (90, 25), (35, 7), (50, 12)]
+            )
+        ]
+        best = max(
+            (
+                subset
+                for r in range(len(candidates) + 1)
+                for subset in itertools.combinations(candidates, r)
+                if sum(c.keyspace for c in subset) <= 50
+            ),
+            key=lambda subset: sum(c.count for c in subset),
+        )
+        chosen = select_masks(candidates, 50)
+        assert sum(c.keyspace for c in chosen) <= 50
+        assert sum(c.count for c in chosen) == sum(c.count for c in best)
+        # Stopping the search early still never does worse than one mask
+        assert sum(c.count for c in select_masks(candidates, 50, max_nodes=0)) >= 120
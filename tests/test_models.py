@@ -9,6 +9,7 @@ from edap.models import (
     LengthStats,
     WordAnalysis,
     AnalysisResult,
+    split_segments,
 )
 
 
@@ -211,3 +212,13 @@ class TestAnalysisResult:
 
         digits = result.get_charset_by_type(CharType.DIGIT)
         assert digits == {'1', '2'}
+
+
+class TestSplitSegments:
+    """Tests for PCFG segmentation."""
+
+    def test_mixed(self):
+        assert split_segments('Pass12!!') == [('L4', 'Pass'), ('D2', '12'), ('S2', '!!')]
+
+    def test_single_run(self):
+        assert split_segments('2024') == [('D4', '2024')]
@@ -1,6 +1,10 @@
 """Tests for new EDAP features."""
 
+import math
 import pytest
+import tempfile
+from pathlib import Path
+
 from edap import (
     PatternAnalyzer,
     MarkovGenerator,
@@ -74,6 +78,124 @@ class TestMarkovGenerator:
             word = gen.generate_one()
             assert word is not None
 
+    def test_backoff_from_analysis(self, analysis):
+        # Analysis-built transitions have 1-char contexts; order 2 must back off
+        gen = MarkovGenerator(analysis, seed=42, order=2)
+        words = gen.generate(10)
+
+        assert len(words) == 10
+        assert all(set(w) <= analysis.charset for w in words)
+
+    def test_train_on_file_and_model_round_trip(self, analysis, sample_words):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            wordlist = Path(tmpdir) / 'words.txt'
+            wordlist.write_text('\n'.join(sample_words + ['x' * 300]) + '\n')
+            model = Path(tmpdir) / 'markov.json'
+
+            gen = MarkovGenerator(analysis, seed=42, order=3)
+            assert gen.train_on_file(wordlist) == len(sample_words)
+            gen.save_model(model)
+
+            order, transitions = MarkovGenerator.load_model(model)
+            loaded = MarkovGenerator(analysis, seed=42, order=order, transitions=transitions)
+
+        trained = MarkovGenerator(analysis, seed=42, order=3)
+        trained.train_on_words(sample_words)
+        assert loaded.generate(10) == trained.generate(10)
+
+    def test_generate_ordered(self, analysis, sample_words):
+        gen = MarkovGenerator(analysis, order=2)
+        gen.train_on_words(sample_words)
+        gen.set_original_words(set(sample_words))
+
+        words = list(gen.generate_ordered(20))
+        assert len(words) == 20
+        assert len(set(words)) == 20
+        assert not set(words) & set(sample_words)
+        assert not gen._generated
+
+    def test_generate_ordered_most_likely_first(self):
+        analysis = PatternAnalyzer().analyze_words(['ab'])
+        gen = MarkovGenerator(analysis, order=1, exclude_original=False)
+        gen.train_on_words(['ab'] * 9 + ['ac'])
+
+        assert list(gen.generate_ordered()) == ['ab', 'ac']
+
+    def test_retrain_recompiles(self, analysis):
+        gen = MarkovGenerator(analysis, seed=42, order=1)
+        gen.train_on_words(['aaaa'])
+        assert set(gen.generate_one()) == {'a'}
+
+        gen.train_on_words(['bbbb'])
+        assert set(gen.generate_one()) == {'b'}
+
+    def test_exact_length(self, analysis, sample_words):
+        gen = MarkovGenerator(analysis, seed=42)
+        gen.train_on_words(sample_words)
+
+        for length in (4, 8, 9):
+            word = gen.generate_one_with_length(length)
+            assert word is not None
+            assert len(word) == length
+
+    def test_exact_length_impossible(self):
+        analysis = PatternAnalyzer().analyze_words(['abc', 'defg'])
+        gen = MarkovGenerator(analysis, seed=42)
+
+        assert gen.generate_one_with_length(5) is None
+        assert gen.generate_one_with_length(4) == 'defg'
+
+    def test_set_lengths(self, analysis, sample_words):
+        gen = MarkovGenerator(analysis, seed=42)
+        gen.train_on_words(sample_words)
+        gen.set_lengths([6, 9])
+
+        words = gen.generate(10)
+        assert len(words) == 10
+        assert {len(w) for w in words} <= {6, 9}
+
+    def test_log_prob(self):
+        analysis = PatternAnalyzer().analyze_words(['ab'])
+        gen = MarkovGenerator(analysis, order=1, exclude_original=False)
+        gen.train_on_words(['ab'] * 9 + ['ac'])
+
+        assert math.isclose(gen.log_prob('ab'), math.log(0.9))
+        assert gen.log_prob('ad') == -math.inf
+        # 'a' never ends a word
+        assert gen.log_prob('a') == -math.inf
+
+    def test_log_prob_unresolved_walk(self):
+        # 'a' has no transitions: the sampler draws from the charset until
+        # the length cap (twice the longest word) and never ends early
+        analysis = PatternAnalyzer().analyze_words(['ab'])
+        gen = MarkovGenerator(analysis, order=1, exclude_original=False,
+                              transitions={'\x00': {'a': 1}})
+
+        assert math.isclose(gen.log_prob('abab'), 3 * math.log(1 / 2))
+        assert gen.log_prob('ab') == -math.inf
+        assert gen.log_prob('ababa') == -math.inf
+        assert all(math.isfinite(gen.log_prob(w)) for w in gen.generate(8))
+
+    def test_log_prob_sums_to_one(self):
+        # No cycles: every string the chain can produce is enumerated
+        words = ['pass1', 'pass12', 'word1', 'sword']
+        analysis = PatternAnalyzer().analyze_words(words)
+        gen = MarkovGenerator(analysis, order=2, exclude_original=False)
+        gen.train_on_words(words)
+
+        total = sum(math.exp(gen.log_prob(w)) for w in gen.generate_ordered())
+        assert math.isclose(total, 1.0)
+
+    def test_length_range_matches_chain(self):
+        # P(len 2) = P(len 3) = 1/2 under the chain
+        analysis = PatternAnalyzer().analyze_words(['ab', 'abc'])
+        gen = MarkovGenerator(analysis, seed=7, order=1)
+        gen.set_length_range(2, 3)
+
+        words = [gen.generate_one() for _ in range(2000)]
+        assert set(words) == {'ab', 'abc'}
+        assert 800 < words.count('ab') < 1200
+
 
 class TestHybridGenerator:
     """Tests for HybridGenerator."""
@@ -128,6 +250,48 @@ class TestHybridGenerator:
         words = gen.generate(5)
         assert len(words) == 5
 
+    def test_adaptive_weights_follow_yield(self, analysis):
+        gen = HybridGenerator(
+            analysis,
+            generators=[
+                (SmartGenerator, 0.5, {}),
+                (RandomGenerator, 0.5, {}),
+            ],
+            seed=42,
+            adaptive=True,
+        )
+        gen._yield_words = [10.0, 1.0]
+        gen._yield_seconds = [1.0, 1.0]
+        gen._rebalance()
+
+        (_, smart), (_, random_) = gen.effective_weights
+        assert smart > 0.5 > random_ >= 0.25 * 0.5 - 1e-9
+        assert smart + random_ == pytest.approx(1.0)
+
+        words = gen.generate(300)
+        assert len(words) == len(set(words)) == 300
+        for _, weight in gen.effective_weights:
+            assert 0.125 - 1e-9 <= weight <= 1.0
+
+    def test_log_prob_mixes_sub_generators(self, analysis):
+        gen = HybridGenerator(
+            analysis,
+            generators=[
+                (SmartGenerator, 0.75, {}),
+                (MarkovGenerator, 0.25, {}),
+            ],
+            seed=42,
+        )
+        smart, markov = gen._generators
+
+        for word in gen.generate(10):
+            expected = 0.75 * math.exp(smart.log_prob(word)) + 0.25 * math.exp(markov.log_prob(word))
+            assert math.isclose(math.exp(gen.log_prob(word)), expected)
+
+    def test_adaptive_bounds_validated(self, analysis):
+        with pytest.raises(ValueError):
+            create_hybrid_generator(analysis, adaptive=True, weight_bounds=(2.0, 4.0))
+
 
 class TestMutator:
     """Tests for Mutator."""
@@ -0,0 +1,131 @@
+"""Tests for parallel generation."""
+
+import pickle
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from edap.analyzer import PatternAnalyzer
+from edap.cli import main
+from edap.exceptions import InsufficientDataError
+from edap.generators import PatternGenerator, RandomGenerator, SmartGenerator
+from edap.parallel import ConcurrentHybridGenerator, ParallelGenerator, derive_seed
+
+
+@pytest.fixture
+def analysis():
+    """Analysis result with a reasonably large keyspace."""
+    words = [
+        'password1', 'Password2', 'admin123', 'letmein9',
+        'qwerty12', 'dragon77', 'monkey55', 'shadow01',
+    ]
+    return PatternAnalyzer().analyze_words(words)
+
+
+@pytest.fixture
+def sample_wordlist():
+    """Create a temporary wordlist file."""
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
+        for word in ['alpha1', 'bravo2', 'charl3', 'delta4', 'echoo5', 'foxtr6']:
+            f.write(word + '\n')
+        filepath = Path(f.name)
+
+    yield filepath
+
+    filepath.unlink()
+
+
+class TestDeriveSeed:
+    """Tests for seed derivation."""
+
+    def test_deterministic(self):
+        assert derive_seed(42, 0, 1) == derive_seed(42, 0, 1)
+
+    def test_independent_streams(self):
+        seeds = {derive_seed(42, w, c) for w in range(4) for c in range(4)}
+        assert len(seeds) == 16
+
+
+class TestParallelGenerator:
+    """Tests for ParallelGenerator."""
+
+    def test_analysis_is_picklable(self, analysis):
+        restored = pickle.loads(pickle.dumps(analysis))
+        assert restored.cooccurrence == analysis.cooccurrence
+
+    def test_generate_unique(self, analysis):
+        gen = ParallelGenerator(RandomGenerator, analysis, workers=2, seed=1)
+        words = gen.generate(200)
+
+        assert len(words) == 200
+        assert len(set(words)) == 200
+
+    def test_same_seed_same_output(self, analysis):
+        first = ParallelGenerator(SmartGenerator, analysis, workers=2, seed=5).generate(50)
+        second = ParallelGenerator(SmartGenerator, analysis, workers=2, seed=5).generate(50)
+
+        assert first == second
+
+    def test_unordered_merge(self, analysis):
+        gen = ParallelGenerator(
+            RandomGenerator, analysis, workers=2, seed=3, ordered=False,
+        )
+        words = gen.generate(50)
+
+        assert len(set(words)) == 50
+
+    def test_stops_when_space_exhausted(self):
+        analysis = PatternAnalyzer().analyze_words(['ab', 'cd'])
+        gen = ParallelGenerator(RandomGenerator, analysis, workers=2, seed=1)
+
+        words = gen.generate(1000)
+        assert len(words) < 1000
+        assert len(set(words)) == len(words)
+
+    def test_cli_workers_reproducible(self, sample_wordlist, capsys):
+        args = [
+            str(sample_wordlist), '-n', '20', '--workers', '2',
+            '--seed', '9', '--no-banner', '-q',
+        ]
+        assert main(args) == 0
+        first = capsys.readouterr().out
+        assert main(args) == 0
+        second = capsys.readouterr().out
+
+        assert first == second
+        assert len(first.split()) == 20
+
+
+class TestConcurrentHybridGenerator:
+    """Tests for the concurrent hybrid producers."""
+
+    def test_generate_unique(self, analysis):
+        gen = ConcurrentHybridGenerator(
+            [(RandomGenerator, 0.5, {}), (PatternGenerator, 0.5, {})], analysis, seed=3)
+        gen.set_original_words({'password1'})
+
+        words = gen.generate(300)
+        assert len(words) == len(set(words)) == 300
+        assert 'password1' not in words
+
+    def test_ends_when_producers_are_spent(self):
+        analysis = PatternAnalyzer().analyze_words(['ab', 'cd'])
+        gen = ConcurrentHybridGenerator(
+            [(RandomGenerator, 0.7, {}), (SmartGenerator, 0.3, {})], analysis, seed=1)
+
+        words = list(gen.generate_iter(0))
+        assert 0 < len(words) == len(set(words)) <= 16
+
+    def test_lengths_no_producer_can_make(self, analysis):
+        with pytest.raises(InsufficientDataError):
+            ConcurrentHybridGenerator([(RandomGenerator, 1.0, {})], analysis, lengths=[3])
+
+    def test_cli_concurrent(self, sample_wordlist, capsys):
+        base = [str(sample_wordlist), '-n', '25', '--concurrent', '--no-banner', '-q']
+
+        assert main(base + ['-m', 'hybrid']) == 0
+        words = capsys.readouterr().out.split()
+        assert len(words) == len(set(words)) == 25
+
+        assert main(base) == 1
@@ -0,0 +1,75 @@
+"""Tests for the PCFG generator."""
+
+import math
+
+import pytest
+
+from edap.analyzer import PatternAnalyzer
+from edap.generators import PCFGGenerator
+from edap.models import split_segments
+
+
+@pytest.fixture
+def analysis():
+    """Analysis result with a few segment structures."""
+    words = [
+        'pass123', 'word123', 'pass99', 'love99', 'love123',
+        'admin!', 'hello', 'hello1',
+    ]
+    return PatternAnalyzer().analyze_words(words)
+
+
+class TestPCFGGenerator:
+    """Tests for PCFGGenerator."""
+
+    def test_generate_follows_grammar(self, analysis):
+        gen = PCFGGenerator(analysis, seed=42)
+        words = gen.generate(10)
+
+        assert len(words) == 10
+        for word in words:
+            segments = split_segments(word)
+            assert ''.join(key for key, _ in segments) in analysis.structures
+            for key, text in segments:
+                assert text in analysis.terminals[key]
+
+    def test_seed_reproducible(self, analysis):
+        first = PCFGGenerator(analysis, seed=7).generate(5)
+        second = PCFGGenerator(analysis, seed=7).generate(5)
+
+        assert first == second
+
+    def test_guesses_descending_and_unique(self, analysis):
+        gen = PCFGGenerator(analysis)
+        guesses = list(gen.generate_guesses())
+
+        numbers = [n for n, _, _ in guesses]
+        words = [w for _, w, _ in guesses]
+        probs = [p for _, _, p in guesses]
+
+        assert numbers == list(range(1, len(guesses) + 1))
+        assert len(words) == len(set(words))
+        assert all(a >= b - 1e-12 for a, b in zip(probs, probs[1:]))
+        assert math.isclose(sum(probs), 1.0)
+
+    def test_guess_probability(self, analysis):
+        gen = PCFGGenerator(analysis)
+        guesses = {w: p for _, w, p in gen.generate_guesses()}
+
+        # P(L4D3) = 3/8, P(pass | L4) = 2/5, P(123 | D3) = 1
+        assert math.isclose(guesses['pass123'], 3 / 8 * 2 / 5)
+
+    def test_log_prob(self, analysis):
+        gen = PCFGGenerator(analysis)
+
+        assert math.isclose(gen.log_prob('pass123'), math.log(3 / 8 * 2 / 5))
+        assert gen.log_prob('pass1') == -math.inf
+        for word, log_prob in gen._enumerate_top(20):
+            assert math.isclose(gen.log_prob(word), log_prob, abs_tol=1e-12)
+
+    def test_set_lengths(self, analysis):
+        gen = PCFGGenerator(analysis, seed=1)
+        gen.set_lengths([6])
+
+        assert all(len(w) == 6 for w in gen.generate(5))
+        assert all(len(w) == 6 for w in gen.generate_top(5))
@@ -0,0 +1,114 @@
+"""Tests for wordlist ranking."""
+
+import functools
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from edap.analyzer import PatternAnalyzer
+from edap.generators import MarkovGenerator, PatternGenerator, RandomGenerator
+from edap.ranker import Ranker
+
+
+@pytest.fixture
+def analysis():
+    """Analysis result to score candidates against."""
+    words = [
+        'password1', 'password2', 'admin123', 'letmein9',
+        'qwerty12', 'dragon77', 'monkey55', 'shadow01',
+    ]
+    return PatternAnalyzer().analyze_words(words)
+
+
+@pytest.fixture
+def candidates():
+    """A wordlist with duplicates, blank lines, CRLF ends and no final newline."""
+    words = ['zzzz', 'password1', 'admin123', '', 'Q!', 'password1',
+             'monkey55', 'x', 'dragon77\r', 'shadow99', 'abc']
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False, newline='') as f:
+        f.write('\n'.join(words))
+        filepath = Path(f.name)
+
+    yield filepath
+
+    filepath.unlink()
+
+
+def expected(scorer, path):
+    """Lines of a file sorted stably by descending log probability."""
+    lines = [line.rstrip('\r') for line in path.read_text().split('\n') if line.rstrip('\r')]
+    return sorted(((line, scorer.log_prob(line)) for line in lines), key=lambda item: -item[1])
+
+
+class TestRanker:
+    """Tests for Ranker."""
+
+    @pytest.mark.parametrize('factory', [RandomGenerator, PatternGenerator, MarkovGenerator])
+    def test_descending_in_memory(self, analysis, candidates, factory):
+        ranker = Ranker(factory, analysis)
+        ranked = list(ranker.rank(candidates))
+        scorer = factory(analysis, seed=0, exclude_original=False)
+
+        assert ranked == expected(scorer, candidates)
+        assert ranker.lines == 10
+        assert ranker.runs == 1
+
+    def test_external_merge_matches_in_memory(self, analysis, candidates):
+        # Tiny runs and fan-in force several runs and intermediate merge passes
+        ranker = Ranker(PatternGenerator, analysis, chunk_bytes=8, fan_in=2)
+        ranked = list(ranker.rank(candidates))
+
+        assert ranker.runs > 4
+        assert ranked == list(Ranker(PatternGenerator, analysis).rank(candidates))
+
+    def test_process_pool(self, analysis, candidates):
+        factory = functools.partial(MarkovGenerator, order=1)
+        ranker = Ranker(factory, analysis, workers=2, chunk_bytes=16, fan_in=2)
+        ranked = list(ranker.rank(candidates))
+
+        assert ranked == list(Ranker(factory, analysis).rank(candidates))
+        assert ranker.runs > 2
+
+    def test_min_logprob(self, analysis, candidates):
+        ranked = list(Ranker(RandomGenerator, analysis).rank(candidates))
+        cutoff = ranked[4][1]
+        ranker = Ranker(RandomGenerator, analysis, chunk_bytes=10, min_logprob=cutoff)
+
+        kept = list(ranker.rank(candidates))
+        assert kept == [item for item in ranked if item[1] >= cutoff]
+        assert ranker.dropped == len(ranked) - len(kept)
+
+    def test_latin1_lines_round_trip(self, analysis, tmp_path):
+        lines = [b'abc\xff\xfedef', 'caf\u00e9'.encode('latin-1'), b'password1', 'na\u00efve'.encode()]
+        source = tmp_path / 'latin1.txt'
+        source.write_bytes(b'\n'.join(lines) + b'\n')
+
+        # External merge and the pool both pass through run files
+        for ranker in (Ranker(PatternGenerator, analysis, chunk_bytes=8, fan_in=2),
+                       Ranker(PatternGenerator, analysis, workers=2, chunk_bytes=8)):
+            words = [word for word, _ in ranker.rank(source)]
+            assert sorted(word.encode('utf-8', 'surrogateescape') for word in words) == sorted(lines)
+
+    def test_cleans_up_run_files(self, analysis, candidates):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ranked = Ranker(RandomGenerator, analysis, chunk_bytes=8, tmp_dir=tmpdir).rank(candidates)
+            next(ranked)
+            assert os.listdir(tmpdir)
+            ranked.close()
+            assert not os.listdir(tmpdir)
+
+    def test_split_at_line_ends(self, analysis, candidates):
+        ranges = Ranker(RandomGenerator, analysis, chunk_bytes=5).split(candidates)
+        data = candidates.read_bytes()
+
+        assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+        assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+        assert all(data[end - 1:end] == b'\n' for _, end in ranges[:-1])
+
+    def test_invalid_arguments(self, analysis):
+        with pytest.raises(ValueError):
+            Ranker(RandomGenerator, analysis, workers=0)
+        with pytest.raises(ValueError):
+            Ranker(RandomGenerator, analysis, fan_in=1)
@@ -0,0 +1,169 @@
+"""Tests for the persistent emitted store."""
+
+import functools
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from edap.analyzer import PatternAnalyzer
+from edap.cli import main
+from edap.exporters import ResultExporter
+from edap.generators import RandomGenerator
+from edap.store import EmittedStore
+
+
+@pytest.fixture
+def store_path():
+    """Path for a temporary store database."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir) / 'emitted.db'
+
+
+@pytest.fixture
+def sample_wordlist():
+    """Create a temporary wordlist file."""
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
+        for word in ['abc1', 'abd2', 'abe3', 'xyz4', 'xya5', 'qrs6']:
+            f.write(word + '\n')
+        filepath = Path(f.name)
+
+    yield filepath
+
+    filepath.unlink()
+
+
+class TestEmittedStore:
+    """Tests for EmittedStore."""
+
+    def test_claim_new_and_repeat(self, store_path):
+        with EmittedStore(store_path) as store:
+            assert store.claim('hello') is True
+            assert store.claim('hello') is False
+            assert 'hello' in store
+            assert 'world' not in store
+            assert len(store) == 1
+
+    def test_persists_across_opens(self, store_path):
+        with EmittedStore(store_path) as store:
+            store.add_many(['a', 'b', 'c'])
+
+        with EmittedStore(store_path) as store:
+            assert len(store) == 3
+            assert store.claim('b') is False
+
+    def test_concurrent_handles_never_share_a_claim(self, store_path):
+        first = EmittedStore(store_path, batch_size=1)
+        second = EmittedStore(store_path, batch_size=1)
+        try:
+            assert first.claim('word') is True
+            assert second.claim('word') is False
+        finally:
+            first.close()
+            second.close()
+
+    def test_unconfirmed_claims_are_rolled_back(self, store_path):
+        store = EmittedStore(store_path, batch_size=1, deferred=True)
+        store.claim('written')
+        store.confirm()
+        store.claim('lost')
+        store.close(commit=False)
+
+        with EmittedStore(store_path) as store:
+            assert 'written' in store
+            assert 'lost' not in store
+
+    def test_pending_claims_do_not_hold_the_lock(self, store_path):
+        first = EmittedStore(store_path, deferred=True)
+        second = EmittedStore(store_path, timeout=0.1)
+        try:
+            assert first.claim('word') is True
+            first.flush()
+            # The claim is visible at once, and nothing waits for the lock
+            assert second.claim('word') is False
+            assert second.claim('other') is True
+            second.flush()
+        finally:
+            first.close()
+            second.close()
+
+    def test_dead_run_claims_are_released(self, store_path, monkeypatch):
+        crashed = EmittedStore(store_path, deferred=True)
+        crashed.claim('word')
+        crashed.flush()
+        crashed._conn.close()  # dies without confirming or cleaning up
+
+        monkeypatch.setattr('edap.store._alive', lambda pid: False)
+        with EmittedStore(store_path, deferred=True) as store:
+            assert 'word' not in store
+            assert store.claim('word') is True
+
+    def test_generator_skips_emitted(self, store_path):
+        analysis = PatternAnalyzer().analyze_words(['ab', 'cd', 'ef', 'gh'])
+
+        with EmittedStore(store_path) as store:
+            gen = RandomGenerator(analysis, seed=1)
+            gen.set_emitted_store(store)
+            first = gen.generate(5)
+
+        with EmittedStore(store_path) as store:
+            gen = RandomGenerator(analysis, seed=1)
+            gen.set_emitted_store(store)
+            second = gen.generate(5)
+
+        assert first
+        assert not set(first) & set(second)
+
+    def test_cli_runs_do_not_repeat(self, sample_wordlist, store_path, capsys):
+        args = [
+            str(sample_wordlist), '-n', '5', '--seed', '7',
+            '--emitted-db', str(store_path), '--no-banner', '-q',
+        ]
+        assert main(args) == 0
+        first = capsys.readouterr().out.split()
+        assert main(args) == 0
+        second = capsys.readouterr().out.split()
+
+        assert len(first) == 5
+        assert not set(first) & set(second)
+
+    def test_cli_interrupted_run_keeps_unwritten_candidates(
+        self, sample_wordlist, store_path, capsys, monkeypatch,
+    ):
+        def broken_export(self, data, stream, *args, **kwargs):
+            for i, item in enumerate(data):
+                if i == 3:
+                    raise BrokenPipeError
+                stream.write(item + '\n')
+
+        args = [
+            str(sample_wordlist), '-n', '5', '--seed', '7',
+            '--emitted-db', str(store_path), '--no-banner', '-q',
+        ]
+        with monkeypatch.context() as m:
+            m.setattr(ResultExporter, 'export_stream', broken_export)
+            m.setattr('edap.cli._silence_stdout', lambda: None)
+            assert main(args) == 0
+        capsys.readouterr()
+
+        # Nothing was committed, so the full run emits the same candidates
+        with EmittedStore(store_path) as store:
+            assert len(store) == 0
+        assert main(args) == 0
+        assert len(capsys.readouterr().out.split()) == 5
+
+    def test_cli_reports_a_locked_store(self, sample_wordlist, store_path, monkeypatch, caplog):
+        holder = EmittedStore(store_path)
+        holder.claim('held')  # keeps the write transaction open
+        monkeypatch.setattr(
+            'edap.cli.EmittedStore', functools.partial(EmittedStore, timeout=0.1),
+        )
+        try:
+            args = [
+                str(sample_wordlist), '-n', '5', '--seed', '7',
+                '--emitted-db', str(store_path), '--no-banner', '-q',
+            ]
+            assert main(args) == 1
+            assert 'database is locked' in caplog.text
+        finally:
+            holder.close()